@@ -0,0 +1,336 @@
+"""
+Benchmark every serializer and compressor combination over a payload corpus.
+
+For each combination this reports the stored size, the compression ratio, the
+encode/decode throughput and the peak memory allocated while encoding and
+decoding. With ``--redis`` the same combinations are also measured end to end
+through ``RedisCache.set``/``RedisCache.get`` against a running server.
+
+Usage::
+
+    python -m benchmarks.serialization
+    python -m benchmarks.serialization --payload queryset --serializer pickle
+    python -m benchmarks.serialization --redis redis://127.0.0.1:6379/15
+    python -m benchmarks.serialization --save baseline.json
+    python -m benchmarks.serialization --compare baseline.json --tolerance 0.2
+"""
+
+import argparse
+import datetime
+import decimal
+import json
+import random
+import sys
+import time
+import tracemalloc
+from contextlib import suppress
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+from django.utils.module_loading import import_string
+
+from django_redis.exceptions import CompressorError
+
+SERIALIZERS = {
+    "pickle": "django_redis.serializers.pickle.PickleSerializer",
+    "json": "django_redis.serializers.json.JSONSerializer",
+    "msgpack": "django_redis.serializers.msgpack.MSGPackSerializer",
+}
+
+COMPRESSORS = {
+    "identity": "django_redis.compressors.identity.IdentityCompressor",
+    "zlib": "django_redis.compressors.zlib.ZlibCompressor",
+    "gzip": "django_redis.compressors.gzip.GzipCompressor",
+    "lzma": "django_redis.compressors.lzma.LzmaCompressor",
+    "lz4": "django_redis.compressors.lz4.Lz4Compressor",
+    "zstd": "django_redis.compressors.zstd.ZStdCompressor",
+}
+
+# Metrics compared by --compare, higher is better
+THROUGHPUT_METRICS = ("encode_mb_s", "decode_mb_s", "e2e_ops_s")
+
+
+def build_corpus() -> dict[str, Any]:
+    """
+    Payloads modelled on what Django projects usually cache.
+    """
+    rnd = random.Random(42)
+    now = datetime.datetime(2024, 1, 1, 12, 0, 0)
+
+    queryset = [
+        {
+            "id": i,
+            "username": f"user{i}",
+            "email": f"user{i}@example.com",
+            "is_staff": i % 7 == 0,
+            "balance": decimal.Decimal(rnd.randint(0, 10**6)) / 100,
+            "date_joined": now - datetime.timedelta(days=i),
+        }
+        for i in range(500)
+    ]
+    html_fragment = "".join(
+        f'<li class="item"><a href="/products/{i}/">Product {i}</a>'
+        f'<span class="price">{rnd.randint(1, 999)}.99</span></li>\n'
+        for i in range(300)
+    )
+
+    return {
+        "small_dict": {"id": 42, "name": "Foo", "active": True, "score": 12.5},
+        "queryset": queryset,
+        "html_fragment": f'<ul class="products">\n{html_fragment}</ul>',
+        "large_list": [rnd.randint(0, 10**9) for _ in range(100_000)],
+        "binary_blob": bytes(rnd.getrandbits(8) for _ in range(256 * 1024)),
+    }
+
+
+@dataclass
+class Result:
+    payload: str
+    serializer: str
+    compressor: str
+    serialized_bytes: int = 0
+    stored_bytes: int = 0
+    ratio: float = 0.0
+    encode_mb_s: float = 0.0
+    decode_mb_s: float = 0.0
+    encode_peak_kib: float = 0.0
+    decode_peak_kib: float = 0.0
+    e2e_ops_s: Optional[float] = None
+    error: Optional[str] = None
+
+
+def time_per_call(func: Callable[[], Any], min_time: float) -> float:
+    """
+    Return the best average duration of func over three rounds of at least
+    min_time seconds each.
+    """
+    best = float("inf")
+    for _ in range(3):
+        calls = 0
+        start = time.perf_counter()
+        elapsed = 0.0
+        while elapsed < min_time:
+            func()
+            calls += 1
+            elapsed = time.perf_counter() - start
+        best = min(best, elapsed / calls)
+    return best
+
+
+def peak_allocation(func: Callable[[], Any]) -> int:
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def bench_codec(
+    payload: str,
+    value: Any,
+    serializer_name: str,
+    compressor_name: str,
+    min_time: float,
+) -> Result:
+    result = Result(payload, serializer_name, compressor_name)
+    try:
+        serializer = import_string(SERIALIZERS[serializer_name])(options={})
+        compressor = import_string(COMPRESSORS[compressor_name])(options={})
+    except ImportError as e:
+        result.error = f"not installed: {e.name}"
+        return result
+
+    # mirrors DefaultClient.encode/decode for non-integer values
+    def encode() -> bytes:
+        return compressor.compress(serializer.dumps(value))
+
+    try:
+        serialized = serializer.dumps(value)
+        stored = encode()
+    except (TypeError, ValueError) as e:
+        result.error = f"unsupported: {e}"
+        return result
+
+    def decode() -> Any:
+        data = stored
+        # small values are left uncompressed by the compressors
+        with suppress(CompressorError):
+            data = compressor.decompress(stored)
+        return serializer.loads(data)
+
+    megabytes = len(serialized) / 1024 / 1024
+    result.serialized_bytes = len(serialized)
+    result.stored_bytes = len(stored)
+    result.ratio = len(stored) / len(serialized)
+    result.encode_mb_s = megabytes / time_per_call(encode, min_time)
+    result.decode_mb_s = megabytes / time_per_call(decode, min_time)
+    result.encode_peak_kib = peak_allocation(encode) / 1024
+    result.decode_peak_kib = peak_allocation(decode) / 1024
+    return result
+
+
+def bench_end_to_end(
+    results: list[Result],
+    corpus: dict,
+    location: str,
+    min_time: float,
+) -> None:
+    """
+    Measure set + get round trips through RedisCache for each combination.
+    """
+    from django.conf import settings
+
+    # the caches are built directly, settings may already be configured
+    if not settings.configured:
+        settings.configure()
+
+    from django_redis.cache import RedisCache
+
+    for result in results:
+        if result.error:
+            continue
+        cache = RedisCache(
+            location,
+            {
+                "KEY_PREFIX": "django-redis-benchmark",
+                "OPTIONS": {
+                    "SERIALIZER": SERIALIZERS[result.serializer],
+                    "COMPRESSOR": COMPRESSORS[result.compressor],
+                },
+            },
+        )
+        value = corpus[result.payload]
+
+        def round_trip(cache=cache, value=value) -> None:
+            cache.set("value", value)
+            cache.get("value")
+
+        # each round trip is one set and one get
+        result.e2e_ops_s = 2 / time_per_call(round_trip, min_time)
+        cache.delete("value")
+
+
+def print_table(results: list[Result], file=sys.stdout) -> None:
+    columns = [
+        ("payload", "{:<14}"),
+        ("serializer", "{:<10}"),
+        ("compressor", "{:<10}"),
+        ("stored_bytes", "{:>12}"),
+        ("ratio", "{:>6.3f}"),
+        ("encode_mb_s", "{:>11.1f}"),
+        ("decode_mb_s", "{:>11.1f}"),
+        ("encode_peak_kib", "{:>15.1f}"),
+        ("decode_peak_kib", "{:>15.1f}"),
+        ("e2e_ops_s", "{:>10.0f}"),
+    ]
+    if all(result.e2e_ops_s is None for result in results):
+        columns.pop()
+
+    header = []
+    for name, fmt in columns:
+        width = fmt.strip("{:<>}").split(".")[0]
+        align = "<" if "<" in fmt else ">"
+        header.append(f"{name:{align}{width}}")
+    file.write("  ".join(header) + "\n")
+
+    for result in results:
+        row = asdict(result)
+        if result.error:
+            cells = [fmt.format(row[name]) for name, fmt in columns[:3]]
+            file.write("  ".join([*cells, result.error]) + "\n")
+            continue
+        file.write(
+            "  ".join(fmt.format(row[name]) for name, fmt in columns) + "\n",
+        )
+
+
+def compare(results: list[Result], baseline_path: Path, tolerance: float) -> bool:
+    """
+    Report combinations slower than the baseline by more than tolerance.
+    """
+    baseline = {
+        (row["payload"], row["serializer"], row["compressor"]): row
+        for row in json.loads(baseline_path.read_text())
+    }
+    ok = True
+    for result in results:
+        previous = baseline.get((result.payload, result.serializer, result.compressor))
+        if result.error or previous is None:
+            continue
+        for metric in THROUGHPUT_METRICS:
+            current, reference = getattr(result, metric), previous.get(metric)
+            if not current or not reference:
+                continue
+            change = current / reference - 1
+            if change < -tolerance:
+                ok = False
+                sys.stderr.write(
+                    f"regression: {result.payload}/{result.serializer}/"
+                    f"{result.compressor} {metric} {reference:.1f} -> "
+                    f"{current:.1f} ({change:+.0%})\n",
+                )
+    return ok
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    corpus = build_corpus()
+
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--payload",
+        action="append",
+        choices=corpus,
+        help="limit to payload(s)",
+    )
+    parser.add_argument(
+        "--serializer",
+        action="append",
+        choices=SERIALIZERS,
+        help="limit to serializer(s)",
+    )
+    parser.add_argument(
+        "--compressor",
+        action="append",
+        choices=COMPRESSORS,
+        help="limit to compressor(s)",
+    )
+    parser.add_argument(
+        "--min-time",
+        type=float,
+        default=0.1,
+        help="minimum seconds spent per measurement round (default: 0.1)",
+    )
+    parser.add_argument("--redis", metavar="URL", help="also run end to end")
+    parser.add_argument("--save", type=Path, help="write results as JSON")
+    parser.add_argument("--compare", type=Path, help="baseline JSON to compare to")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.2,
+        help="allowed throughput drop against the baseline (default: 0.2)",
+    )
+    args = parser.parse_args(argv)
+
+    payloads = args.payload or list(corpus)
+    results = [
+        bench_codec(payload, corpus[payload], serializer, compressor, args.min_time)
+        for payload in payloads
+        for serializer in args.serializer or SERIALIZERS
+        for compressor in args.compressor or COMPRESSORS
+    ]
+    if args.redis:
+        bench_end_to_end(results, corpus, args.redis, args.min_time)
+
+    print_table(results)
+
+    if args.save:
+        args.save.write_text(json.dumps([asdict(r) for r in results], indent=2))
+    if args.compare and not compare(results, args.compare, args.tolerance):
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1 @@
+Add ``incr_buffered`` to increment counters in memory and write them in batches.
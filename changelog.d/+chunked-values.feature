@@ -0,0 +1 @@
+Add ``CHUNK_SIZE`` option to transparently split large values across multiple keys
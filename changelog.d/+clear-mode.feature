@@ -0,0 +1 @@
+Add ``CLEAR_MODE`` option to clear the cache with ``FLUSHDB ASYNC`` or by removing only the keys under its prefix, and clear shards in parallel.
@@ -0,0 +1 @@
+Add ``COMPRESSOR_FALLBACKS`` option to read values written by previously configured compressors.
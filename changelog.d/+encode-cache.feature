@@ -0,0 +1 @@
+Add ``ENCODE_CACHE_SIZE`` option to reuse the encoded form of large strings and ``Immutable`` values.
@@ -0,0 +1 @@
+Add ``touch_many``, ``expire_many``, ``pexpire_many``, ``expire_at_many`` and ``persist_many`` to change the expiry of many keys at once.
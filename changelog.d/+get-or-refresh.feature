@@ -0,0 +1 @@
+Add ``get_or_refresh`` to serve stale values while they are refreshed in the background.
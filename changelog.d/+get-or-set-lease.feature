@@ -0,0 +1 @@
+Compute missing values only once in ``get_or_set``, other callers wait for them or get a stale copy.
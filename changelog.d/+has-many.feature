@@ -0,0 +1 @@
+Add ``has_many`` and ``count_existing`` to check the presence of many keys at once.
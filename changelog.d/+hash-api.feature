@@ -0,0 +1 @@
+Add ``hget``, ``hmget``, ``hgetall``, ``hincrby`` and ``hscan_iter``, setting several fields with ``hset(mapping=...)`` and hash support in ``ShardClient``.
@@ -0,0 +1 @@
+Add ``HASH_BUCKETING`` option to store keys as fields of a fixed number of hashes.
@@ -0,0 +1 @@
+Support ``incr``, ``decr``, ``incr_many`` and ``incr_float`` in ``HerdClient``, numbers keep their header in a companion key, and touch its values without reading them.
@@ -0,0 +1 @@
+Store ``HerdClient`` metadata in a binary header and add the ``HERD_MODE`` option for XFetch early refreshes.
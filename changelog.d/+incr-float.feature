@@ -0,0 +1 @@
+Add ``incr_float``, atomic with the new ``NATIVE_FLOATS`` option which stores floats in the Redis numeric format for ``INCRBYFLOAT``. The option is off by default, as earlier versions can't read native floats.
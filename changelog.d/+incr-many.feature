@@ -0,0 +1 @@
+Add ``incr_many`` and ``decr_many`` to increment or decrement many keys in a single round trip.
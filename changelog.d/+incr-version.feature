@@ -0,0 +1 @@
+Make ``incr_version`` atomic, moving the raw value on the server with its expiry, and add ``incr_version_many``.
@@ -0,0 +1 @@
+Add ``MAX_KEY_LENGTH`` option to shorten long keys to a readable prefix and a digest.
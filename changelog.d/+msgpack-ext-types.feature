@@ -0,0 +1 @@
+Support datetimes, decimals, UUIDs and sets in ``MSGPackSerializer``, reuse a packer per thread and add the ``MSGPACK_USE_LIST`` option.
@@ -0,0 +1 @@
+Add ``NAMESPACE_SEPARATOR`` option and ``invalidate_namespace`` to invalidate all the keys of a namespace at once.
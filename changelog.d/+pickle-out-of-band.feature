@@ -0,0 +1 @@
+Add ``PICKLE_OUT_OF_BAND_THRESHOLD`` option to pickle large binary payloads out-of-band with protocol 5
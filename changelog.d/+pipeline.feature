@@ -0,0 +1 @@
+Add ``cache.pipeline()`` to batch calls to the cache methods, returning futures.
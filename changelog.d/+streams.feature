@@ -0,0 +1 @@
+Add ``set_stream`` and ``get_stream`` to cache large binary values with constant memory, and streaming interfaces to compressors
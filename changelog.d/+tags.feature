@@ -0,0 +1 @@
+Add ``tags`` argument to ``set`` and ``set_many``, and ``invalidate_tags`` and ``prune_tags`` to remove tagged keys without scanning the keyspace.
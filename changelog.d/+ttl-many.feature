@@ -0,0 +1 @@
+Add ``ttl_many`` and ``pttl_many``, and make ``ttl`` and ``pttl`` a single command.
@@ -10,6 +10,7 @@ from django.utils.module_loading import import_string
 from django_redis.exceptions import ConnectionInterrupted
 
 CONNECTION_INTERRUPTED = object()
+_NOT_CALLED = object()
 
 
 def omit_exception(
@@ -39,6 +40,23 @@ def omit_exception(
     return _decorator
 
 
+class _CallOnce:
+    """
+    Callable returning the result of its first call on later calls, so that a
+    default already computed by the client isn't computed again after a
+    connection error.
+    """
+
+    def __init__(self, fn: Callable[[], Any]) -> None:
+        self._fn = fn
+        self._value: Any = _NOT_CALLED
+
+    def __call__(self) -> Any:
+        if self._value is _NOT_CALLED:
+            self._value = self._fn()
+        return self._value
+
+
 class RedisCache(BaseCache):
     def __init__(self, server: str, params: dict[str, Any]) -> None:
         super().__init__(params)
@@ -90,6 +108,10 @@ class RedisCache(BaseCache):
     def incr_version(self, *args, **kwargs):
         return self.client.incr_version(*args, **kwargs)
 
+    @omit_exception
+    def incr_version_many(self, *args, **kwargs):
+        return self.client.incr_version_many(*args, **kwargs)
+
     @omit_exception
     def add(self, *args, **kwargs):
         return self.client.add(*args, **kwargs)
@@ -104,6 +126,29 @@ class RedisCache(BaseCache):
     def _get(self, key, default, version, client):
         return self.client.get(key, default=default, version=version, client=client)
 
+    def get_or_set(self, key, default, *args, **kwargs):
+        if callable(default):
+            default = _CallOnce(default)
+        value = self._get_or_set(key, default, *args, **kwargs)
+        if value is CONNECTION_INTERRUPTED:
+            value = default() if callable(default) else default
+        return value
+
+    @omit_exception(return_value=CONNECTION_INTERRUPTED)
+    def _get_or_set(self, *args, **kwargs):
+        return self.client.get_or_set(*args, **kwargs)
+
+    def get_or_refresh(self, key, fn, *args, **kwargs):
+        fn = _CallOnce(fn)
+        value = self._get_or_refresh(key, fn, *args, **kwargs)
+        if value is CONNECTION_INTERRUPTED:
+            value = fn()
+        return value
+
+    @omit_exception(return_value=CONNECTION_INTERRUPTED)
+    def _get_or_refresh(self, *args, **kwargs):
+        return self.client.get_or_refresh(*args, **kwargs)
+
     @omit_exception
     def delete(self, *args, **kwargs):
         """returns a boolean instead of int since django version 3.1"""
@@ -119,6 +164,18 @@ class RedisCache(BaseCache):
     def delete_many(self, *args, **kwargs):
         return self.client.delete_many(*args, **kwargs)
 
+    @omit_exception
+    def invalidate_tags(self, *args, **kwargs):
+        return self.client.invalidate_tags(*args, **kwargs)
+
+    @omit_exception
+    def prune_tags(self, *args, **kwargs):
+        return self.client.prune_tags(*args, **kwargs)
+
+    @omit_exception
+    def invalidate_namespace(self, *args, **kwargs):
+        return self.client.invalidate_namespace(*args, **kwargs)
+
     @omit_exception
     def clear(self):
         return self.client.clear()
@@ -131,18 +188,57 @@ class RedisCache(BaseCache):
     def set_many(self, *args, **kwargs):
         return self.client.set_many(*args, **kwargs)
 
+    @omit_exception
+    def set_stream(self, *args, **kwargs):
+        return self.client.set_stream(*args, **kwargs)
+
+    @omit_exception
+    def get_stream(self, *args, **kwargs):
+        return self.client.get_stream(*args, **kwargs)
+
     @omit_exception
     def incr(self, *args, **kwargs):
         return self.client.incr(*args, **kwargs)
 
+    @omit_exception
+    def incr_many(self, *args, **kwargs):
+        return self.client.incr_many(*args, **kwargs)
+
+    @omit_exception
+    def decr_many(self, *args, **kwargs):
+        return self.client.decr_many(*args, **kwargs)
+
+    @omit_exception
+    def incr_buffered(self, *args, **kwargs):
+        return self.client.incr_buffered(*args, **kwargs)
+
+    @omit_exception
+    def flush_counters(self, *args, **kwargs):
+        return self.client.flush_counters(*args, **kwargs)
+
+    def counter_stats(self):
+        return self.client.counter_stats()
+
     @omit_exception
     def decr(self, *args, **kwargs):
         return self.client.decr(*args, **kwargs)
 
+    @omit_exception
+    def incr_float(self, *args, **kwargs):
+        return self.client.incr_float(*args, **kwargs)
+
     @omit_exception
     def has_key(self, *args, **kwargs):
         return self.client.has_key(*args, **kwargs)
 
+    @omit_exception
+    def has_many(self, *args, **kwargs):
+        return self.client.has_many(*args, **kwargs)
+
+    @omit_exception
+    def count_existing(self, *args, **kwargs):
+        return self.client.count_existing(*args, **kwargs)
+
     @omit_exception
     def keys(self, *args, **kwargs):
         return self.client.keys(*args, **kwargs)
@@ -159,6 +255,14 @@ class RedisCache(BaseCache):
     def pttl(self, *args, **kwargs):
         return self.client.pttl(*args, **kwargs)
 
+    @omit_exception
+    def ttl_many(self, *args, **kwargs):
+        return self.client.ttl_many(*args, **kwargs)
+
+    @omit_exception
+    def pttl_many(self, *args, **kwargs):
+        return self.client.pttl_many(*args, **kwargs)
+
     @omit_exception
     def persist(self, *args, **kwargs):
         return self.client.persist(*args, **kwargs)
@@ -179,6 +283,9 @@ class RedisCache(BaseCache):
     def pexpire_at(self, *args, **kwargs):
         return self.client.pexpire_at(*args, **kwargs)
 
+    def pipeline(self, *args, **kwargs):
+        return self.client.pipeline(*args, **kwargs)
+
     @omit_exception
     def lock(self, *args, **kwargs):
         return self.client.lock(*args, **kwargs)
@@ -191,6 +298,26 @@ class RedisCache(BaseCache):
     def touch(self, *args, **kwargs):
         return self.client.touch(*args, **kwargs)
 
+    @omit_exception
+    def touch_many(self, *args, **kwargs):
+        return self.client.touch_many(*args, **kwargs)
+
+    @omit_exception
+    def persist_many(self, *args, **kwargs):
+        return self.client.persist_many(*args, **kwargs)
+
+    @omit_exception
+    def expire_many(self, *args, **kwargs):
+        return self.client.expire_many(*args, **kwargs)
+
+    @omit_exception
+    def pexpire_many(self, *args, **kwargs):
+        return self.client.pexpire_many(*args, **kwargs)
+
+    @omit_exception
+    def expire_at_many(self, *args, **kwargs):
+        return self.client.expire_at_many(*args, **kwargs)
+
     @omit_exception
     def sadd(self, *args, **kwargs):
         return self.client.sadd(*args, **kwargs)
@@ -263,6 +390,26 @@ class RedisCache(BaseCache):
     def hset(self, *args, **kwargs):
         return self.client.hset(*args, **kwargs)
 
+    @omit_exception
+    def hget(self, *args, **kwargs):
+        return self.client.hget(*args, **kwargs)
+
+    @omit_exception
+    def hmget(self, *args, **kwargs):
+        return self.client.hmget(*args, **kwargs)
+
+    @omit_exception
+    def hgetall(self, *args, **kwargs):
+        return self.client.hgetall(*args, **kwargs)
+
+    @omit_exception
+    def hincrby(self, *args, **kwargs):
+        return self.client.hincrby(*args, **kwargs)
+
+    @omit_exception
+    def hscan_iter(self, *args, **kwargs):
+        return self.client.hscan_iter(*args, **kwargs)
+
     @omit_exception
     def hdel(self, *args, **kwargs):
         return self.client.hdel(*args, **kwargs)
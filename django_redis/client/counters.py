@@ -0,0 +1,162 @@
+import atexit
+import logging
+import os
+import threading
+import time
+from typing import Callable, Optional
+
+from django.conf import settings
+from redis.typing import KeyT
+
+
+class CounterBuffer:
+    """
+    Accumulate counter increments in memory and write them in batches.
+
+    Deltas are summed per key and passed to ``flush``, which returns the deltas
+    it could not write, to be retried. Flushes are run by a background thread
+    every ``interval`` seconds or as soon as ``max_updates`` increments are
+    pending, and at process exit. Increments still pending when the process
+    dies are lost, ``pending`` tells how many that would be.
+
+    Buffers are shared by the threads of a process, see get_counter_buffer.
+    """
+
+    def __init__(
+        self,
+        flush: Callable[[dict[KeyT, int]], dict[KeyT, int]],
+        interval: float,
+        max_updates: int,
+    ) -> None:
+        self._flush = flush
+        self._interval = interval
+        self._max_updates = max_updates
+        self._lock = threading.Lock()
+        self._deltas: dict[KeyT, int] = {}
+        self._updates = 0
+        self._wake = threading.Event()
+        self._exiting = False
+        self._pid: Optional[int] = None
+        self._logger = logging.getLogger(
+            getattr(settings, "DJANGO_REDIS_LOGGER", __name__),
+        )
+
+        self.flushes = 0
+        # duration of the last flush, in seconds
+        self.flush_latency = 0.0
+        # increments that could not be written at exit
+        self.dropped = 0
+
+    @property
+    def pending(self) -> int:
+        """
+        Number of increments not written yet.
+        """
+        return self._updates
+
+    def add(self, key: KeyT, delta: int) -> None:
+        with self._lock:
+            if self._pid != os.getpid():
+                self._start()
+            self._deltas[key] = self._deltas.get(key, 0) + delta
+            self._updates += 1
+            if self._updates >= self._max_updates:
+                self._wake.set()
+
+    def flush(self) -> None:
+        """
+        Write the pending increments, those that can't be written are kept for
+        the next flush.
+        """
+        with self._lock:
+            if self._pid != os.getpid():
+                # forked, the increments of the parent are its own to write
+                self._deltas, self._updates = {}, 0
+            deltas, updates = self._deltas, self._updates
+            self._deltas, self._updates = {}, 0
+        if not deltas:
+            return
+
+        start = time.perf_counter()
+        try:
+            failed = self._flush(deltas)
+        except Exception:
+            self._restore(deltas, updates)
+            raise
+        self.flush_latency = time.perf_counter() - start
+        self.flushes += 1
+        if failed:
+            self._restore(failed, updates)
+            self._logger.warning("Failed to flush %d counters", len(failed))
+
+    def _restore(self, deltas: dict[KeyT, int], updates: int) -> None:
+        with self._lock:
+            for key, delta in deltas.items():
+                self._deltas[key] = self._deltas.get(key, 0) + delta
+            self._updates += updates
+
+    def _start(self) -> None:
+        # threads don't survive a fork, a new one is started in the child
+        self._pid = os.getpid()
+        self._deltas, self._updates = {}, 0
+        threading.Thread(
+            target=self._run,
+            name="django-redis-counters",
+            daemon=True,
+        ).start()
+
+    def _run(self) -> None:
+        while not self._exiting:
+            self._wake.wait(self._interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception:
+                self._logger.exception("Failed to flush counters")
+
+    def _flush_at_exit(self) -> None:
+        self._exiting = True
+        self._wake.set()
+        try:
+            self.flush()
+        except Exception:
+            self._logger.exception("Failed to flush counters")
+        if self._updates:
+            self.dropped += self._updates
+            self._logger.error("Dropped %d counter increments", self._updates)
+
+
+_buffers: dict[tuple[str, float, int], CounterBuffer] = {}
+_buffers_lock = threading.Lock()
+
+
+def get_counter_buffer(
+    config: str,
+    flush: Callable[[dict[KeyT, int]], dict[KeyT, int]],
+    interval: float,
+    max_updates: int,
+) -> CounterBuffer:
+    """
+    Return the buffer of the caches configured by config, shared by the
+    threads of the process so that a single thread flushes their increments.
+
+    Caches with the same config make and write keys alike, so flush is only
+    used by the call creating the buffer. Caches sharing a location with
+    another key prefix, version or serializer have their own buffer.
+    """
+    name = (config, interval, max_updates)
+    with _buffers_lock:
+        buffer = _buffers.get(name)
+        if buffer is None:
+            buffer = _buffers[name] = CounterBuffer(flush, interval, max_updates)
+        return buffer
+
+
+def _flush_buffers_at_exit() -> None:
+    with _buffers_lock:
+        buffers = list(_buffers.values())
+    for buffer in buffers:
+        buffer._flush_at_exit()
+
+
+atexit.register(_flush_buffers_at_exit)
@@ -1,10 +1,17 @@
 import builtins
+import functools
+import hashlib
 import random
 import re
+import secrets
 import socket
+import threading
+import time
+import zlib
 from collections import OrderedDict
-from collections.abc import Iterable, Iterator
+from collections.abc import Callable, Iterable, Iterator, Sequence
 from contextlib import suppress
+from datetime import datetime, timedelta
 from typing import (
     Any,
     Optional,
@@ -13,19 +20,28 @@ from typing import (
 )
 
 from django.conf import settings
-from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache, get_key_func
+from django.core.cache.backends.base import (
+    DEFAULT_TIMEOUT,
+    BaseCache,
+    default_key_func,
+    get_key_func,
+)
 from django.core.exceptions import ImproperlyConfigured
 from django.utils.module_loading import import_string
 from redis import Redis
+from redis.client import Pipeline
 from redis.exceptions import ConnectionError as RedisConnectionError
 from redis.exceptions import ResponseError
 from redis.exceptions import TimeoutError as RedisTimeoutError
 from redis.typing import AbsExpiryT, EncodableT, ExpiryT, KeyT, PatternT
 
 from django_redis import pool
+from django_redis.client.counters import CounterBuffer, get_counter_buffer
 from django_redis.client.mixins import SortedSetMixin
+from django_redis.client.pipeline import CachePipeline
+from django_redis.client.refresh import RefreshExecutor, get_refresh_executor
 from django_redis.exceptions import CompressorError, ConnectionInterrupted
-from django_redis.util import CacheKey
+from django_redis.util import CacheKey, HashedKey, Immutable
 
 _main_exceptions = (
     RedisConnectionError,
@@ -36,12 +52,378 @@ _main_exceptions = (
 
 special_re = re.compile("([*?[])")
 
+# Longest float representation stored by Redis, longer values aren't parsed as
+# floats so decoding large values doesn't pay for a failed conversion
+_FLOAT_MAX_LENGTH = 32
+
+# Keys longer than the MAX_KEY_LENGTH option are shortened to that length: a
+# readable prefix of the key followed by "#" and a digest of the whole key.
+_HASHED_KEY_DIGEST_SIZE = 16
+_HASHED_KEY_RE = re.compile(rf"#[0-9a-f]{{{_HASHED_KEY_DIGEST_SIZE * 2}}}\Z")
+_HASHED_KEY_MIN_LENGTH = 48
+
+# Strings and bytes shorter than this are cheap to encode and not memoized
+_ENCODE_CACHE_MIN_LENGTH = 1024
+
+# Values larger than the CHUNK_SIZE option are stored as fixed-size chunks in
+# the fields of a hash named "<key>:chunks", the key only holds a small
+# manifest:
+#   magic | token | ":" | chunk count
+# Chunk fields are named "<token>:<index>". A fresh token is used on every write
+# so readers of the previous manifest never see mixed chunks. Chunks are first
+# written to "<key>:chunks:<token>", which expires unless it is renamed to
+# "<key>:chunks" when the manifest is swapped in.
+_CHUNK_MAGIC = b"\x00django-redis:chunks:"
+
+# Expiry of the chunks written before their manifest, in milliseconds
+_CHUNK_TMP_TIMEOUT = 60 * 60 * 1000
+
+# Number of chunks fetched per round trip when reading chunked values
+_CHUNK_BATCH_SIZE = 16
+
+# Expiry of the temporary key a stream is written to, in milliseconds
+_STREAM_TMP_TIMEOUT = 60 * 60 * 1000
+
+# Streams start with a random token, checked by each ranged read of get_stream
+# so that it fails rather than mixing two values when the stream is replaced
+_STREAM_TOKEN_SIZE = 8
+
+# KEYS[1]: stream; ARGV: token, start, end. Returns false if the stream
+# doesn't start with token anymore.
+_STREAM_READ_LUA = """
+if redis.call('GETRANGE', KEYS[1], 0, #ARGV[1] - 1) ~= ARGV[1] then
+    return false
+end
+return redis.call('GETRANGE', KEYS[1], ARGV[2], ARGV[3])
+"""
+
+# KEYS[1]: key; ARGV: delta, ignore_key_check. Checking the key in the script
+# keeps a key expiring between the check and INCRBY from being recreated
+# without a timeout.
+_INCR_LUA = """
+if ARGV[2] == '1' or redis.call('EXISTS', KEYS[1]) == 1 then
+    return redis.call('INCRBY', KEYS[1], ARGV[1])
+end
+return false
+"""
+
+# Lua function storing a value. KEYS: key, its chunks and the new chunks if the
+# value is chunked; ARGV: value, px, nx, xx
+_CHUNK_SET_FUNCTION = """
+local function set_value(KEYS, ARGV)
+    local exists = redis.call('EXISTS', KEYS[1]) == 1
+    if (ARGV[3] == '1' and exists) or (ARGV[4] == '1' and not exists) then
+        if KEYS[3] then redis.call('UNLINK', KEYS[3]) end
+        return 0
+    end
+    if KEYS[3] and redis.call('EXISTS', KEYS[3]) == 0 then return 0 end
+    if ARGV[2] ~= '' then
+        redis.call('SET', KEYS[1], ARGV[1], 'PX', ARGV[2])
+    else
+        redis.call('SET', KEYS[1], ARGV[1])
+    end
+    redis.call('UNLINK', KEYS[2])
+    if KEYS[3] then
+        redis.call('RENAME', KEYS[3], KEYS[2])
+        if ARGV[2] ~= '' then
+            redis.call('PEXPIRE', KEYS[2], ARGV[2])
+        else
+            redis.call('PERSIST', KEYS[2])
+        end
+    end
+    return 1
+end
+"""
+
+_CHUNK_SET_LUA = _CHUNK_SET_FUNCTION + "return set_value(KEYS, ARGV)\n"
+
+# KEYS: keys to delete, each followed by its chunks
+_CHUNK_DELETE_LUA = """
+local count = 0
+for i = 1, #KEYS, 2 do
+    count = count + redis.call('DEL', KEYS[i])
+    redis.call('UNLINK', KEYS[i + 1])
+end
+return count
+"""
+
+# KEYS: for each key, its old and new name followed by the old and new name of
+# its chunks with CHUNK_SIZE; ARGV: number of KEYS per key. Renames each key and
+# its chunks, keeping their expiry. Returns 1 per key moved, 0 per missing key.
+_MOVE_LUA = """
+local moved = {}
+local step = tonumber(ARGV[1])
+for i = 1, #KEYS, step do
+    local old, new = KEYS[i], KEYS[i + 1]
+    if redis.call('EXISTS', old) == 0 then
+        moved[#moved + 1] = 0
+    else
+        if step == 4 and old ~= new then
+            redis.call('UNLINK', KEYS[i + 3])
+            if redis.call('EXISTS', KEYS[i + 2]) == 1 then
+                redis.call('RENAME', KEYS[i + 2], KEYS[i + 3])
+            end
+        end
+        redis.call('RENAME', old, new)
+        moved[#moved + 1] = 1
+    end
+end
+return moved
+"""
+
+# Keys managed by the client itself, such as buckets, tag sets or generations,
+# are under this namespace. keys, iter_keys and delete_pattern leave them out.
+_RESERVED_KEY = "django-redis:"
+
+# With HASH_BUCKETING, keys are stored as fields of small hashes named
+# "<_BUCKET_KEY><index>", the index being the CRC32 of the key modulo the
+# number of buckets.
+_BUCKET_KEY = "django-redis:bucket:"
+
+# Field expiry needs Redis 7.4 (HPEXPIRE). On older servers a bucket lives as
+# long as its longest lived field, unless that field is alone in the bucket.
+_BUCKET_LUA_HELPERS = """
+local function expire_field(bucket, field, px)
+    local reply
+    if px == '' then
+        reply = redis.pcall('HPERSIST', bucket, 'FIELDS', 1, field)
+    else
+        reply = redis.pcall('HPEXPIRE', bucket, px, 'FIELDS', 1, field)
+    end
+    if type(reply) ~= 'table' or not reply.err then return end
+    if px == '' then
+        redis.call('PERSIST', bucket)
+        return
+    end
+    local ttl = redis.call('PTTL', bucket)
+    if redis.call('HLEN', bucket) == 1 or (ttl >= 0 and ttl < tonumber(px)) then
+        redis.call('PEXPIRE', bucket, px)
+    end
+end
+
+local function field_pttl(bucket, field)
+    local reply = redis.pcall('HPTTL', bucket, 'FIELDS', 1, field)
+    if type(reply) == 'table' and not reply.err then return reply[1] end
+    return redis.call('PTTL', bucket)
+end
+"""
+
+# Lua function storing a value, with _BUCKET_LUA_HELPERS. KEYS[1]: bucket;
+# ARGV: field, value, px, nx, xx
+_BUCKET_SET_FUNCTION = """
+local function set_value(KEYS, ARGV)
+    local exists = redis.call('HEXISTS', KEYS[1], ARGV[1]) == 1
+    if (ARGV[4] == '1' and exists) or (ARGV[5] == '1' and not exists) then
+        return 0
+    end
+    redis.call('HSET', KEYS[1], ARGV[1], ARGV[2])
+    expire_field(KEYS[1], ARGV[1], ARGV[3])
+    return 1
+end
+"""
+
+_BUCKET_SET_LUA = (
+    _BUCKET_LUA_HELPERS + _BUCKET_SET_FUNCTION + "return set_value(KEYS, ARGV)\n"
+)
+
+# KEYS[1]: key; ARGV: delta, ignore_key_check. INCRBYFLOAT writes integral
+# results without a decimal point, which would be decoded as ints, so one is
+# appended.
+_INCR_FLOAT_LUA = """
+if ARGV[2] ~= '1' and redis.call('EXISTS', KEYS[1]) == 0 then return false end
+local value = redis.call('INCRBYFLOAT', KEYS[1], ARGV[1])
+if not string.find(value, '.', 1, true) then
+    value = value .. '.0'
+    redis.call('APPEND', KEYS[1], '.0')
+end
+return value
+"""
+
+# KEYS[1]: bucket; ARGV: field, delta, ignore_key_check. Like _INCR_FLOAT_LUA,
+# keeping the expiry of the field that HSET clears.
+_BUCKET_INCR_FLOAT_LUA = """
+if ARGV[3] ~= '1' and redis.call('HEXISTS', KEYS[1], ARGV[1]) == 0 then
+    return false
+end
+local value = redis.call('HINCRBYFLOAT', KEYS[1], ARGV[1], ARGV[2])
+if not string.find(value, '.', 1, true) then
+    value = value .. '.0'
+    local ttl = redis.pcall('HPTTL', KEYS[1], 'FIELDS', 1, ARGV[1])
+    redis.call('HSET', KEYS[1], ARGV[1], value)
+    if type(ttl) == 'table' and not ttl.err and ttl[1] > 0 then
+        redis.pcall('HPEXPIRE', KEYS[1], ttl[1], 'FIELDS', 1, ARGV[1])
+    end
+end
+return value
+"""
+
+# KEYS[1]: bucket; ARGV: field, px
+_BUCKET_EXPIRE_LUA = (
+    _BUCKET_LUA_HELPERS
+    + """
+if redis.call('HEXISTS', KEYS[1], ARGV[1]) == 0 then return 0 end
+expire_field(KEYS[1], ARGV[1], ARGV[2])
+return 1
+"""
+)
+
+# KEYS[1]: bucket; ARGV: field. Same replies as PTTL.
+_BUCKET_PTTL_LUA = (
+    _BUCKET_LUA_HELPERS
+    + """
+if redis.call('HEXISTS', KEYS[1], ARGV[1]) == 0 then return -2 end
+return field_pttl(KEYS[1], ARGV[1])
+"""
+)
+
+# KEYS: old and new bucket pairs; ARGV: old and new field pairs. Same replies
+# as _MOVE_LUA.
+_BUCKET_MOVE_LUA = (
+    _BUCKET_LUA_HELPERS
+    + """
+local moved = {}
+for i = 1, #KEYS, 2 do
+    local value = redis.call('HGET', KEYS[i], ARGV[i])
+    if not value then
+        moved[#moved + 1] = 0
+    else
+        if KEYS[i] ~= KEYS[i + 1] or ARGV[i] ~= ARGV[i + 1] then
+            local ttl = field_pttl(KEYS[i], ARGV[i])
+            redis.call('HDEL', KEYS[i], ARGV[i])
+            redis.call('HSET', KEYS[i + 1], ARGV[i + 1], value)
+            expire_field(KEYS[i + 1], ARGV[i + 1], ttl >= 0 and tostring(ttl) or '')
+        end
+        moved[#moved + 1] = 1
+    end
+end
+return moved
+"""
+)
+
+# KEYS[1]: bucket; ARGV: field, delta, command, ignore_key_check
+_BUCKET_INCR_LUA = """
+if ARGV[4] == '1' or redis.call('HEXISTS', KEYS[1], ARGV[1]) == 1 then
+    return redis.call(ARGV[3], KEYS[1], ARGV[1], ARGV[2])
+end
+return false
+"""
+
+
+# Keys set with tags are recorded in one set per tag named "<_TAG_KEY><tag>".
+# A tag set lives as long as its longest lived member.
+_TAG_KEY = "django-redis:tag:"
+
+# With NAMESPACE_SEPARATOR, the generation of each namespace is stored under
+# "<_GENERATION_KEY><namespace>" and folded into the keys of the namespace. A
+# missing generation is seeded with the current time in microseconds, so that a
+# generation that was evicted doesn't make the keys of an old one reachable.
+_GENERATION_KEY = "django-redis:generation:"
+
+# Number of keys scanned and unlinked per round trip by the "prefix" CLEAR_MODE
+_CLEAR_BATCH_SIZE = 1000
+
+_CLEAR_MODES = ("flushdb", "flushdb_async", "prefix")
+
+# Number of tag members deleted or checked per round trip
+_TAG_BATCH_SIZE = 500
+
+# Lua function storing a value with SET. KEYS[1]: key; ARGV: value, px, nx, xx
+_SET_FUNCTION = """
+local function set_value(KEYS, ARGV)
+    local command = {'SET', KEYS[1], ARGV[1]}
+    if ARGV[2] ~= '' then
+        command[#command + 1] = 'PX'
+        command[#command + 1] = ARGV[2]
+    end
+    if ARGV[3] == '1' then command[#command + 1] = 'NX' end
+    if ARGV[4] == '1' then command[#command + 1] = 'XX' end
+    if redis.call(unpack(command)) then return 1 end
+    return 0
+end
+"""
+
+# Appended to a set_value function. KEYS: those of the function followed by the
+# tag sets; ARGV: those of the function followed by their number of KEYS, the
+# member and px. The member is only added to the tag sets if the value is set.
+_TAGGED_SET_CALL = """
+local count = tonumber(ARGV[#ARGV - 2])
+if set_value({unpack(KEYS, 1, count)}, {unpack(ARGV, 1, #ARGV - 3)}) ~= 1 then
+    return 0
+end
+for i = count + 1, #KEYS do
+    redis.call('SADD', KEYS[i], ARGV[#ARGV - 1])
+    if ARGV[#ARGV] == '' then
+        redis.call('PERSIST', KEYS[i])
+    else
+        local ttl = redis.call('PTTL', KEYS[i])
+        local px = tonumber(ARGV[#ARGV])
+        if redis.call('SCARD', KEYS[i]) == 1 or (ttl >= 0 and ttl < px) then
+            redis.call('PEXPIRE', KEYS[i], ARGV[#ARGV])
+        end
+    end
+end
+return 1
+"""
+
+_TAGGED_SET_LUA = _SET_FUNCTION + _TAGGED_SET_CALL
+_TAGGED_CHUNK_SET_LUA = _CHUNK_SET_FUNCTION + _TAGGED_SET_CALL
+_TAGGED_BUCKET_SET_LUA = _BUCKET_LUA_HELPERS + _BUCKET_SET_FUNCTION + _TAGGED_SET_CALL
+
+# KEYS: tag set, then the key of each member or its bucket with HASH_BUCKETING;
+# ARGV: "1" with HASH_BUCKETING, then the members. Returns the number of
+# members removed.
+_TAG_PRUNE_LUA = """
+local removed = 0
+for i = 2, #KEYS do
+    local exists
+    if ARGV[1] == '1' then
+        exists = redis.call('HEXISTS', KEYS[i], ARGV[i])
+    else
+        exists = redis.call('EXISTS', KEYS[i])
+    end
+    if exists == 0 then
+        removed = removed + redis.call('SREM', KEYS[1], ARGV[i])
+    end
+end
+return removed
+"""
+
+# get_or_set computes a missing value under a lease stored in
+# "<_LEASE_KEY><key>", callers not holding it wait for the value to be set.
+# With a stale_timeout, values are copied to "<_STALE_KEY><key>" for longer so
+# waiters can return the previous value instead.
+_LEASE_KEY = "django-redis:lease:"
+_STALE_KEY = "django-redis:stale:"
+
+# Seconds between checks of the value by get_or_set waiters, the release of
+# the lease is also published on its key
+_LEASE_POLL_INTERVAL = 0.1
+
+# KEYS[1]: lease; ARGV[1]: token
+_LEASE_RELEASE_LUA = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    redis.call('DEL', KEYS[1])
+    redis.call('PUBLISH', KEYS[1], 1)
+end
+"""
+
+_MISSING = object()
+
+
+def _generation_seed() -> int:
+    return time.time_ns() // 1000
+
 
 def glob_escape(s: str) -> str:
     return special_re.sub(r"[\1]", s)
 
 
 class DefaultClient(SortedSetMixin):
+    # number of hashes the keys are stored in, 0 without HASH_BUCKETING
+    _hash_buckets = 0
+    _max_key_length: Optional[int] = None
+    _namespace_separator: Optional[str] = None
+
     def __init__(self, server, params: dict[str, Any], backend: BaseCache) -> None:
         self._backend = backend
         self._server = server
@@ -77,6 +459,67 @@ class DefaultClient(SortedSetMixin):
 
         self._serializer = serializer_cls(options=self._options)
         self._compressor = compressor_cls(options=self._options)
+        self._compressor_fallbacks = [
+            import_string(path)(options=self._options)
+            for path in self._options.get("COMPRESSOR_FALLBACKS", ())
+        ]
+
+        self._chunk_size: Optional[int] = self._options.get("CHUNK_SIZE")
+        self._hash_buckets = self._options.get("HASH_BUCKETING", 0)
+        self._max_key_length = self._options.get("MAX_KEY_LENGTH")
+        if (
+            self._max_key_length is not None
+            and self._max_key_length < _HASHED_KEY_MIN_LENGTH
+        ):
+            error_message = f"MAX_KEY_LENGTH must be at least {_HASHED_KEY_MIN_LENGTH}"
+            raise ImproperlyConfigured(error_message)
+        if self._hash_buckets and self._chunk_size:
+            error_message = "HASH_BUCKETING can't be used with CHUNK_SIZE"
+            raise ImproperlyConfigured(error_message)
+
+        self._namespace_separator = self._options.get("NAMESPACE_SEPARATOR")
+        self._generation_timeout: float = self._options.get(
+            "NAMESPACE_GENERATION_TIMEOUT",
+            1,
+        )
+        # namespace -> (generation, monotonic time until which it is used)
+        self._generations: dict[str, tuple[int, float]] = {}
+
+        self._clear_mode = self._options.get("CLEAR_MODE", "flushdb")
+        if self._clear_mode not in _CLEAR_MODES:
+            error_message = f"CLEAR_MODE must be one of {', '.join(_CLEAR_MODES)}"
+            raise ImproperlyConfigured(error_message)
+        if self._clear_mode == "prefix" and (
+            not self._backend.key_prefix
+            or self._backend.key_func is not default_key_func
+        ):
+            # keys can't be told apart from those of other applications
+            error_message = (
+                'CLEAR_MODE "prefix" requires KEY_PREFIX and the default KEY_FUNCTION'
+            )
+            raise ImproperlyConfigured(error_message)
+
+        # off by default, workers of earlier versions can't read native floats
+        self._native_floats: bool = self._options.get("NATIVE_FLOATS", False)
+
+        self._encode_cache_size: int = self._options.get("ENCODE_CACHE_SIZE", 0)
+        self._encode_cache: OrderedDict[
+            Any,
+            tuple[Any, Union[bytes, int, float]],
+        ] = OrderedDict()
+        self._encode_cache_lock = threading.Lock()
+
+        # in milliseconds, like the other durations of the options
+        self._counter_flush_interval: int = self._options.get(
+            "COUNTER_FLUSH_INTERVAL",
+            1000,
+        )
+        self._counter_flush_size: int = self._options.get("COUNTER_FLUSH_SIZE", 1000)
+
+        self._lease_timeout: float = self._options.get("LEASE_TIMEOUT", 10)
+        self._lease_wait_timeout: float = self._options.get("LEASE_WAIT_TIMEOUT", 10)
+        self._refresh_workers: int = self._options.get("REFRESH_WORKERS", 4)
+        self._refresh_queue_size: int = self._options.get("REFRESH_QUEUE_SIZE", 100)
 
         self.connection_factory = pool.get_connection_factory(options=self._options)
 
@@ -181,12 +624,15 @@ class DefaultClient(SortedSetMixin):
         client: Optional[Redis] = None,
         nx: bool = False,
         xx: bool = False,
+        tags: Optional[Sequence[str]] = None,
     ) -> bool:
         """
         Persist a value to the cache, and set an optional expiration time.
 
         Also supports optional nx parameter. If set to True - will use redis
         setnx instead of set.
+
+        The key is recorded as a member of the given tags, see invalidate_tags.
         """
         nkey = self.make_key(key, version=version)
         nvalue = self.encode(value)
@@ -217,7 +663,15 @@ class DefaultClient(SortedSetMixin):
                         # than to set it and than expire in a pipeline
                         return bool(self.delete(key, client=client, version=version))
 
-                return bool(client.set(nkey, nvalue, nx=nx, px=timeout, xx=xx))
+                return self._set_encoded(
+                    client,
+                    nkey,
+                    nvalue,
+                    timeout,
+                    nx,
+                    xx,
+                    tags or (),
+                )
             except _main_exceptions as e:
                 if (
                     not original_client
@@ -240,33 +694,83 @@ class DefaultClient(SortedSetMixin):
         Adds delta to the cache version for the supplied key. Returns the
         new version.
         """
+        if version is None:
+            version = self._backend.version
+
+        if not self.incr_version_many([key], delta, version=version, client=client):
+            error_message = f"Key '{key!r}' not found"
+            raise ValueError(error_message)
+        return version + delta
+
+    def incr_version_many(
+        self,
+        keys: Iterable[KeyT],
+        delta: int = 1,
+        version: Optional[int] = None,
+        client: Optional[Redis] = None,
+    ) -> dict[KeyT, int]:
+        """
+        Adds delta to the cache version of many keys at once.
 
+        The values are moved on the server along with their expiry, without
+        being decoded. Returns the new version of each key found, missing keys
+        are left out.
+        """
         if client is None:
             client = self.get_client(write=True)
 
         if version is None:
             version = self._backend.version
 
-        old_key = self.make_key(key, version)
-        value = self.get(old_key, version=version, client=client)
+        keys = list(keys)
+        if not keys:
+            return {}
+
+        self._prefetch_generations(keys)
+        pairs = [
+            (
+                self.make_key(key, version=version),
+                self._version_key(key, version + delta),
+            )
+            for key in keys
+        ]
 
         try:
-            ttl = self.ttl(old_key, version=version, client=client)
+            moved = self._move_keys(client, pairs)
         except _main_exceptions as e:
             raise ConnectionInterrupted(connection=client) from e
 
-        if value is None:
-            error_message = f"Key '{key!r}' not found"
-            raise ValueError(error_message)
+        return {key: version + delta for key, found in zip(keys, moved) if found}
 
+    def _version_key(self, key: KeyT, version: int) -> KeyT:
+        """
+        Make key for another version, key may already be made by make_key.
+        """
         if isinstance(key, CacheKey):
-            new_key = self.make_key(key.original_key(), version=version + delta)
-        else:
-            new_key = self.make_key(key, version=version + delta)
-
-        self.set(new_key, value, timeout=ttl, client=client)
-        self.delete(old_key, client=client)
-        return version + delta
+            key = self._reverse_key(key)
+        return self.make_key(key, version=version)
+
+    def _move_keys(self, client: Redis, pairs: list[tuple[KeyT, KeyT]]) -> list[int]:
+        """
+        Rename keys made by make_key, returning 1 for each key moved.
+        """
+        if self._hash_buckets:
+            buckets: list[str] = []
+            fields: list[str] = []
+            for pair in pairs:
+                for key in pair:
+                    bucket, field = self._bucket(key)
+                    buckets.append(bucket)
+                    fields.append(field)
+            return client.eval(_BUCKET_MOVE_LUA, len(buckets), *buckets, *fields)
+
+        keys: list[KeyT] = []
+        for old, new in pairs:
+            keys += [old, new]
+            if self._chunk_size:
+                keys += [self._chunks_key(old), self._chunks_key(new)]
+        script = client.register_script(_MOVE_LUA)
+        return script(keys=keys, args=[4 if self._chunk_size else 2])
 
     def add(
         self,
@@ -283,6 +787,227 @@ class DefaultClient(SortedSetMixin):
         """
         return self.set(key, value, timeout, version=version, client=client, nx=True)
 
+    def get_or_set(
+        self,
+        key: KeyT,
+        default: Any,
+        timeout: Optional[float] = DEFAULT_TIMEOUT,
+        version: Optional[int] = None,
+        client: Optional[Redis] = None,
+        lease_timeout: Optional[float] = None,
+        wait_timeout: Optional[float] = None,
+        stale_timeout: Optional[float] = None,
+    ) -> Any:
+        """
+        Return the value of a key, setting it to default if it's missing.
+
+        A callable default is only called by the caller taking a lease on the
+        key for lease_timeout seconds, the others wait up to wait_timeout
+        seconds for the value before calling it themselves. With a
+        stale_timeout, a copy of the value is kept that many seconds past its
+        timeout and returned to waiters.
+        """
+        if client is None:
+            client = self.get_client(write=True)
+
+        value = self.get(key, _MISSING, version=version, client=client)
+        if value is not _MISSING:
+            return value
+
+        if not callable(default):
+            self.add(key, default, timeout=timeout, version=version, client=client)
+            return self.get(key, default, version=version, client=client)
+
+        key = self.make_key(key, version=version)
+        lease_key = str(self._make_key(f"{_LEASE_KEY}{key!s}"))
+        stale_key = self._make_key(f"{_STALE_KEY}{key!s}")
+        token = secrets.token_hex(16)
+        try:
+            value, leased = self._wait_for_lease(
+                client,
+                key,
+                stale_key,
+                lease_key,
+                token,
+                self._lease_timeout if lease_timeout is None else lease_timeout,
+                self._lease_wait_timeout if wait_timeout is None else wait_timeout,
+            )
+        except _main_exceptions as e:
+            raise ConnectionInterrupted(connection=client) from e
+        if value is not _MISSING:
+            return value
+
+        try:
+            value = default()
+            if timeout is DEFAULT_TIMEOUT:
+                timeout = self._backend.default_timeout
+            self.set(key, value, timeout=timeout, client=client)
+            if stale_timeout is not None and timeout is not None:
+                stale_timeout += timeout
+                self.set(stale_key, value, timeout=stale_timeout, client=client)
+        finally:
+            if leased:
+                self._release_lease(client, lease_key, token)
+        return value
+
+    def _wait_for_lease(
+        self,
+        client: Redis,
+        key: KeyT,
+        stale_key: KeyT,
+        lease_key: str,
+        token: str,
+        lease_timeout: float,
+        wait_timeout: float,
+    ) -> tuple[Any, bool]:
+        """
+        Take the lease on a key made by make_key or wait for its value. Returns
+        the value, _MISSING if it has to be computed, and whether the lease was
+        taken.
+        """
+        deadline = time.monotonic() + wait_timeout
+        pubsub = None
+        try:
+            while not client.set(
+                lease_key,
+                token,
+                nx=True,
+                px=int(lease_timeout * 1000),
+            ):
+                if pubsub is None:
+                    value = self.get(stale_key, _MISSING, client=client)
+                    if value is not _MISSING:
+                        return value, False
+                    # subscribed before checking the value, so a release
+                    # between the two isn't missed
+                    pubsub = client.pubsub(ignore_subscribe_messages=True)
+                    pubsub.subscribe(lease_key)
+                value = self.get(key, _MISSING, client=client)
+                remaining = deadline - time.monotonic()
+                if value is not _MISSING or remaining <= 0:
+                    # after wait_timeout, the value is computed without lease
+                    return value, False
+                pubsub.get_message(timeout=min(remaining, _LEASE_POLL_INTERVAL))
+        finally:
+            if pubsub is not None:
+                pubsub.close()
+
+        if pubsub is not None:
+            # the lease was released since the value was last checked
+            value = self.get(key, _MISSING, client=client)
+            if value is not _MISSING:
+                self._release_lease(client, lease_key, token)
+                return value, False
+        return _MISSING, True
+
+    def get_or_refresh(
+        self,
+        key: KeyT,
+        fn: Callable[[], Any],
+        ttl: Optional[float] = DEFAULT_TIMEOUT,
+        stale_ttl: Optional[float] = None,
+        version: Optional[int] = None,
+        client: Optional[Redis] = None,
+    ) -> Any:
+        """
+        Return the value of a key, computing it with fn like get_or_set if it's
+        missing.
+
+        Values are kept stale_ttl seconds past their ttl, ttl by default. A
+        stale value is returned as is and fn is called again in the
+        background, under a lease on the key so that a single process
+        refreshes it.
+        """
+        if client is None:
+            client = self.get_client(write=True)
+
+        if ttl is DEFAULT_TIMEOUT:
+            ttl = self._backend.default_timeout
+        if ttl is None:
+            return self.get_or_set(
+                key,
+                fn,
+                timeout=None,
+                version=version,
+                client=client,
+            )
+        if stale_ttl is None:
+            stale_ttl = ttl
+
+        value = self.get(key, _MISSING, version=version, client=client)
+        if value is not _MISSING:
+            return value
+
+        key = self.make_key(key, version=version)
+        stale_key = self._make_key(f"{_STALE_KEY}{key!s}")
+        value = self.get(stale_key, _MISSING, client=client)
+        if value is _MISSING:
+            return self.get_or_set(
+                key,
+                fn,
+                timeout=ttl,
+                client=client,
+                stale_timeout=stale_ttl,
+            )
+
+        self._refresh_executor().submit(
+            key,
+            functools.partial(
+                self._refresh,
+                client,
+                key,
+                stale_key,
+                fn,
+                ttl,
+                stale_ttl,
+            ),
+        )
+        return value
+
+    def _refresh_executor(self) -> RefreshExecutor:
+        return get_refresh_executor(
+            ",".join(self._server),
+            self._refresh_workers,
+            self._refresh_queue_size,
+        )
+
+    def _refresh(
+        self,
+        client: Redis,
+        key: KeyT,
+        stale_key: KeyT,
+        fn: Callable[[], Any],
+        ttl: float,
+        stale_ttl: float,
+    ) -> None:
+        """
+        Compute again the stale value of a key made by make_key, unless another
+        process is doing it or did it already.
+        """
+        lease_key = str(self._make_key(f"{_LEASE_KEY}{key!s}"))
+        token = secrets.token_hex(16)
+        px = int(self._lease_timeout * 1000)
+        try:
+            if not client.set(lease_key, token, nx=True, px=px):
+                return
+        except _main_exceptions as e:
+            raise ConnectionInterrupted(connection=client) from e
+
+        try:
+            if self.get(key, _MISSING, client=client) is not _MISSING:
+                return
+            value = fn()
+            self.set(key, value, timeout=ttl, client=client)
+            self.set(stale_key, value, timeout=ttl + stale_ttl, client=client)
+        finally:
+            self._release_lease(client, lease_key, token)
+
+    def _release_lease(self, client: Redis, lease_key: str, token: str) -> None:
+        try:
+            client.eval(_LEASE_RELEASE_LUA, 1, lease_key, token)
+        except _main_exceptions as e:
+            raise ConnectionInterrupted(connection=client) from e
+
     def get(
         self,
         key: KeyT,
@@ -301,7 +1026,12 @@ class DefaultClient(SortedSetMixin):
         key = self.make_key(key, version=version)
 
         try:
-            value = client.get(key)
+            if self._hash_buckets:
+                value = client.hget(*self._bucket(key))
+            else:
+                value = client.get(key)
+            if self._chunk_size:
+                value = self._join_chunks(client, [key], [value])[0]
         except _main_exceptions as e:
             raise ConnectionInterrupted(connection=client) from e
 
@@ -321,6 +1051,12 @@ class DefaultClient(SortedSetMixin):
 
         key = self.make_key(key, version=version)
 
+        if self._chunk_size:
+            return self._call_with_chunks(client, key, "persist")
+
+        if self._hash_buckets:
+            return self._bucket_pexpire(client, key, None)
+
         return client.persist(key)
 
     def expire(
@@ -338,6 +1074,14 @@ class DefaultClient(SortedSetMixin):
 
         key = self.make_key(key, version=version)
 
+        if self._chunk_size:
+            return self._call_with_chunks(client, key, "expire", timeout)
+
+        if self._hash_buckets:
+            if isinstance(timeout, timedelta):
+                timeout = int(timeout.total_seconds())
+            return self._bucket_pexpire(client, key, timeout * 1000)
+
         return client.expire(key, timeout)
 
     def pexpire(
@@ -355,6 +1099,14 @@ class DefaultClient(SortedSetMixin):
 
         key = self.make_key(key, version=version)
 
+        if self._chunk_size:
+            return bool(self._call_with_chunks(client, key, "pexpire", timeout))
+
+        if self._hash_buckets:
+            if isinstance(timeout, timedelta):
+                timeout = int(timeout.total_seconds() * 1000)
+            return self._bucket_pexpire(client, key, timeout)
+
         return bool(client.pexpire(key, timeout))
 
     def pexpire_at(
@@ -373,6 +1125,14 @@ class DefaultClient(SortedSetMixin):
 
         key = self.make_key(key, version=version)
 
+        if self._chunk_size:
+            return bool(self._call_with_chunks(client, key, "pexpireat", when))
+
+        if self._hash_buckets:
+            if isinstance(when, datetime):
+                when = int(when.timestamp() * 1000)
+            return self._bucket_pexpire(client, key, when - int(time.time() * 1000))
+
         return bool(client.pexpireat(key, when))
 
     def expire_at(
@@ -391,8 +1151,157 @@ class DefaultClient(SortedSetMixin):
 
         key = self.make_key(key, version=version)
 
+        if self._chunk_size:
+            return self._call_with_chunks(client, key, "expireat", when)
+
+        if self._hash_buckets:
+            if isinstance(when, datetime):
+                when = int(when.timestamp() * 1000)
+            else:
+                when *= 1000
+            return self._bucket_pexpire(client, key, when - int(time.time() * 1000))
+
         return client.expireat(key, when)
 
+    def persist_many(
+        self,
+        keys: Iterable[KeyT],
+        version: Optional[int] = None,
+        client: Optional[Redis] = None,
+    ) -> dict[KeyT, bool]:
+        """
+        Remove the expiry of many keys in a single round trip, see persist.
+        """
+        return self._pexpire_many(keys, None, version, client)
+
+    def expire_many(
+        self,
+        keys: Iterable[KeyT],
+        timeout: ExpiryT,
+        version: Optional[int] = None,
+        client: Optional[Redis] = None,
+    ) -> dict[KeyT, bool]:
+        """
+        Set the expiry of many keys in seconds in a single round trip, see
+        expire.
+        """
+        if timeout is DEFAULT_TIMEOUT:
+            timeout = self._backend.default_timeout  # type: ignore
+        seconds = timeout.total_seconds() if isinstance(timeout, timedelta) else timeout
+        return self._pexpire_many(keys, int(seconds * 1000), version, client)
+
+    def pexpire_many(
+        self,
+        keys: Iterable[KeyT],
+        timeout: ExpiryT,
+        version: Optional[int] = None,
+        client: Optional[Redis] = None,
+    ) -> dict[KeyT, bool]:
+        """
+        Set the expiry of many keys in milliseconds in a single round trip, see
+        pexpire.
+        """
+        if timeout is DEFAULT_TIMEOUT:
+            timeout = self._backend.default_timeout  # type: ignore
+        if isinstance(timeout, timedelta):
+            px = int(timeout.total_seconds() * 1000)
+        else:
+            px = timeout
+        return self._pexpire_many(keys, px, version, client)
+
+    def expire_at_many(
+        self,
+        keys: Iterable[KeyT],
+        when: AbsExpiryT,
+        version: Optional[int] = None,
+        client: Optional[Redis] = None,
+    ) -> dict[KeyT, bool]:
+        """
+        Set the expiry of many keys to ``when`` in a single round trip, see
+        expire_at.
+        """
+        timestamp = when.timestamp() if isinstance(when, datetime) else when
+        px = int(timestamp * 1000) - int(time.time() * 1000)
+        return self._pexpire_many(keys, px, version, client)
+
+    def _pexpire_many(
+        self,
+        keys: Iterable[KeyT],
+        px: Optional[int],
+        version: Optional[int],
+        client: Optional[Redis],
+    ) -> dict[KeyT, bool]:
+        """
+        Set the expiry of many keys in milliseconds, None to persist them.
+        Returns whether the expiry of each key was changed.
+        """
+        if client is None:
+            client = self.get_client(write=True)
+
+        keys = list(keys)
+        self._prefetch_generations(keys)
+        pipeline = client.pipeline(transaction=False)
+        indexes = []
+        queued = 0
+        for key in keys:
+            indexes.append(queued)
+            queued += self._queue_pexpire(
+                pipeline,
+                self.make_key(key, version=version),
+                px,
+            )
+
+        try:
+            results = pipeline.execute()
+        except _main_exceptions as e:
+            raise ConnectionInterrupted(connection=client) from e
+
+        return {key: bool(results[index]) for key, index in zip(keys, indexes)}
+
+    def _queue_pexpire(self, pipeline: Pipeline, key: KeyT, px: Optional[int]) -> int:
+        """
+        Queue the commands setting the expiry of a key made by make_key, the
+        reply of the first one tells whether the expiry was changed. Returns
+        the number of commands queued.
+        """
+        if self._hash_buckets:
+            bucket, field = self._bucket(key)
+            if px is not None and px <= 0:
+                pipeline.hdel(bucket, field)
+            else:
+                pipeline.eval(
+                    _BUCKET_EXPIRE_LUA,
+                    1,
+                    bucket,
+                    field,
+                    "" if px is None else px,
+                )
+            return 1
+
+        keys = [str(key)]
+        if self._chunk_size:
+            keys.append(self._chunks_key(key))
+        for name in keys:
+            if px is None:
+                pipeline.persist(name)
+            else:
+                pipeline.pexpire(name, px)
+        return len(keys)
+
+    def pipeline(self, transaction: bool = False) -> CachePipeline:
+        """
+        Return a pipeline queuing calls to the methods of the client, see
+        CachePipeline.
+        """
+        return CachePipeline(self, transaction=transaction)
+
+    def _pipeline_client(self, key: Optional[KeyT], version: Optional[int]) -> Redis:
+        """
+        Return the Redis client the commands of a pipelined call on key, None
+        for calls on many keys, are sent to.
+        """
+        return self.get_client(write=True)
+
     def lock(
         self,
         key: KeyT,
@@ -430,8 +1339,13 @@ class DefaultClient(SortedSetMixin):
         if client is None:
             client = self.get_client(write=True)
 
+        key = self.make_key(key, version=version, prefix=prefix)
         try:
-            return client.delete(self.make_key(key, version=version, prefix=prefix))
+            if self._chunk_size:
+                return self._delete_keys(client, [key])
+            if self._hash_buckets:
+                return client.hdel(*self._bucket(key))
+            return client.delete(key)
         except _main_exceptions as e:
             raise ConnectionInterrupted(connection=client) from e
 
@@ -446,6 +1360,7 @@ class DefaultClient(SortedSetMixin):
         """
         Remove all keys matching pattern.
         """
+        self._check_no_buckets("delete_pattern")
 
         if client is None:
             client = self.get_client(write=True)
@@ -457,6 +1372,8 @@ class DefaultClient(SortedSetMixin):
             pipeline = client.pipeline()
 
             for key in client.scan_iter(match=pattern, count=itersize):
+                if self._is_reserved(key.decode()):
+                    continue
                 pipeline.delete(key)
                 count += 1
             pipeline.execute()
@@ -478,29 +1395,150 @@ class DefaultClient(SortedSetMixin):
         if client is None:
             client = self.get_client(write=True)
 
+        keys = list(keys)
+        self._prefetch_generations(keys)
         keys = [self.make_key(k, version=version) for k in keys]
 
         if not keys:
             return 0
 
         try:
-            return client.delete(*keys)
+            return self._delete_keys(client, keys)
+        except _main_exceptions as e:
+            raise ConnectionInterrupted(connection=client) from e
+
+    def _delete_keys(self, client: Redis, keys: list[KeyT]) -> int:
+        """
+        Remove keys made by make_key, returning the number of keys removed.
+        """
+        if self._chunk_size:
+            script = client.register_script(_CHUNK_DELETE_LUA)
+            chunks = [self._chunks_key(key) for key in keys]
+            return script(keys=[k for pair in zip(keys, chunks) for k in pair])
+        if self._hash_buckets:
+            pipeline = client.pipeline(transaction=False)
+            for bucket, fields in self._group_by_bucket(keys).items():
+                pipeline.hdel(bucket, *fields)
+            return sum(pipeline.execute())
+        return client.delete(*keys)
+
+    def invalidate_tags(self, *tags: str, client: Optional[Redis] = None) -> int:
+        """
+        Remove all keys set with any of the given tags.
+
+        Returns the number of keys removed.
+        """
+        if client is None:
+            client = self.get_client(write=True)
+
+        count = 0
+        try:
+            for tag in tags:
+                tag_key = self._tag_key(tag)
+                while True:
+                    members = cast(
+                        "list[bytes]",
+                        client.spop(tag_key, _TAG_BATCH_SIZE),
+                    )
+                    popped = len(members)
+                    if members:
+                        count += self._delete_keys(
+                            client,
+                            [CacheKey(member.decode()) for member in members],
+                        )
+                    if popped < _TAG_BATCH_SIZE:
+                        break
+        except _main_exceptions as e:
+            raise ConnectionInterrupted(connection=client) from e
+
+        return count
+
+    def prune_tags(self, *tags: str, client: Optional[Redis] = None) -> int:
+        """
+        Remove the members of tags whose keys were deleted or have expired.
+
+        All tags are pruned if none are given. Returns the number of members
+        removed.
+        """
+        if client is None:
+            client = self.get_client(write=True)
+
+        try:
+            if tags:
+                tag_keys: Iterable[Any] = [self._tag_key(tag) for tag in tags]
+            else:
+                tag_keys = client.scan_iter(
+                    match=self._make_pattern(f"{_TAG_KEY}*"),
+                    count=_TAG_BATCH_SIZE,
+                )
+
+            count = 0
+            for tag_key in tag_keys:
+                members: list[str] = []
+                for member in client.sscan_iter(tag_key, count=_TAG_BATCH_SIZE):
+                    members.append(member.decode())
+                    if len(members) >= _TAG_BATCH_SIZE:
+                        count += self._prune_members(client, tag_key, members)
+                        members = []
+                if members:
+                    count += self._prune_members(client, tag_key, members)
         except _main_exceptions as e:
             raise ConnectionInterrupted(connection=client) from e
 
+        return count
+
+    def _prune_members(self, client: Redis, tag_key: str, members: list[str]) -> int:
+        if self._hash_buckets:
+            keys = [self._bucket(member)[0] for member in members]
+        else:
+            keys = members
+        script = client.register_script(_TAG_PRUNE_LUA)
+        return script(
+            keys=[tag_key, *keys],
+            args=["1" if self._hash_buckets else "", *members],
+        )
+
     def clear(self, client: Optional[Redis] = None) -> None:
         """
         Flush all cache keys.
+
+        The whole database is flushed, unless CLEAR_MODE is "prefix": only the
+        keys under the key prefix of the cache are removed then, in batches.
         """
 
         if client is None:
             client = self.get_client(write=True)
 
         try:
-            client.flushdb()
+            if self._clear_mode == "prefix":
+                self._clear_prefix(client)
+            else:
+                client.flushdb(asynchronous=self._clear_mode == "flushdb_async")
         except _main_exceptions as e:
             raise ConnectionInterrupted(connection=client) from e
 
+    def _clear_prefix(self, client: Redis) -> None:
+        # keys of every version are removed
+        pattern = self._backend.key_func(
+            "*",
+            glob_escape(self._backend.key_prefix),
+            "*",
+        )
+        self._unlink_matching(client, pattern)
+
+    def _unlink_matching(self, client: Redis, pattern: str) -> None:
+        """
+        Remove all keys matching pattern in batches, reserved keys included.
+        """
+        batch = []
+        for key in client.scan_iter(match=pattern, count=_CLEAR_BATCH_SIZE):
+            batch.append(key)
+            if len(batch) >= _CLEAR_BATCH_SIZE:
+                client.unlink(*batch)
+                batch = []
+        if batch:
+            client.unlink(*batch)
+
     def decode(self, value: EncodableT) -> Any:
         """
         Decode the given value.
@@ -508,16 +1546,68 @@ class DefaultClient(SortedSetMixin):
         try:
             value = int(value)
         except (ValueError, TypeError):
-            # Handle little values, chosen to be not compressed
-            with suppress(CompressorError):
-                value = self._compressor.decompress(value)
+            if isinstance(value, bytes) and len(value) <= _FLOAT_MAX_LENGTH:
+                with suppress(ValueError):
+                    return float(value)
+            value = self._decompress(value)
             value = self._serializer.loads(value)
         return value
 
-    def encode(self, value: EncodableT) -> Union[bytes, int]:
+    def _decompress(self, value: EncodableT) -> EncodableT:
+        """
+        Decompress value with the compressor that produced it.
+
+        Values written by one of the COMPRESSOR_FALLBACKS are recognized by
+        their leading bytes, so the compressor can be changed without losing
+        the cached values.
+        """
+        if self._compressor_fallbacks and not self._compressor.detect(value):
+            for compressor in self._compressor_fallbacks:
+                if compressor.detect(value):
+                    with suppress(CompressorError):
+                        return compressor.decompress(value)
+
+        # Handle little values, chosen to be not compressed
+        with suppress(CompressorError):
+            value = self._compressor.decompress(value)
+        return value
+
+    def encode(
+        self,
+        value: Union[EncodableT, Immutable],
+    ) -> Union[bytes, int, float]:
         """
         Encode the given value.
         """
+        memo_key: Any = None
+        if isinstance(value, Immutable):
+            value = value.value
+            # the cache entry holds a reference to the value, so its id can't
+            # be reused by another object while the entry exists
+            memo_key = id(value)
+        elif isinstance(value, (str, bytes)) and len(value) >= _ENCODE_CACHE_MIN_LENGTH:
+            memo_key = value
+
+        if memo_key is None or not self._encode_cache_size:
+            return self._encode(value)
+
+        with self._encode_cache_lock:
+            entry = self._encode_cache.get(memo_key)
+            if entry is not None:
+                self._encode_cache.move_to_end(memo_key)
+                return entry[1]
+
+        encoded = self._encode(value)
+        with self._encode_cache_lock:
+            self._encode_cache[memo_key] = (value, encoded)
+            if len(self._encode_cache) > self._encode_cache_size:
+                self._encode_cache.popitem(last=False)
+        return encoded
+
+    def _encode(self, value: Any) -> Union[bytes, int, float]:
+        if isinstance(value, float) and self._native_floats:
+            # floats are stored in the Redis numeric format, for INCRBYFLOAT
+            return float(value)
 
         if isinstance(value, bool) or not isinstance(value, int):
             value = self._serializer.dumps(value)
@@ -551,15 +1641,17 @@ class DefaultClient(SortedSetMixin):
         if client is None:
             client = self.get_client(write=False)
 
+        keys = list(keys)
         if not keys:
             return OrderedDict()
 
         recovered_data = OrderedDict()
 
+        self._prefetch_generations(keys)
         map_keys = OrderedDict((self.make_key(k, version=version), k) for k in keys)
 
         try:
-            results = client.mget(*map_keys)
+            results = self._mget(client, list(map_keys))
         except _main_exceptions as e:
             raise ConnectionInterrupted(connection=client) from e
 
@@ -575,6 +1667,7 @@ class DefaultClient(SortedSetMixin):
         timeout: Optional[float] = DEFAULT_TIMEOUT,
         version: Optional[int] = None,
         client: Optional[Redis] = None,
+        tags: Optional[Sequence[str]] = None,
     ) -> None:
         """
         Set a bunch of values in the cache at once from a dict of key/value
@@ -586,55 +1679,429 @@ class DefaultClient(SortedSetMixin):
         if client is None:
             client = self.get_client(write=True)
 
+        self._prefetch_generations(data)
         try:
             pipeline = client.pipeline()
             for key, value in data.items():
-                self.set(key, value, timeout, version=version, client=pipeline)
+                self.set(
+                    key,
+                    value,
+                    timeout,
+                    version=version,
+                    client=pipeline,
+                    tags=tags,
+                )
             pipeline.execute()
         except _main_exceptions as e:
             raise ConnectionInterrupted(connection=client) from e
 
-    def _incr(
+    def set_stream(
         self,
         key: KeyT,
-        delta: int = 1,
+        chunks: Iterable[bytes],
+        timeout: Optional[float] = DEFAULT_TIMEOUT,
         version: Optional[int] = None,
         client: Optional[Redis] = None,
-        ignore_key_check: bool = False,
-    ) -> int:
+        chunk_size: int = 64 * 1024,
+    ) -> bool:
+        """
+        Persist a stream of bytes to the cache without materializing it.
+
+        Chunks are compressed one by one and appended in pieces of about
+        ``chunk_size`` bytes to a temporary key, which is renamed to the
+        final key once the stream is exhausted. Readers never see a partial
+        value.
+        """
+        self._check_no_buckets("set_stream")
+
+        if timeout is DEFAULT_TIMEOUT:
+            timeout = self._backend.default_timeout
+
         if client is None:
             client = self.get_client(write=True)
 
-        key = self.make_key(key, version=version)
+        if timeout is not None and timeout <= 0:
+            return bool(self.delete(key, version=version, client=client))
+
+        nkey = str(self.make_key(key, version=version))
+        tmp_key = f"{nkey}:stream:{secrets.token_hex(8)}"
 
         try:
             try:
-                # if key expired after exists check, then we get
-                # key with wrong value and ttl -1.
-                # use lua script for atomicity
-                if not ignore_key_check:
-                    lua = """
-                    local exists = redis.call('EXISTS', KEYS[1])
-                    if (exists == 1) then
-                        return redis.call('INCRBY', KEYS[1], ARGV[1])
-                    else return false end
-                    """
+                buffer = bytearray(secrets.token_bytes(_STREAM_TOKEN_SIZE))
+                for data in self._compressor.compress_stream(chunks):
+                    buffer += data
+                    if len(buffer) >= chunk_size:
+                        self._append_stream(client, tmp_key, buffer)
+                        buffer.clear()
+                self._append_stream(client, tmp_key, buffer)
+
+                pipeline = client.pipeline()
+                if self._chunk_size:
+                    pipeline.unlink(self._chunks_key(nkey))
+                pipeline.rename(tmp_key, nkey)
+                if timeout is None:
+                    pipeline.persist(nkey)
                 else:
-                    lua = """
-                    return redis.call('INCRBY', KEYS[1], ARGV[1])
-                    """
-                value = client.eval(lua, 1, key, delta)
-                if value is None:
-                    error_message = f"Key '{key!r}' not found"
-                    raise ValueError(error_message)
-            except ResponseError as e:
-                # if cached value or total value is greater than 64 bit signed
-                # integer.
-                # elif int is encoded. so redis sees the data as string.
-                # In this situations redis will throw ResponseError
+                    pipeline.pexpire(nkey, int(timeout * 1000))
+                pipeline.execute()
+            except BaseException:
+                with suppress(*_main_exceptions):
+                    client.delete(tmp_key)
+                raise
+        except _main_exceptions as e:
+            raise ConnectionInterrupted(connection=client) from e
 
-                # try to keep TTL of key
-                timeout = self.ttl(key, version=version, client=client)
+        return True
+
+    def _append_stream(self, client: Redis, key: str, data: bytearray) -> None:
+        pipeline = client.pipeline(transaction=False)
+        pipeline.append(key, bytes(data))
+        # abandoned streams are cleaned up by redis
+        pipeline.pexpire(key, _STREAM_TMP_TIMEOUT)
+        pipeline.execute()
+
+    def get_stream(
+        self,
+        key: KeyT,
+        version: Optional[int] = None,
+        client: Optional[Redis] = None,
+        chunk_size: int = 64 * 1024,
+    ) -> Optional[Iterator[bytes]]:
+        """
+        Retrieve a value stored with ``set_stream``.
+
+        Returns ``None`` if the key is not found, otherwise an iterator over
+        the decompressed bytes. The compressed value is read with GETRANGE,
+        ``chunk_size`` bytes at a time while iterating. Each read checks the
+        token the value starts with, a ValueError is raised while iterating
+        if the value was replaced or removed meanwhile.
+        """
+        self._check_no_buckets("get_stream")
+
+        if client is None:
+            client = self.get_client(write=False)
+
+        key = str(self.make_key(key, version=version))
+
+        try:
+            head = client.getrange(key, 0, _STREAM_TOKEN_SIZE + chunk_size - 1)
+        except _main_exceptions as e:
+            raise ConnectionInterrupted(connection=client) from e
+
+        if not head:
+            return None
+
+        return self._compressor.decompress_stream(
+            self._read_stream(client, key, head, chunk_size),
+        )
+
+    def _read_stream(
+        self,
+        client: Redis,
+        key: str,
+        head: bytes,
+        chunk_size: int,
+    ) -> Iterator[bytes]:
+        token, data = head[:_STREAM_TOKEN_SIZE], head[_STREAM_TOKEN_SIZE:]
+        script = client.register_script(_STREAM_READ_LUA)
+        start = len(head)
+        while data:
+            yield data
+            if len(data) < chunk_size:
+                return
+            try:
+                data = script(
+                    keys=[key],
+                    args=[token, start, start + chunk_size - 1],
+                )
+            except _main_exceptions as e:
+                raise ConnectionInterrupted(connection=client) from e
+            if data is None:
+                error_message = f"Stream '{key}' was replaced while it was read"
+                raise ValueError(error_message)
+            start += len(data)
+
+    def _set_chunked(
+        self,
+        client: Union[Redis, Pipeline],
+        key: KeyT,
+        value: Union[bytes, float],
+        timeout: Optional[int],
+        nx: bool,
+        xx: bool,
+        tags: Sequence[str] = (),
+    ) -> bool:
+        """
+        Store a value, splitting it in chunks if it is larger than CHUNK_SIZE.
+
+        Chunks are written first, then the manifest is swapped in by a Lua
+        script that also replaces the chunks of the previous value.
+        """
+        pipeline = (
+            client
+            if isinstance(client, Pipeline)
+            else client.pipeline(transaction=False)
+        )
+        keys = [key, self._chunks_key(key)]
+        chunk_size = cast("int", self._chunk_size)
+        if not isinstance(value, (int, float)) and len(value) > chunk_size:
+            value, tmp_key = self._write_chunks(pipeline, key, value)
+            keys.append(tmp_key)
+
+        lua = _TAGGED_CHUNK_SET_LUA if tags else _CHUNK_SET_LUA
+        keys, args = self._with_tags(
+            keys,
+            [value, "" if timeout is None else timeout, int(nx), int(xx)],
+            key,
+            timeout,
+            tags,
+        )
+        client.register_script(lua)(keys=keys, args=args, client=pipeline)
+        if pipeline is client:
+            return True
+        return bool(pipeline.execute()[-1])
+
+    def _write_chunks(
+        self,
+        pipeline: Pipeline,
+        key: KeyT,
+        value: bytes,
+    ) -> tuple[bytes, str]:
+        """
+        Queue the writes of the chunks of a value to a temporary key, returning
+        the manifest of the value and the temporary key.
+        """
+        chunk_size = cast("int", self._chunk_size)
+        token = secrets.token_hex(8)
+        tmp_key = f"{self._chunks_key(key)}:{token}"
+        view = memoryview(value)
+        count = (len(view) + chunk_size - 1) // chunk_size
+        for index in range(count):
+            pipeline.hset(
+                tmp_key,
+                f"{token}:{index}",
+                view[index * chunk_size : (index + 1) * chunk_size],  # type: ignore[call-overload]
+            )
+        # chunks of a value that is never swapped in are cleaned up by redis
+        pipeline.pexpire(tmp_key, _CHUNK_TMP_TIMEOUT)
+        return _CHUNK_MAGIC + f"{token}:{count}".encode(), tmp_key
+
+    def _join_chunks(
+        self,
+        client: Redis,
+        keys: list[KeyT],
+        values: list[Optional[bytes]],
+    ) -> list[Optional[bytes]]:
+        """
+        Replace chunk manifests in values by the value they point to.
+
+        Chunks are fetched with one HGET each, in pipelines of
+        _CHUNK_BATCH_SIZE commands, so that no reply is larger than a chunk
+        and no round trip than _CHUNK_BATCH_SIZE chunks. A value with a
+        missing chunk is reported as missing.
+        """
+        chunks: list[tuple[int, str, str]] = []
+        for index, value in enumerate(values):
+            if isinstance(value, bytes) and value.startswith(_CHUNK_MAGIC):
+                token, count = value[len(_CHUNK_MAGIC) :].decode().split(":")
+                chunks_key = self._chunks_key(keys[index])
+                chunks += [
+                    (index, chunks_key, f"{token}:{i}") for i in range(int(count))
+                ]
+
+        if not chunks:
+            return values
+
+        parts: dict[int, list[Optional[bytes]]] = {}
+        pipeline = client.pipeline(transaction=False)
+        for start in range(0, len(chunks), _CHUNK_BATCH_SIZE):
+            batch = chunks[start : start + _CHUNK_BATCH_SIZE]
+            for _, chunks_key, field in batch:
+                pipeline.hget(chunks_key, field)
+            for (index, _, _), chunk in zip(batch, pipeline.execute()):
+                parts.setdefault(index, []).append(chunk)
+
+        values = list(values)
+        for index, value_parts in parts.items():
+            if None in value_parts:
+                values[index] = None
+            else:
+                values[index] = b"".join(cast("list[bytes]", value_parts))
+        return values
+
+    def _call_with_chunks(
+        self,
+        client: Redis,
+        key: KeyT,
+        command: str,
+        *args: Any,
+    ) -> Any:
+        """
+        Run an expiry command on key and on its chunks, atomically.
+        """
+        pipeline = client.pipeline()
+        getattr(pipeline, command)(key, *args)
+        getattr(pipeline, command)(self._chunks_key(key), *args)
+        return pipeline.execute()[0]
+
+    def _chunks_key(self, key: KeyT) -> str:
+        return f"{key!s}:chunks"
+
+    def _mget(self, client: Redis, keys: list[KeyT]) -> list[Any]:
+        """
+        Fetch the raw values of keys made by make_key, None for missing keys.
+        """
+        if self._hash_buckets:
+            pipeline = client.pipeline(transaction=False)
+            buckets = self._group_by_bucket(keys)
+            for bucket, fields in buckets.items():
+                pipeline.hmget(bucket, fields)
+            values: dict[str, Any] = {}
+            for fields, results in zip(buckets.values(), pipeline.execute()):
+                values.update(zip(fields, results))
+            return [values[str(key)] for key in keys]
+
+        results = client.mget(*keys)
+        if self._chunk_size:
+            results = self._join_chunks(client, keys, results)
+        return results
+
+    def _bucket(self, key: KeyT) -> tuple[str, str]:
+        """
+        Return the bucket and the field storing a key made by make_key.
+        """
+        field = str(key)
+        index = zlib.crc32(field.encode()) % self._hash_buckets
+        return str(self._make_key(f"{_BUCKET_KEY}{index}")), field
+
+    def _group_by_bucket(self, keys: Iterable[KeyT]) -> dict[str, list[str]]:
+        buckets: dict[str, list[str]] = {}
+        for key in keys:
+            bucket, field = self._bucket(key)
+            buckets.setdefault(bucket, []).append(field)
+        return buckets
+
+    def _set_encoded(
+        self,
+        client: Redis,
+        key: KeyT,
+        value: Union[bytes, float],
+        timeout: Optional[int],
+        nx: bool,
+        xx: bool,
+        tags: Sequence[str] = (),
+    ) -> bool:
+        """
+        Store an encoded value under a key made by make_key, timeout in ms,
+        recording the key in the sets of tags if it is stored.
+        """
+        if self._chunk_size:
+            return self._set_chunked(client, key, value, timeout, nx, xx, tags)
+
+        px = "" if timeout is None else timeout
+        if self._hash_buckets:
+            bucket, field = self._bucket(key)
+            lua = _TAGGED_BUCKET_SET_LUA if tags else _BUCKET_SET_LUA
+            keys, args = self._with_tags(
+                [bucket],
+                [field, value, px, int(nx), int(xx)],
+                key,
+                timeout,
+                tags,
+            )
+            return bool(client.register_script(lua)(keys=keys, args=args))
+
+        if tags:
+            keys, args = self._with_tags(
+                [key],
+                [value, px, int(nx), int(xx)],
+                key,
+                timeout,
+                tags,
+            )
+            script = client.register_script(_TAGGED_SET_LUA)
+            return bool(script(keys=keys, args=args))
+
+        return bool(client.set(key, value, nx=nx, px=timeout, xx=xx))
+
+    def _with_tags(
+        self,
+        keys: list[Any],
+        args: list[Any],
+        key: KeyT,
+        timeout: Optional[int],
+        tags: Sequence[str],
+    ) -> tuple[list[Any], list[Any]]:
+        """
+        Return the keys and args of a script setting a value, followed by those
+        of _TAGGED_SET_CALL if there are tags.
+        """
+        if not tags:
+            return keys, args
+        tag_keys = [self._tag_key(tag) for tag in tags]
+        px = "" if timeout is None else timeout
+        return [*keys, *tag_keys], [*args, len(keys), str(key), px]
+
+    def _tag_key(self, tag: str) -> str:
+        return str(self._make_key(f"{_TAG_KEY}{tag}"))
+
+    def _bucket_pexpire(self, client: Redis, key: KeyT, px: Optional[int]) -> bool:
+        """
+        Set the expiry of a bucketed key in milliseconds, None to persist it.
+        """
+        bucket, field = self._bucket(key)
+        if px is not None and px <= 0:
+            # like EXPIRE, a past expiry deletes the key
+            return bool(client.hdel(bucket, field))
+        return bool(
+            client.eval(_BUCKET_EXPIRE_LUA, 1, bucket, field, "" if px is None else px),
+        )
+
+    def _check_no_buckets(self, operation: str) -> None:
+        if self._hash_buckets:
+            error_message = f"{operation} is not supported with HASH_BUCKETING"
+            raise NotImplementedError(error_message)
+
+    def _incr(
+        self,
+        key: KeyT,
+        delta: int = 1,
+        version: Optional[int] = None,
+        client: Optional[Redis] = None,
+        ignore_key_check: bool = False,
+    ) -> int:
+        if client is None:
+            client = self.get_client(write=True)
+
+        key = self.make_key(key, version=version)
+
+        try:
+            try:
+                if self._hash_buckets:
+                    bucket, field = self._bucket(key)
+                    value = client.eval(
+                        _BUCKET_INCR_LUA,
+                        1,
+                        bucket,
+                        field,
+                        delta,
+                        "HINCRBY",
+                        int(ignore_key_check),
+                    )
+                else:
+                    value = client.eval(_INCR_LUA, 1, key, delta, int(ignore_key_check))
+                if value is None:
+                    error_message = f"Key '{key!r}' not found"
+                    raise ValueError(error_message)
+            except ResponseError as e:
+                # if cached value or total value is greater than 64 bit signed
+                # integer.
+                # elif int is encoded. so redis sees the data as string.
+                # In this situations redis will throw ResponseError
+
+                # try to keep TTL of key
+                timeout = self.ttl(key, version=version, client=client)
 
                 # returns -2 if the key does not exist
                 # means, that key have expired
@@ -648,6 +2115,153 @@ class DefaultClient(SortedSetMixin):
 
         return value
 
+    def incr_many(
+        self,
+        data: dict[KeyT, int],
+        version: Optional[int] = None,
+        client: Optional[Redis] = None,
+        ignore_key_check: bool = False,
+    ) -> dict[KeyT, int]:
+        """
+        Add to many keys their delta from a dict of key/delta pairs, in a
+        single round trip. Returns the new values in the order of data.
+
+        Like incr, a ValueError is raised for missing keys unless
+        ignore_key_check is set, the other keys are incremented anyway.
+        """
+        values, missing = self._incr_many(data, version, client, ignore_key_check)
+        if missing:
+            error_message = f"Keys {missing!r} not found"
+            raise ValueError(error_message)
+        return values
+
+    def decr_many(
+        self,
+        data: dict[KeyT, int],
+        version: Optional[int] = None,
+        client: Optional[Redis] = None,
+        ignore_key_check: bool = False,
+    ) -> dict[KeyT, int]:
+        """
+        Subtract from many keys their delta, like incr_many.
+        """
+        return self.incr_many(
+            {key: -delta for key, delta in data.items()},
+            version=version,
+            client=client,
+            ignore_key_check=ignore_key_check,
+        )
+
+    def _incr_many(
+        self,
+        data: dict[KeyT, int],
+        version: Optional[int],
+        client: Optional[Redis],
+        ignore_key_check: bool,
+    ) -> tuple[dict[KeyT, int], list[KeyT]]:
+        """
+        Increment keys like incr_many, returning the new values and the list
+        of missing keys.
+        """
+        if client is None:
+            client = self.get_client(write=True)
+
+        keys = list(data)
+        self._prefetch_generations(keys)
+        # scripts are called with EVALSHA, the pipeline loads them if needed
+        if self._hash_buckets:
+            script = client.register_script(_BUCKET_INCR_LUA)
+        else:
+            script = client.register_script(_INCR_LUA)
+
+        pipeline = client.pipeline(transaction=False)
+        for key in keys:
+            nkey = self.make_key(key, version=version)
+            if self._hash_buckets:
+                bucket, field = self._bucket(nkey)
+                args = [field, data[key], "HINCRBY", int(ignore_key_check)]
+                script(keys=[bucket], args=args, client=pipeline)
+            else:
+                args = [data[key], int(ignore_key_check)]
+                script(keys=[nkey], args=args, client=pipeline)
+
+        try:
+            results = pipeline.execute(raise_on_error=False)
+        except _main_exceptions as e:
+            raise ConnectionInterrupted(connection=client) from e
+
+        values = {}
+        missing = []
+        for key, value in zip(keys, results):
+            if isinstance(value, ResponseError):
+                # the value isn't stored as an integer, see _incr
+                values[key] = self._incr(
+                    key,
+                    data[key],
+                    version=version,
+                    client=client,
+                    ignore_key_check=ignore_key_check,
+                )
+            elif value is None:
+                missing.append(key)
+            else:
+                values[key] = value
+        return values, missing
+
+    def incr_buffered(
+        self,
+        key: KeyT,
+        delta: int = 1,
+        version: Optional[int] = None,
+    ) -> None:
+        """
+        Add delta to a key without waiting for Redis. Deltas are summed in
+        memory and written in a single round trip every COUNTER_FLUSH_INTERVAL
+        milliseconds, once COUNTER_FLUSH_SIZE increments are pending and at
+        exit. Missing keys are created like with incr_many and
+        ignore_key_check.
+        """
+        self._counter_buffer().add(self.make_key(key, version=version), delta)
+
+    def flush_counters(self) -> None:
+        """
+        Write the increments buffered by incr_buffered now.
+        """
+        self._counter_buffer().flush()
+
+    def counter_stats(self) -> dict[str, float]:
+        """
+        Return the state of the incr_buffered buffer: the number of pending
+        increments, of flushes, the duration of the last flush in seconds and
+        the number of increments that could not be written at exit.
+        """
+        counters = self._counter_buffer()
+        return {
+            "pending": counters.pending,
+            "flushes": counters.flushes,
+            "flush_latency": counters.flush_latency,
+            "dropped": counters.dropped,
+        }
+
+    def _counter_buffer(self) -> CounterBuffer:
+        return get_counter_buffer(
+            repr((self._server, self._params)),
+            self._flush_counters,
+            interval=self._counter_flush_interval / 1000,
+            max_updates=self._counter_flush_size,
+        )
+
+    def _flush_counters(self, deltas: dict[KeyT, int]) -> dict[KeyT, int]:
+        """
+        Write the deltas of keys made by make_key, returning those that could
+        not be written.
+        """
+        try:
+            self._incr_many(deltas, None, None, ignore_key_check=True)
+        except ConnectionInterrupted:
+            return deltas
+        return {}
+
     def incr(
         self,
         key: KeyT,
@@ -682,6 +2296,90 @@ class DefaultClient(SortedSetMixin):
         """
         return self._incr(key=key, delta=-delta, version=version, client=client)
 
+    def incr_float(
+        self,
+        key: KeyT,
+        delta: float = 1.0,
+        version: Optional[int] = None,
+        client: Optional[Redis] = None,
+        ignore_key_check: bool = False,
+    ) -> float:
+        """
+        Add a float delta to value in the cache with INCRBYFLOAT. If the key
+        does not exist, raise a ValueError exception. if ignore_key_check=True
+        then the key will be created and set to the delta value.
+
+        Without NATIVE_FLOATS, floats are serialized and the value is read and
+        written back instead.
+        """
+        if client is None:
+            client = self.get_client(write=True)
+
+        key = self.make_key(key, version=version)
+
+        try:
+            if not self._native_floats:
+                return self._incr_serialized_float(client, key, delta, ignore_key_check)
+            try:
+                if self._hash_buckets:
+                    bucket, field = self._bucket(key)
+                    value = client.eval(
+                        _BUCKET_INCR_FLOAT_LUA,
+                        1,
+                        bucket,
+                        field,
+                        repr(float(delta)),
+                        int(ignore_key_check),
+                    )
+                else:
+                    value = client.eval(
+                        _INCR_FLOAT_LUA,
+                        1,
+                        key,
+                        repr(float(delta)),
+                        int(ignore_key_check),
+                    )
+                if value is None:
+                    error_message = f"Key '{key!r}' not found"
+                    raise ValueError(error_message)
+                return float(value)
+            except ResponseError:
+                # the value isn't stored as a number, e.g. it was written
+                # before NATIVE_FLOATS was enabled
+                return self._incr_serialized_float(client, key, delta, False)
+        except _main_exceptions as e:
+            raise ConnectionInterrupted(connection=client) from e
+
+    def _incr_serialized_float(
+        self,
+        client: Redis,
+        key: KeyT,
+        delta: float,
+        ignore_key_check: bool,
+    ) -> float:
+        """
+        Add delta to the serialized value of a key made by make_key, keeping
+        its expiry.
+        """
+        current = self.get(key, client=client)
+        if current is None:
+            if not ignore_key_check:
+                error_message = f"Key '{key!r}' not found"
+                raise ValueError(error_message) from None
+            current, timeout = 0.0, None
+        else:
+            timeout = self._timeout_left(client, key)
+        value = float(current + delta)
+        self.set(key, value, timeout=timeout, client=client)
+        return value
+
+    def _timeout_left(self, client: Redis, key: KeyT) -> Optional[float]:
+        """
+        Return the timeout to set a key made by make_key with again, so that
+        it keeps its expiry.
+        """
+        return self.ttl(key, client=client)
+
     def ttl(
         self,
         key: KeyT,
@@ -696,20 +2394,10 @@ class DefaultClient(SortedSetMixin):
             client = self.get_client(write=False)
 
         key = self.make_key(key, version=version)
-        if not client.exists(key):
-            return 0
-
-        t = client.ttl(key)
-
-        if t >= 0:
-            return t
-        if t == -1:
-            return None
-        if t == -2:
-            return 0
-
-        # Should never reach here
-        return None
+        try:
+            return self._ttl_result(self._pttl(client, key), milliseconds=False)
+        except _main_exceptions as e:
+            raise ConnectionInterrupted(connection=client) from e
 
     def pttl(
         self,
@@ -725,20 +2413,80 @@ class DefaultClient(SortedSetMixin):
             client = self.get_client(write=False)
 
         key = self.make_key(key, version=version)
-        if not client.exists(key):
-            return 0
+        try:
+            return self._ttl_result(self._pttl(client, key), milliseconds=True)
+        except _main_exceptions as e:
+            raise ConnectionInterrupted(connection=client) from e
+
+    def ttl_many(
+        self,
+        keys: Iterable[KeyT],
+        version: Optional[int] = None,
+        client: Optional[Redis] = None,
+    ) -> dict[KeyT, Optional[int]]:
+        """
+        Return the time-to-live of many keys in seconds, like ttl, in a single
+        round trip.
+        """
+        return self._ttl_many(keys, version, client, milliseconds=False)
 
-        t = client.pttl(key)
+    def pttl_many(
+        self,
+        keys: Iterable[KeyT],
+        version: Optional[int] = None,
+        client: Optional[Redis] = None,
+    ) -> dict[KeyT, Optional[int]]:
+        """
+        Return the time-to-live of many keys in milliseconds, like pttl, in a
+        single round trip.
+        """
+        return self._ttl_many(keys, version, client, milliseconds=True)
 
+    def _ttl_many(
+        self,
+        keys: Iterable[KeyT],
+        version: Optional[int],
+        client: Optional[Redis],
+        milliseconds: bool,
+    ) -> dict[KeyT, Optional[int]]:
+        if client is None:
+            client = self.get_client(write=False)
+
+        keys = list(keys)
+        self._prefetch_generations(keys)
+        pipeline = client.pipeline(transaction=False)
+        for key in keys:
+            self._pttl(pipeline, self.make_key(key, version=version))
+
+        try:
+            results = pipeline.execute()
+        except _main_exceptions as e:
+            raise ConnectionInterrupted(connection=client) from e
+
+        return {
+            key: self._ttl_result(t, milliseconds=milliseconds)
+            for key, t in zip(keys, results)
+        }
+
+    def _pttl(self, client: Union[Redis, Pipeline], key: KeyT) -> Any:
+        """
+        Run PTTL on a key made by make_key, a single call for missing keys too.
+        """
+        if self._hash_buckets:
+            return client.eval(_BUCKET_PTTL_LUA, 1, *self._bucket(key))
+        return client.pttl(str(key))
+
+    @staticmethod
+    def _ttl_result(t: int, milliseconds: bool) -> Optional[int]:
+        """
+        Convert a PTTL reply: None for persistent keys, 0 for missing keys.
+        """
         if t >= 0:
-            return t
+            # rounded like the TTL command
+            return t if milliseconds else (t + 500) // 1000
         if t == -1:
             return None
-        if t == -2:
-            return 0
-
-        # Should never reach here
-        return None
+        return 0
 
     def has_key(
         self,
@@ -755,10 +2503,74 @@ class DefaultClient(SortedSetMixin):
 
         key = self.make_key(key, version=version)
         try:
+            if self._hash_buckets:
+                return bool(client.hexists(*self._bucket(key)))
             return client.exists(key) == 1
         except _main_exceptions as e:
             raise ConnectionInterrupted(connection=client) from e
 
+    def has_many(
+        self,
+        keys: Iterable[KeyT],
+        version: Optional[int] = None,
+        client: Optional[Redis] = None,
+    ) -> dict[KeyT, bool]:
+        """
+        Test if many keys exist, in a single round trip.
+        """
+        if client is None:
+            client = self.get_client(write=False)
+
+        keys = list(keys)
+        return dict(zip(keys, self._exists_many(client, keys, version)))
+
+    def count_existing(
+        self,
+        keys: Iterable[KeyT],
+        version: Optional[int] = None,
+        client: Optional[Redis] = None,
+    ) -> int:
+        """
+        Return how many of keys exist, keys given more than once are counted
+        as many times.
+        """
+        if client is None:
+            client = self.get_client(write=False)
+
+        keys = list(keys)
+        if not keys:
+            return 0
+        if self._hash_buckets:
+            return sum(self._exists_many(client, keys, version))
+
+        self._prefetch_generations(keys)
+        try:
+            return client.exists(
+                *[str(self.make_key(key, version=version)) for key in keys],
+            )
+        except _main_exceptions as e:
+            raise ConnectionInterrupted(connection=client) from e
+
+    def _exists_many(
+        self,
+        client: Redis,
+        keys: list[KeyT],
+        version: Optional[int],
+    ) -> list[bool]:
+        self._prefetch_generations(keys)
+        pipeline = client.pipeline(transaction=False)
+        for key in keys:
+            nkey = str(self.make_key(key, version=version))
+            if self._hash_buckets:
+                pipeline.hexists(*self._bucket(nkey))
+            else:
+                pipeline.exists(nkey)
+
+        try:
+            return [bool(exists) for exists in pipeline.execute()]
+        except _main_exceptions as e:
+            raise ConnectionInterrupted(connection=client) from e
+
     def iter_keys(
         self,
         search: str,
@@ -770,13 +2582,25 @@ class DefaultClient(SortedSetMixin):
         Same as keys, but uses redis >= 2.8 cursors
         for make memory efficient keys iteration.
         """
+        # checked on the call rather than on the first iteration
+        self._check_no_buckets("iter_keys")
 
         if client is None:
             client = self.get_client(write=False)
 
         pattern = self.make_pattern(search, version=version)
+        return self._iter_keys(client, pattern, itersize)
+
+    def _iter_keys(
+        self,
+        client: Redis,
+        pattern: str,
+        itersize: Optional[int],
+    ) -> Iterator[str]:
         for item in client.scan_iter(match=pattern, count=itersize):
-            yield self.reverse_key(item.decode())
+            key = item.decode()
+            if not self._is_reserved(key):
+                yield self._reverse_key(key)
 
     def keys(
         self,
@@ -790,15 +2614,17 @@ class DefaultClient(SortedSetMixin):
         this case, it strongly recommended use iter_keys
         for it.
         """
+        self._check_no_buckets("keys")
 
         if client is None:
             client = self.get_client(write=False)
 
         pattern = self.make_pattern(search, version=version)
         try:
-            return [self.reverse_key(k.decode()) for k in client.keys(pattern)]
+            keys = [k.decode() for k in client.keys(pattern)]
         except _main_exceptions as e:
             raise ConnectionInterrupted(connection=client) from e
+        return [self._reverse_key(k) for k in keys if not self._is_reserved(k)]
 
     def make_key(
         self,
@@ -809,14 +2635,182 @@ class DefaultClient(SortedSetMixin):
         if isinstance(key, CacheKey):
             return key
 
+        if self._namespace_separator and isinstance(key, str):
+            key = self._add_generation(key)
+
+        return self._make_key(key, version=version, prefix=prefix)
+
+    def _make_key(
+        self,
+        key: KeyT,
+        version: Optional[int] = None,
+        prefix: Optional[str] = None,
+    ) -> CacheKey:
+        """
+        Make a key like make_key, without namespace generations. Used for the
+        keys managed by the client itself.
+        """
         if prefix is None:
             prefix = self._backend.key_prefix
 
         if version is None:
             version = self._backend.version
 
+        if (
+            self._max_key_length
+            and isinstance(key, str)
+            and len(key) > self._max_key_length
+        ):
+            key = self._hash_key(key)
+
         return CacheKey(self._backend.key_func(key, prefix, version))
 
+    def _add_generation(self, key: str) -> str:
+        """
+        Insert the generation of the namespace of key after the namespace.
+        """
+        if isinstance(key, HashedKey):
+            # already made, the generation is part of the digest
+            return key
+        separator = cast("str", self._namespace_separator)
+        namespace, found, rest = key.partition(separator)
+        if not found:
+            return key
+        generation = self._get_generation(namespace)
+        return f"{namespace}{separator}{generation}{separator}{rest}"
+
+    def _get_generation(self, namespace: str) -> int:
+        cached = self._generations.get(namespace)
+        if cached is not None and cached[1] > time.monotonic():
+            return cached[0]
+        return self._fetch_generations([namespace])[namespace]
+
+    def _prefetch_generations(self, keys: Iterable[KeyT]) -> None:
+        """
+        Fetch the stale generations of the namespaces of keys in one round trip.
+        """
+        if not self._namespace_separator:
+            return
+        now = time.monotonic()
+        namespaces = set()
+        for key in keys:
+            if isinstance(key, (CacheKey, HashedKey)) or not isinstance(key, str):
+                continue
+            namespace, separator, _ = key.partition(self._namespace_separator)
+            cached = self._generations.get(namespace)
+            if separator and (cached is None or cached[1] <= now):
+                namespaces.add(namespace)
+        if namespaces:
+            self._fetch_generations(list(namespaces))
+
+    def _fetch_generations(self, namespaces: list[str]) -> dict[str, int]:
+        keys = [self._generation_key(namespace) for namespace in namespaces]
+        values = self._read_generations(keys)
+        missing = [key for key, value in zip(keys, values) if value is None]
+        if missing:
+            seeded = dict(zip(missing, self._seed_generations(missing)))
+            values = [seeded.get(key, value) for key, value in zip(keys, values)]
+        until = time.monotonic() + self._generation_timeout
+        generations = {}
+        for namespace, value in zip(namespaces, values):
+            generations[namespace] = int(cast("bytes", value))
+            self._generations[namespace] = (generations[namespace], until)
+        return generations
+
+    def _read_generations(self, keys: list[str]) -> list[Optional[bytes]]:
+        client = self.get_client(write=False)
+        try:
+            return client.mget(keys)
+        except _main_exceptions as e:
+            raise ConnectionInterrupted(connection=client) from e
+
+    def _seed_generations(self, keys: list[str]) -> list[bytes]:
+        """
+        Set the missing generations stored under keys, returning the
+        generations, which may have been set meanwhile by another client.
+        """
+        client = self.get_client(write=True)
+        seed = _generation_seed()
+        pipeline = client.pipeline(transaction=False)
+        for key in keys:
+            pipeline.set(key, seed, nx=True)
+            pipeline.get(key)
+        try:
+            return pipeline.execute()[1::2]
+        except _main_exceptions as e:
+            raise ConnectionInterrupted(connection=client) from e
+
+    def _generation_key(self, namespace: str) -> str:
+        return str(self._make_key(f"{_GENERATION_KEY}{namespace}"))
+
+    def invalidate_namespace(
+        self,
+        namespace: str,
+        client: Optional[Redis] = None,
+    ) -> int:
+        """
+        Invalidate all the keys of a namespace at once by bumping its
+        generation. Requires the NAMESPACE_SEPARATOR option.
+
+        Returns the new generation, the keys of the previous generations are
+        left to expire.
+        """
+        if not self._namespace_separator:
+            error_message = "invalidate_namespace requires NAMESPACE_SEPARATOR"
+            raise ImproperlyConfigured(error_message)
+
+        if client is None:
+            client = self.get_client(write=True)
+
+        key = self._generation_key(namespace)
+        pipeline = client.pipeline(transaction=False)
+        pipeline.set(key, _generation_seed(), nx=True)
+        pipeline.incr(key)
+        try:
+            generation = pipeline.execute()[-1]
+        except _main_exceptions as e:
+            raise ConnectionInterrupted(connection=client) from e
+
+        until = time.monotonic() + self._generation_timeout
+        self._generations[namespace] = (generation, until)
+        return generation
+
+    def _hash_key(self, key: str) -> str:
+        """
+        Shorten key to MAX_KEY_LENGTH characters, keeping a readable prefix.
+        """
+        digest = hashlib.blake2b(
+            key.encode(),
+            digest_size=_HASHED_KEY_DIGEST_SIZE,
+        ).hexdigest()
+        readable_length = cast("int", self._max_key_length) - len(digest) - 1
+        return f"{key[:readable_length]}#{digest}"
+
+    def _is_reserved(self, key: str) -> bool:
+        """
+        Whether a key made by make_key is managed by the client itself.
+        """
+        return self.reverse_key(key).startswith(_RESERVED_KEY)
+
+    def _reverse_key(self, key: str) -> str:
+        """
+        Reverse a key made by make_key, flagging keys shortened by
+        MAX_KEY_LENGTH as HashedKey.
+        """
+        key = self.reverse_key(key)
+        if (
+            self._max_key_length
+            and len(key) == self._max_key_length
+            and _HASHED_KEY_RE.search(key)
+        ):
+            return HashedKey(key)
+        if self._namespace_separator:
+            namespace, separator, rest = key.partition(self._namespace_separator)
+            generation, _, rest = rest.partition(self._namespace_separator)
+            if separator and generation.isdigit():
+                key = f"{namespace}{separator}{rest}"
+        return key
+
     def make_pattern(
         self,
         pattern: str,
@@ -826,6 +2820,19 @@ class DefaultClient(SortedSetMixin):
         if isinstance(pattern, CacheKey):
             return pattern
 
+        if self._namespace_separator:
+            namespace, separator, _ = pattern.partition(self._namespace_separator)
+            if separator and not special_re.search(namespace):
+                pattern = self._add_generation(pattern)
+
+        return self._make_pattern(pattern, version=version, prefix=prefix)
+
+    def _make_pattern(
+        self,
+        pattern: str,
+        version: Optional[int] = None,
+        prefix: Optional[str] = None,
+    ) -> CacheKey:
         if prefix is None:
             prefix = self._backend.key_prefix
         prefix = glob_escape(prefix)
@@ -1123,34 +3130,174 @@ class DefaultClient(SortedSetMixin):
 
         key = self.make_key(key, version=version)
         if timeout is None:
+            if self._chunk_size:
+                return bool(self._call_with_chunks(client, key, "persist"))
+            if self._hash_buckets:
+                return self._bucket_pexpire(client, key, None)
             return bool(client.persist(key))
 
         # Convert to milliseconds
         timeout = int(timeout * 1000)
+        if self._hash_buckets:
+            return self._bucket_pexpire(client, key, timeout)
+        if self._chunk_size:
+            return bool(self._call_with_chunks(client, key, "pexpire", timeout))
         return bool(client.pexpire(key, timeout))
 
+    def touch_many(
+        self,
+        keys: Iterable[KeyT],
+        timeout: Optional[float] = DEFAULT_TIMEOUT,
+        version: Optional[int] = None,
+        client: Optional[Redis] = None,
+    ) -> dict[KeyT, bool]:
+        """
+        Set a new expiration for many keys in a single round trip, see touch.
+        """
+        if timeout is DEFAULT_TIMEOUT:
+            timeout = self._backend.default_timeout
+
+        px = None if timeout is None else int(timeout * 1000)
+        return self._pexpire_many(keys, px, version, client)
+
     def hset(
         self,
-        name: str,
-        key: KeyT,
-        value: EncodableT,
+        name: KeyT,
+        key: Optional[str] = None,
+        value: Optional[EncodableT] = None,
         version: Optional[int] = None,
         client: Optional[Redis] = None,
+        mapping: Optional[dict[str, EncodableT]] = None,
     ) -> int:
         """
-        Set the value of hash name at key to value.
+        Set the value of hash name at key to value, or all the fields of
+        mapping at once.
         Returns the number of fields added to the hash.
         """
         if client is None:
             client = self.get_client(write=True)
-        nkey = self.make_key(key, version=version)
-        nvalue = self.encode(value)
-        return int(client.hset(name, nkey, nvalue))
+        name = str(self.make_key(name, version=version))
+        fields: dict[str, Any] = {} if mapping is None else dict(mapping)
+        if key is not None:
+            fields[key] = value
+        if not fields:
+            return 0
+        encoded: dict[Union[str, bytes], Any] = {
+            field: self.encode(val) for field, val in fields.items()
+        }
+        try:
+            return int(client.hset(name, mapping=encoded))
+        except _main_exceptions as e:
+            raise ConnectionInterrupted(connection=client) from e
+
+    def hget(
+        self,
+        name: KeyT,
+        key: str,
+        default: Optional[Any] = None,
+        version: Optional[int] = None,
+        client: Optional[Redis] = None,
+    ) -> Any:
+        """
+        Return the value of key in hash name, or default if it doesn't exist.
+        """
+        if client is None:
+            client = self.get_client(write=False)
+        name = str(self.make_key(name, version=version))
+        try:
+            value = client.hget(name, key)
+        except _main_exceptions as e:
+            raise ConnectionInterrupted(connection=client) from e
+        if value is None:
+            return default
+        return self.decode(value)
+
+    def hmget(
+        self,
+        name: KeyT,
+        keys: Iterable[str],
+        version: Optional[int] = None,
+        client: Optional[Redis] = None,
+    ) -> dict[str, Any]:
+        """
+        Return a dict with the values of the existing keys of hash name.
+        """
+        if client is None:
+            client = self.get_client(write=False)
+        keys = list(keys)
+        if not keys:
+            return {}
+        name = str(self.make_key(name, version=version))
+        try:
+            values = client.hmget(name, keys)
+        except _main_exceptions as e:
+            raise ConnectionInterrupted(connection=client) from e
+        return {
+            key: self.decode(value)
+            for key, value in zip(keys, values)
+            if value is not None
+        }
+
+    def hgetall(
+        self,
+        name: KeyT,
+        version: Optional[int] = None,
+        client: Optional[Redis] = None,
+    ) -> dict[str, Any]:
+        """
+        Return all the keys and values of hash name.
+        """
+        if client is None:
+            client = self.get_client(write=False)
+        name = str(self.make_key(name, version=version))
+        try:
+            items = client.hgetall(name).items()
+        except _main_exceptions as e:
+            raise ConnectionInterrupted(connection=client) from e
+        return {key.decode(): self.decode(value) for key, value in items}
+
+    def hincrby(
+        self,
+        name: KeyT,
+        key: str,
+        delta: int = 1,
+        version: Optional[int] = None,
+        client: Optional[Redis] = None,
+    ) -> int:
+        """
+        Add delta to the value of key in hash name, which is created if missing.
+        Returns the new value.
+        """
+        if client is None:
+            client = self.get_client(write=True)
+        name = str(self.make_key(name, version=version))
+        try:
+            return int(client.hincrby(name, key, delta))
+        except _main_exceptions as e:
+            raise ConnectionInterrupted(connection=client) from e
+
+    def hscan_iter(
+        self,
+        name: KeyT,
+        match: Optional[str] = None,
+        count: Optional[int] = None,
+        version: Optional[int] = None,
+        client: Optional[Redis] = None,
+    ) -> Iterator[tuple[str, Any]]:
+        """
+        Iterate over the keys and values of hash name with HSCAN, without
+        loading the whole hash at once. match filters the keys.
+        """
+        if client is None:
+            client = self.get_client(write=False)
+        name = str(self.make_key(name, version=version))
+        for key, value in client.hscan_iter(name, match=match, count=count):
+            yield key.decode(), self.decode(value)
 
     def hdel(
         self,
-        name: str,
-        key: KeyT,
+        name: KeyT,
+        key: str,
         version: Optional[int] = None,
         client: Optional[Redis] = None,
     ) -> int:
@@ -1160,12 +3307,16 @@ class DefaultClient(SortedSetMixin):
         """
         if client is None:
             client = self.get_client(write=True)
-        nkey = self.make_key(key, version=version)
-        return int(client.hdel(name, nkey))
+        name = str(self.make_key(name, version=version))
+        try:
+            return int(client.hdel(name, key))
+        except _main_exceptions as e:
+            raise ConnectionInterrupted(connection=client) from e
 
     def hlen(
         self,
-        name: str,
+        name: KeyT,
+        version: Optional[int] = None,
         client: Optional[Redis] = None,
     ) -> int:
         """
@@ -1173,27 +3324,33 @@ class DefaultClient(SortedSetMixin):
         """
         if client is None:
             client = self.get_client(write=False)
-        return int(client.hlen(name))
+        name = str(self.make_key(name, version=version))
+        try:
+            return int(client.hlen(name))
+        except _main_exceptions as e:
+            raise ConnectionInterrupted(connection=client) from e
 
     def hkeys(
         self,
-        name: str,
+        name: KeyT,
+        version: Optional[int] = None,
         client: Optional[Redis] = None,
-    ) -> list[Any]:
+    ) -> list[str]:
         """
         Return a list of keys in hash name.
         """
         if client is None:
             client = self.get_client(write=False)
+        name = str(self.make_key(name, version=version))
         try:
-            return [self.reverse_key(k.decode()) for k in client.hkeys(name)]
+            return [k.decode() for k in client.hkeys(name)]
         except _main_exceptions as e:
             raise ConnectionInterrupted(connection=client) from e
 
     def hexists(
         self,
-        name: str,
-        key: KeyT,
+        name: KeyT,
+        key: str,
         version: Optional[int] = None,
         client: Optional[Redis] = None,
     ) -> bool:
@@ -1202,5 +3359,8 @@ class DefaultClient(SortedSetMixin):
         """
         if client is None:
             client = self.get_client(write=False)
-        nkey = self.make_key(key, version=version)
-        return bool(client.hexists(name, nkey))
+        name = str(self.make_key(name, version=version))
+        try:
+            return bool(client.hexists(name, key))
+        except _main_exceptions as e:
+            raise ConnectionInterrupted(connection=client) from e
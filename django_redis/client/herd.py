@@ -1,14 +1,27 @@
+import math
 import random
 import socket
+import struct
+import threading
 import time
 from collections import OrderedDict
+from datetime import datetime
+from typing import Any, NamedTuple
 
 from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from redis.client import Pipeline
 from redis.exceptions import ConnectionError as RedisConnectionError
 from redis.exceptions import ResponseError
 from redis.exceptions import TimeoutError as RedisTimeoutError
 
-from django_redis.client.default import DEFAULT_TIMEOUT, DefaultClient
+from django_redis.client.default import (
+    _BUCKET_LUA_HELPERS,
+    _CHUNK_MAGIC,
+    _MISSING,
+    DEFAULT_TIMEOUT,
+    DefaultClient,
+)
 from django_redis.exceptions import ConnectionInterrupted
 
 _main_exceptions = (
@@ -19,15 +32,106 @@ _main_exceptions = (
 )
 
 
+# Values are stored after a fixed header: a magic string, the time at which
+# the value should be refreshed in seconds since the epoch and the number of
+# seconds it took to compute.
+_HEADER = struct.Struct("!4sqf")
+_HEADER_MAGIC = b"\x00drh"
+
+_HERD_MODES = ("random", "xfetch")
+
+# Number of cache misses remembered to measure how long values take to compute
+_MISSES_SIZE = 1024
+
+# Numbers are stored as is so that Redis can increment them, their header is
+# stored under a companion key "<_COMPANION_KEY><key>" expiring with them. The
+# companions are removed with their keys, also by delete_pattern and clear.
+_COMPANION_KEY = "django-redis:herd:"
+
+# Herd timeout of the values made persistent by touch
+_NEVER = 2**63 - 1
+
+# KEYS: key, its companion and, with CHUNK_SIZE, its chunks; ARGV: header
+# magic, packed herd timeout, px (empty to persist), chunk magic. Only the herd
+# timeout of the headers is overwritten. The header of a chunked value is at
+# the start of its first chunk, which is rewritten as fields can't be written
+# in place.
+_TOUCH_LUA = """
+local function expire(key)
+    if ARGV[3] == '' then
+        redis.call('PERSIST', key)
+    else
+        redis.call('PEXPIRE', key, ARGV[3])
+    end
+end
+
+if redis.call('EXISTS', KEYS[1]) == 0 then return 0 end
+for i = 1, 2 do
+    if redis.call('GETRANGE', KEYS[i], 0, #ARGV[1] - 1) == ARGV[1] then
+        redis.call('SETRANGE', KEYS[i], #ARGV[1], ARGV[2])
+    end
+    expire(KEYS[i])
+end
+if KEYS[3] then
+    local manifest = redis.call('GETRANGE', KEYS[1], 0, 127)
+    local token = string.match(string.sub(manifest, #ARGV[4] + 1), '^(%x+):%d+$')
+    if token and string.sub(manifest, 1, #ARGV[4]) == ARGV[4] then
+        local field = token .. ':0'
+        local chunk = redis.call('HGET', KEYS[3], field)
+        if chunk and string.sub(chunk, 1, #ARGV[1]) == ARGV[1] then
+            local rest = string.sub(chunk, #ARGV[1] + #ARGV[2] + 1)
+            redis.call('HSET', KEYS[3], field, ARGV[1] .. ARGV[2] .. rest)
+        end
+    end
+    expire(KEYS[3])
+end
+return 1
+"""
+
+# KEYS: buckets of the key and of its companion; ARGV: their fields, header
+# magic, packed herd timeout, px. Fields can't be written in place, so the
+# headers are rewritten.
+_BUCKET_TOUCH_LUA = (
+    _BUCKET_LUA_HELPERS
+    + """
+if redis.call('HEXISTS', KEYS[1], ARGV[1]) == 0 then return 0 end
+for i = 1, 2 do
+    local value = redis.call('HGET', KEYS[i], ARGV[i])
+    if value then
+        if string.sub(value, 1, #ARGV[3]) == ARGV[3] then
+            local rest = string.sub(value, #ARGV[3] + #ARGV[4] + 1)
+            redis.call('HSET', KEYS[i], ARGV[i], ARGV[3] .. ARGV[4] .. rest)
+        end
+        expire_field(KEYS[i], ARGV[i], ARGV[5])
+    end
+end
+return 1
+"""
+)
+
+
 class Marker:
     """
     Dummy class for use as
     marker for herded keys.
+
+    Values were stored in a (Marker, value, herd_timeout) tuple before they
+    had a header, these are still read.
     """
 
     pass
 
 
+class _HerdValue(NamedTuple):
+    value: Any
+    herd_timeout: int
+    compute_time: float
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
 def _is_expired(x, herd_timeout: int) -> bool:
     if x >= herd_timeout:
         return True
@@ -38,30 +142,116 @@ def _is_expired(x, herd_timeout: int) -> bool:
 
 class HerdClient(DefaultClient):
     def __init__(self, *args, **kwargs):
-        self._marker = Marker()
         self._herd_timeout = getattr(settings, "CACHE_HERD_TIMEOUT", 60)
         super().__init__(*args, **kwargs)
 
-    def _pack(self, value, timeout):
+        self._herd_mode = self._options.get("HERD_MODE", "random")
+        if self._herd_mode not in _HERD_MODES:
+            error_message = f"HERD_MODE must be one of {', '.join(_HERD_MODES)}"
+            raise ImproperlyConfigured(error_message)
+        self._xfetch_beta = self._options.get("HERD_XFETCH_BETA", 1.0)
+
+        # key -> monotonic time of the last miss, a value set for the key
+        # took the time since then to compute. Misses older than the herd
+        # timeout are ignored, the key was not set after them.
+        self._misses: OrderedDict[Any, float] = OrderedDict()
+        self._misses_lock = threading.Lock()
+
+    def _record_miss(self, key):
+        with self._misses_lock:
+            self._misses[key] = time.monotonic()
+            self._misses.move_to_end(key)
+            if len(self._misses) > _MISSES_SIZE:
+                self._misses.popitem(last=False)
+
+    def _compute_time(self, key):
+        with self._misses_lock:
+            missed_at = self._misses.pop(key, None)
+        if missed_at is None:
+            return 0.0
+        compute_time = time.monotonic() - missed_at
+        return 0.0 if compute_time > self._herd_timeout else compute_time
+
+    def _pack(self, value, timeout, compute_time=0.0):
         herd_timeout = (timeout or self._backend.default_timeout) + int(time.time())
-        return self._marker, value, herd_timeout
+        return _HerdValue(value, herd_timeout, compute_time)
 
     def _unpack(self, value):
-        try:
-            marker, unpacked, herd_timeout = value
-        except (ValueError, TypeError):
-            return value, False
-
-        if not isinstance(marker, Marker):
-            return value, False
-
-        now = int(time.time())
+        if isinstance(value, _HerdValue):
+            unpacked, herd_timeout, compute_time = value
+        else:
+            try:
+                marker, unpacked, herd_timeout = value
+            except (ValueError, TypeError):
+                return value, False
+
+            if not isinstance(marker, Marker):
+                return value, False
+            compute_time = 0.0
+
+        now = time.time()
         if herd_timeout < now:
-            x = now - herd_timeout
+            x = int(now) - herd_timeout
             return unpacked, _is_expired(x, self._herd_timeout)
 
+        if self._herd_mode == "xfetch":
+            # XFetch: refresh early, the more likely as the value is close to
+            # expiry and long to compute
+            early = -compute_time * self._xfetch_beta * math.log(1 - random.random())
+            return unpacked, now + early >= herd_timeout
+
         return unpacked, False
 
+    def _encode(self, value):
+        if not isinstance(value, _HerdValue):
+            return super()._encode(value)
+        encoded = self.encode(value.value)
+        if isinstance(encoded, (int, float)):
+            # numbers are stored as strings, like Redis does
+            encoded = repr(encoded).encode()
+        header = _HEADER.pack(
+            _HEADER_MAGIC,
+            int(value.herd_timeout),
+            value.compute_time,
+        )
+        return header + encoded
+
+    def decode(self, value):
+        if isinstance(value, bytes) and value.startswith(_HEADER_MAGIC):
+            _, herd_timeout, compute_time = _HEADER.unpack_from(value)
+            return _HerdValue(
+                super().decode(value[_HEADER.size :]),
+                herd_timeout,
+                compute_time,
+            )
+        return super().decode(value)
+
+    def _timeout_left(self, client, key):
+        # set adds the herd timeout to it again
+        timeout = super()._timeout_left(client, key)
+        if timeout is None:
+            return None
+        return max(timeout - self._herd_timeout, 1)
+
+    def _companion(self, key):
+        return self._make_key(f"{_COMPANION_KEY}{key}")
+
+    def _add_headers(self, client, keys, values):
+        """
+        Attach to the decoded values of keys made by make_key the header of
+        the numbers, read from their companions.
+        """
+        numbers = [i for i, value in enumerate(values) if _is_number(value)]
+        if not numbers:
+            return values
+        headers = self._mget(client, [self._companion(keys[i]) for i in numbers])
+        values = list(values)
+        for i, header in zip(numbers, headers):
+            if header is not None and header.startswith(_HEADER_MAGIC):
+                _, herd_timeout, compute_time = _HEADER.unpack_from(header)
+                values[i] = _HerdValue(values[i], herd_timeout, compute_time)
+        return values
+
     def set(
         self,
         key,
@@ -71,11 +261,12 @@ class HerdClient(DefaultClient):
         client=None,
         nx=False,
         xx=False,
+        tags=None,
     ):
         if timeout is DEFAULT_TIMEOUT:
             timeout = self._backend.default_timeout
 
-        if timeout is None or timeout <= 0:
+        if timeout is not None and timeout <= 0:
             return super().set(
                 key,
                 value,
@@ -84,25 +275,109 @@ class HerdClient(DefaultClient):
                 client=client,
                 nx=nx,
                 xx=xx,
+                tags=tags,
             )
 
-        packed = self._pack(value, timeout)
-        real_timeout = timeout + self._herd_timeout
+        key = self.make_key(key, version=version)
+        if _is_number(value):
+            return self._set_number(key, value, timeout, client, nx, xx, tags)
+
+        if timeout is not None:
+            value = self._pack(value, timeout, self._compute_time(key))
+            timeout += self._herd_timeout
 
         return super().set(
             key,
-            packed,
-            timeout=real_timeout,
-            version=version,
+            value,
+            timeout=timeout,
             client=client,
             nx=nx,
+            xx=xx,
+            tags=tags,
         )
 
+    def _set_number(self, key, value, timeout, client, nx, xx, tags):
+        """
+        Store a number as is, so that Redis can increment it, and its header
+        in its companion key. Persistent numbers have no companion.
+        """
+        if client is None:
+            client = self.get_client(write=True)
+
+        header = None
+        if timeout is not None:
+            packed = self._pack(value, timeout, self._compute_time(key))
+            header = _HEADER.pack(
+                _HEADER_MAGIC,
+                int(packed.herd_timeout),
+                packed.compute_time,
+            )
+            timeout += self._herd_timeout
+
+        def set_companion(pipeline):
+            companion = self._companion(key)
+            if header is None:
+                DefaultClient.delete(self, companion, client=pipeline)
+            else:
+                px = int(timeout * 1000)
+                self._set_encoded(pipeline, companion, header, px, False, False)
+
+        if isinstance(client, Pipeline):
+            set_companion(client)
+            return super().set(
+                key,
+                value,
+                timeout=timeout,
+                client=client,
+                nx=nx,
+                xx=xx,
+                tags=tags,
+            )
+
+        if nx or xx:
+            # the companion is only written once the number is
+            if not super().set(
+                key,
+                value,
+                timeout=timeout,
+                client=client,
+                nx=nx,
+                xx=xx,
+                tags=tags,
+            ):
+                return False
+            pipeline = client.pipeline(transaction=False)
+            set_companion(pipeline)
+        else:
+            pipeline = client.pipeline()
+            super().set(key, value, timeout=timeout, client=pipeline, tags=tags)
+            set_companion(pipeline)
+
+        try:
+            results = pipeline.execute()
+        except _main_exceptions as e:
+            raise ConnectionInterrupted(connection=client) from e
+        return nx or xx or bool(results[0])
+
     def get(self, key, default=None, version=None, client=None):
-        packed = super().get(key, default=default, version=version, client=client)
-        val, refresh = self._unpack(packed)
+        if client is None:
+            client = self.get_client(write=False)
+
+        key = self.make_key(key, version=version)
+        packed = super().get(key, default=_MISSING, version=version, client=client)
+        if _is_number(packed):
+            try:
+                packed = self._add_headers(client, [key], [packed])[0]
+            except _main_exceptions as e:
+                raise ConnectionInterrupted(connection=client) from e
 
+        if packed is _MISSING:
+            self._record_miss(key)
+            return default
+
+        val, refresh = self._unpack(packed)
         if refresh:
+            self._record_miss(key)
             return default
 
         return val
@@ -111,24 +386,33 @@ class HerdClient(DefaultClient):
         if client is None:
             client = self.get_client(write=False)
 
+        keys = list(keys)
         if not keys:
             return {}
 
         recovered_data = OrderedDict()
 
+        self._prefetch_generations(keys)
         new_keys = [self.make_key(key, version=version) for key in keys]
         map_keys = dict(zip(new_keys, keys))
 
         try:
-            results = client.mget(*new_keys)
+            results = [
+                _MISSING if value is None else self.decode(value)
+                for value in self._mget(client, new_keys)
+            ]
+            results = self._add_headers(client, new_keys, results)
         except _main_exceptions as e:
             raise ConnectionInterrupted(connection=client) from e
 
         for key, value in zip(new_keys, results):
-            if value is None:
+            if value is _MISSING:
+                self._record_miss(key)
                 continue
 
-            val, refresh = self._unpack(self.decode(value))
+            val, refresh = self._unpack(value)
+            if refresh:
+                self._record_miss(key)
             recovered_data[map_keys[key]] = None if refresh else val
 
         return recovered_data
@@ -140,6 +424,7 @@ class HerdClient(DefaultClient):
         version=None,
         client=None,
         herd=True,
+        tags=None,
     ):
         """
         Set a bunch of values in the cache at once from a dict of key/value
@@ -153,27 +438,165 @@ class HerdClient(DefaultClient):
 
         set_function = self.set if herd else super().set
 
+        self._prefetch_generations(data)
         try:
             pipeline = client.pipeline()
             for key, value in data.items():
-                set_function(key, value, timeout, version=version, client=pipeline)
+                set_function(
+                    key,
+                    value,
+                    timeout,
+                    version=version,
+                    client=pipeline,
+                    tags=tags,
+                )
             pipeline.execute()
         except _main_exceptions as e:
             raise ConnectionInterrupted(connection=client) from e
 
-    def incr(self, *args, **kwargs):
-        raise NotImplementedError
+    def delete(self, key, version=None, prefix=None, client=None):
+        if client is None:
+            client = self.get_client(write=True)
+
+        key = self.make_key(key, version=version, prefix=prefix)
+        if isinstance(client, Pipeline):
+            super().delete(self._companion(key), client=client)
+            return super().delete(key, client=client)
+
+        pipeline = client.pipeline(transaction=False)
+        super().delete(key, client=pipeline)
+        super().delete(self._companion(key), client=pipeline)
+        try:
+            return pipeline.execute()[0]
+        except _main_exceptions as e:
+            raise ConnectionInterrupted(connection=client) from e
+
+    def delete_pattern(
+        self,
+        pattern,
+        version=None,
+        prefix=None,
+        client=None,
+        itersize=None,
+    ):
+        if client is None:
+            client = self.get_client(write=True)
+
+        pattern = self.make_pattern(pattern, version=version, prefix=prefix)
+        count = super().delete_pattern(pattern, client=client, itersize=itersize)
+        # companions are named after the made keys, with their own prefix
+        companions = self._make_pattern(f"{_COMPANION_KEY}{pattern}")
+        try:
+            self._unlink_matching(client, companions)
+        except _main_exceptions as e:
+            raise ConnectionInterrupted(connection=client) from e
+        return count
+
+    def _delete_keys(self, client, keys):
+        count = super()._delete_keys(client, keys)
+        super()._delete_keys(client, [self._companion(key) for key in keys])
+        return count
+
+    # the expiry of keys is set through _queue_pexpire, which updates their
+    # companions too
 
-    def decr(self, *args, **kwargs):
-        raise NotImplementedError
+    def persist(self, key, version=None, client=None):
+        return self._pexpire_many([key], None, version, client)[key]
+
+    def expire(self, key, timeout, version=None, client=None):
+        return self.expire_many([key], timeout, version=version, client=client)[key]
+
+    def pexpire(self, key, timeout, version=None, client=None):
+        return self.pexpire_many([key], timeout, version=version, client=client)[key]
+
+    def expire_at(self, key, when, version=None, client=None):
+        return self.expire_at_many([key], when, version=version, client=client)[key]
+
+    def pexpire_at(self, key, when, version=None, client=None):
+        if not isinstance(when, datetime):
+            when /= 1000
+        return self.expire_at_many([key], when, version=version, client=client)[key]
+
+    def _queue_pexpire(self, pipeline, key, px):
+        queued = super()._queue_pexpire(pipeline, key, px)
+        companion = self._companion(key)
+        if px is not None:
+            return queued + super()._queue_pexpire(pipeline, companion, px)
+        # persistent numbers have no companion
+        if self._hash_buckets:
+            pipeline.hdel(*self._bucket(companion))
+        else:
+            pipeline.unlink(companion)
+        return queued + 1
 
     def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None, client=None):
+        touched = self.touch_many([key], timeout, version=version, client=client)
+        return touched[key]
+
+    def touch_many(self, keys, timeout=DEFAULT_TIMEOUT, version=None, client=None):
         if client is None:
             client = self.get_client(write=True)
 
-        value = self.get(key, version=version, client=client)
-        if value is None:
-            return False
+        if timeout is DEFAULT_TIMEOUT:
+            timeout = self._backend.default_timeout
 
-        self.set(key, value, timeout=timeout, version=version, client=client)
-        return True
+        keys = list(keys)
+        self._prefetch_generations(keys)
+        new_keys = [self.make_key(key, version=version) for key in keys]
+        pipeline = client.pipeline(transaction=False)
+        if timeout is not None and timeout <= 0:
+            # like EXPIRE, a past expiry deletes the keys
+            companions = [self._companion(key) for key in new_keys]
+            if self._hash_buckets:
+                for key in new_keys + companions:
+                    pipeline.hdel(*self._bucket(key))
+            else:
+                for key in new_keys:
+                    pipeline.unlink(key)
+                pipeline.unlink(*companions)
+                if self._chunk_size:
+                    pipeline.unlink(*[self._chunks_key(key) for key in new_keys])
+        else:
+            self._queue_touch(client, pipeline, new_keys, timeout)
+
+        try:
+            results = pipeline.execute()
+        except _main_exceptions as e:
+            raise ConnectionInterrupted(connection=client) from e
+        return {key: bool(result) for key, result in zip(keys, results)}
+
+    def _queue_touch(self, client, pipeline, keys, timeout):
+        """
+        Queue the expiry update of keys made by make_key, only the herd
+        timeout of their headers is rewritten.
+        """
+        if timeout is None:
+            herd_timeout, px = _NEVER, ""
+        else:
+            herd_timeout = int(time.time() + timeout)
+            px = int((timeout + self._herd_timeout) * 1000)
+        packed = struct.pack("!q", herd_timeout)
+
+        if self._hash_buckets:
+            script = client.register_script(_BUCKET_TOUCH_LUA)
+        else:
+            script = client.register_script(_TOUCH_LUA)
+        for key in keys:
+            companion = self._companion(key)
+            if self._hash_buckets:
+                bucket, field = self._bucket(key)
+                companion_bucket, companion_field = self._bucket(companion)
+                script(
+                    keys=[bucket, companion_bucket],
+                    args=[field, companion_field, _HEADER_MAGIC, packed, px],
+                    client=pipeline,
+                )
+            elif self._chunk_size:
+                script(
+                    keys=[key, companion, self._chunks_key(key)],
+                    args=[_HEADER_MAGIC, packed, px, _CHUNK_MAGIC],
+                    client=pipeline,
+                )
+            else:
+                args = [_HEADER_MAGIC, packed, px]
+                script(keys=[key, companion], args=args, client=pipeline)
@@ -20,7 +20,7 @@ class ClientProtocol(Protocol):
         """Create a cache key with optional version and prefix."""
         ...
 
-    def encode(self, value: Any) -> Union[bytes, int]:
+    def encode(self, value: Any) -> Union[bytes, int, float]:
         """Encode a value for storage in Redis."""
         ...
 
@@ -0,0 +1,308 @@
+import inspect
+import socket
+from collections import deque
+from typing import TYPE_CHECKING, Any, Callable, Generic, Optional, TypeVar
+
+from redis import Redis
+from redis.client import Pipeline
+from redis.exceptions import ConnectionError as RedisConnectionError
+from redis.exceptions import ResponseError
+from redis.exceptions import TimeoutError as RedisTimeoutError
+
+from django_redis.exceptions import ConnectionInterrupted
+
+if TYPE_CHECKING:
+    from redis.typing import KeyT
+
+    from django_redis.client.default import DefaultClient
+
+_main_exceptions = (
+    RedisConnectionError,
+    RedisTimeoutError,
+    ResponseError,
+    socket.timeout,
+)
+
+# Redis client methods that can't be queued in a pipeline
+_NOT_PIPELINED = frozenset(
+    ("hscan_iter", "lock", "pubsub", "scan_iter", "sscan_iter", "zscan_iter"),
+)
+
+T = TypeVar("T")
+
+
+class PipelineFuture(Generic[T]):
+    """
+    Result of a call queued in a CachePipeline, set when it is executed.
+    """
+
+    def __init__(self) -> None:
+        self._done = False
+        self._value: Any = None
+        self._error: Optional[Exception] = None
+
+    def done(self) -> bool:
+        return self._done
+
+    def result(self) -> T:
+        """
+        Return what the call returned, or raise what it raised.
+        """
+        if not self._done:
+            error_message = "The pipeline was not executed"
+            raise RuntimeError(error_message)
+        if self._error is not None:
+            raise self._error
+        return self._value
+
+    def _resolve(self, value: Any, error: Optional[Exception] = None) -> None:
+        self._value, self._error, self._done = value, error, True
+
+
+class _Recorder:
+    """
+    Stand-in for a Redis client given to a client method, queuing its commands
+    on a pipeline instead of running them.
+    """
+
+    def __init__(self, pipeline: Pipeline, names: list[str], nested: bool = False):
+        self._pipeline = pipeline
+        # names of the commands queued on the pipeline
+        self._names = names
+        self._nested = nested
+        self._queued = 0
+
+    def __getattr__(self, name: str) -> Callable[..., Any]:
+        if name in _NOT_PIPELINED:
+            error_message = f"{name} can't be used in a pipeline"
+            raise NotImplementedError(error_message)
+        command = getattr(self._pipeline, name)
+
+        def queue(*args: Any, **kwargs: Any) -> Any:
+            command(*args, **kwargs)
+            return self._record(name)
+
+        return queue
+
+    def _record(self, name: str) -> Any:
+        self._names.append(name)
+        self._queued += 1
+        # results are unknown yet, like in a pipeline
+        return self if self._nested else None
+
+    def pipeline(self, transaction: bool = True, shard_hint: Any = None) -> "_Recorder":
+        # commands of nested pipelines are queued on the same pipeline
+        return _Recorder(self._pipeline, self._names, nested=True)
+
+    def register_script(self, script: str) -> Callable[..., Any]:
+        registered = self._pipeline.register_script(script)
+
+        def call(keys: Any = (), args: Any = (), client: Any = None) -> Any:
+            recorder = self if client is None else client
+            registered(keys=keys, args=args, client=self._pipeline)
+            return recorder._record("evalsha")
+
+        return call
+
+    def execute(self, raise_on_error: bool = True) -> list[Any]:
+        queued, self._queued = self._queued, 0
+        return [None] * queued
+
+
+class _Replayer:
+    """
+    Stand-in for a Redis client given to a client method once its commands
+    were executed, returning their results in order. Commands that were not
+    queued, when the results make the method take another path, are run,
+    unless the commands were executed in a transaction.
+    """
+
+    def __init__(
+        self,
+        client: Redis,
+        commands: deque[tuple[str, Any]],
+        nested: bool = False,
+        transaction: bool = False,
+    ):
+        self._client = client
+        # names and results of the commands queued by _Recorder
+        self._commands = commands
+        self._nested = nested
+        self._transaction = transaction
+        self._results: list[Any] = []
+
+    def __getattr__(self, name: str) -> Callable[..., Any]:
+        command = getattr(self._client, name)
+
+        def replay(*args: Any, **kwargs: Any) -> Any:
+            return self._replay(name, lambda: command(*args, **kwargs))
+
+        return replay
+
+    def _replay(self, name: str, run: Callable[[], Any]) -> Any:
+        if self._commands and self._commands[0][0] == name:
+            result = self._commands.popleft()[1]
+        else:
+            self._commands.clear()
+            if self._transaction:
+                # running it now would leave it out of the transaction
+                error_message = (
+                    f"{name} depends on the results of the pipeline, it can't be "
+                    "run in a transaction"
+                )
+                raise NotImplementedError(error_message)
+            try:
+                result = run()
+            except _main_exceptions as e:
+                if not self._nested:
+                    raise
+                result = e
+        if self._nested:
+            self._results.append(result)
+            return self
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    def pipeline(self, transaction: bool = True, shard_hint: Any = None) -> "_Replayer":
+        return _Replayer(
+            self._client,
+            self._commands,
+            nested=True,
+            transaction=self._transaction,
+        )
+
+    def register_script(self, script: str) -> Callable[..., Any]:
+        def call(keys: Any = (), args: Any = (), client: Any = None) -> Any:
+            replayer = self if client is None else client
+            return replayer._replay(
+                "evalsha",
+                lambda: self._client.eval(script, len(keys), *keys, *args),
+            )
+
+        return call
+
+    def execute(self, raise_on_error: bool = True) -> list[Any]:
+        results, self._results = self._results, []
+        if raise_on_error:
+            for result in results:
+                if isinstance(result, Exception):
+                    raise result
+        return results
+
+
+class CachePipeline:
+    """
+    Queue calls to the methods of a client, sending them to Redis in a single
+    round trip per server.
+
+    Methods taking a client argument can be called, each call returns a
+    PipelineFuture resolved on execute to what the method would have
+    returned, or to the error raised by a call failing before queuing any
+    command. With transaction, the commands sent to a server are wrapped in
+    MULTI/EXEC, and calls needing commands that depend on the results of the
+    transaction fail with NotImplementedError rather than running them out of
+    it.
+    """
+
+    def __init__(self, client: "DefaultClient", transaction: bool = False) -> None:
+        self._client = client
+        self._transaction = transaction
+        # id of the Redis client -> Redis client, its pipeline and the names
+        # of the commands queued on it
+        self._pipelines: dict[int, tuple[Redis, Pipeline, list[str]]] = {}
+        self._calls: list[tuple[Any, ...]] = []
+
+    def __enter__(self) -> "CachePipeline":
+        return self
+
+    def __exit__(self, exc_type: object, exc_value: object, traceback: object) -> None:
+        if exc_type is None:
+            self.execute()
+        else:
+            self.reset()
+
+    def __getattr__(self, name: str) -> Callable[..., PipelineFuture]:
+        method = getattr(self._client, name)
+        if (
+            name.startswith("_")
+            or not callable(method)
+            or "client" not in inspect.signature(method).parameters
+        ):
+            error_message = f"{name} can't be used in a pipeline"
+            raise AttributeError(error_message)
+
+        def queue(*args: Any, **kwargs: Any) -> PipelineFuture:
+            return self._queue(method, args, kwargs)
+
+        return queue
+
+    def _queue(
+        self,
+        method: Callable[..., Any],
+        args: tuple[Any, ...],
+        kwargs: dict[str, Any],
+    ) -> PipelineFuture:
+        signature = inspect.signature(method)
+        arguments = signature.bind(*args, **kwargs).arguments
+        first = next(iter(signature.parameters.values()))
+        key: Optional[KeyT] = None
+        if first.name in ("key", "name") and first.kind is first.POSITIONAL_OR_KEYWORD:
+            key = arguments.get(first.name)
+
+        client = self._client._pipeline_client(key, arguments.get("version"))
+        if id(client) not in self._pipelines:
+            pipeline = client.pipeline(transaction=self._transaction)
+            self._pipelines[id(client)] = (client, pipeline, [])
+        _, pipeline, names = self._pipelines[id(client)]
+
+        future: PipelineFuture = PipelineFuture()
+        start = len(names)
+        try:
+            method(*args, client=_Recorder(pipeline, names), **kwargs)
+        except NotImplementedError:
+            raise
+        except Exception as e:  # noqa: BLE001
+            if len(names) == start:
+                # nothing was queued, the call failed on its arguments
+                future._resolve(None, e)
+                return future
+            # the results are unknown yet, the method is called again with
+            # them on execute
+
+        self._calls.append((method, args, kwargs, client, start, len(names), future))
+        return future
+
+    def execute(self) -> None:
+        """
+        Send the queued calls and resolve their futures.
+        """
+        pipelines, self._pipelines = self._pipelines, {}
+        calls, self._calls = self._calls, []
+
+        results = {}
+        for name, (client, pipeline, _) in pipelines.items():
+            try:
+                results[name] = pipeline.execute(raise_on_error=False)
+            except _main_exceptions as e:
+                raise ConnectionInterrupted(connection=client) from e
+
+        for method, args, kwargs, client, start, end, future in calls:
+            names = pipelines[id(client)][2]
+            commands = deque(zip(names[start:end], results[id(client)][start:end]))
+            try:
+                replayer = _Replayer(client, commands, transaction=self._transaction)
+                value = method(*args, client=replayer, **kwargs)
+            except Exception as e:  # noqa: BLE001
+                future._resolve(None, e)
+            else:
+                future._resolve(value)
+
+    def reset(self) -> None:
+        """
+        Discard the queued calls.
+        """
+        for _, pipeline, _ in self._pipelines.values():
+            pipeline.reset()
+        self._pipelines = {}
+        self._calls = []
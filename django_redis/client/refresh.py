@@ -0,0 +1,102 @@
+import logging
+import os
+import queue
+import threading
+from typing import Callable, Optional
+
+from django.conf import settings
+from redis.typing import KeyT
+
+
+class RefreshExecutor:
+    """
+    Run the refreshes of stale values on a bounded pool of daemon threads.
+
+    At most ``max_workers`` refreshes run at once and ``max_pending`` wait for
+    a thread, further ones are dropped: the stale value is served until a
+    later read schedules its refresh again. A key is refreshed once at a time,
+    submitting it while its refresh is pending does nothing.
+    """
+
+    def __init__(self, max_workers: int, max_pending: int) -> None:
+        self._max_workers = max_workers
+        self._max_pending = max_pending
+        self._lock = threading.Lock()
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._keys: set[KeyT] = set()
+        self._pid: Optional[int] = None
+        self._logger = logging.getLogger(
+            getattr(settings, "DJANGO_REDIS_LOGGER", __name__),
+        )
+
+        # refreshes dropped because the pool was full
+        self.dropped = 0
+
+    @property
+    def pending(self) -> int:
+        """
+        Number of refreshes running or waiting for a thread.
+        """
+        return len(self._keys)
+
+    def submit(self, key: KeyT, refresh: Callable[[], None]) -> bool:
+        """
+        Schedule refresh for key, returning whether it was.
+        """
+        with self._lock:
+            if self._pid != os.getpid():
+                self._start()
+            if key in self._keys:
+                return False
+            if len(self._keys) >= self._max_workers + self._max_pending:
+                self.dropped += 1
+                return False
+            self._keys.add(key)
+        self._queue.put((key, refresh))
+        return True
+
+    def _start(self) -> None:
+        # threads don't survive a fork, neither do the refreshes of the parent
+        self._pid = os.getpid()
+        self._queue = queue.SimpleQueue()
+        self._keys = set()
+        for _ in range(self._max_workers):
+            thread = threading.Thread(
+                target=self._run,
+                args=(self._queue,),
+                name="django-redis-refresh",
+                daemon=True,
+            )
+            thread.start()
+
+    def _run(self, tasks: queue.SimpleQueue) -> None:
+        while True:
+            key, refresh = tasks.get()
+            try:
+                refresh()
+            except Exception:
+                self._logger.exception("Refreshing %r failed", key)
+            finally:
+                with self._lock:
+                    self._keys.discard(key)
+
+
+_executors: dict[tuple[str, int, int], RefreshExecutor] = {}
+_executors_lock = threading.Lock()
+
+
+def get_refresh_executor(
+    location: str,
+    max_workers: int,
+    max_pending: int,
+) -> RefreshExecutor:
+    """
+    Return the executor of the caches at location, shared by the threads of
+    the process so that its limits hold for the whole process.
+    """
+    name = (location, max_workers, max_pending)
+    with _executors_lock:
+        executor = _executors.get(name)
+        if executor is None:
+            executor = _executors[name] = RefreshExecutor(max_workers, max_pending)
+        return executor
@@ -1,7 +1,8 @@
 import builtins
 import re
 from collections import OrderedDict
-from collections.abc import Iterator
+from collections.abc import Iterable, Iterator
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from typing import Any, Optional, Union
 
@@ -9,10 +10,14 @@ from redis import Redis
 from redis.exceptions import ConnectionError as RedisConnectionError
 from redis.typing import KeyT
 
-from django_redis.client.default import DEFAULT_TIMEOUT, DefaultClient
+from django_redis.client.default import (
+    DEFAULT_TIMEOUT,
+    DefaultClient,
+    _generation_seed,
+    _main_exceptions,
+)
 from django_redis.exceptions import ConnectionInterrupted
 from django_redis.hash_ring import HashRing
-from django_redis.util import CacheKey
 
 
 class ShardClient(DefaultClient):
@@ -47,6 +52,29 @@ class ShardClient(DefaultClient):
         name = self.get_server_name(key)
         return self._serverdict[name]
 
+    def _group_by_server(self, keys, version=None):
+        """
+        Group keys by the server storing them, keeping their order.
+        """
+        keys = list(keys)
+        self._prefetch_generations(keys)
+        keys_by_server = {}
+        for key in keys:
+            server = self.get_server(self.make_key(key, version=version))
+            keys_by_server.setdefault(server, []).append(key)
+        return keys_by_server
+
+    def _call_per_server(self, method, keys, version, *args):
+        """
+        Call a bulk method returning a mapping once per server, merging the
+        results in the order of keys.
+        """
+        keys = list(keys)
+        results = {}
+        for server, server_keys in self._group_by_server(keys, version).items():
+            results.update(method(server_keys, *args, version=version, client=server))
+        return {key: results[key] for key in keys}
+
     def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None, client=None):
         if client is None:
             key = self.make_key(key, version=version)
@@ -67,12 +95,64 @@ class ShardClient(DefaultClient):
 
         return super().get(key=key, default=default, version=version, client=client)
 
+    def get_or_set(
+        self,
+        key,
+        default,
+        timeout=DEFAULT_TIMEOUT,
+        version=None,
+        client=None,
+        lease_timeout=None,
+        wait_timeout=None,
+        stale_timeout=None,
+    ):
+        # the lease and the stale copy live on the server of the key
+        if client is None:
+            key = self.make_key(key, version=version)
+            client = self.get_server(key)
+
+        return super().get_or_set(
+            key,
+            default,
+            timeout=timeout,
+            version=version,
+            client=client,
+            lease_timeout=lease_timeout,
+            wait_timeout=wait_timeout,
+            stale_timeout=stale_timeout,
+        )
+
+    def get_or_refresh(
+        self,
+        key,
+        fn,
+        ttl=DEFAULT_TIMEOUT,
+        stale_ttl=None,
+        version=None,
+        client=None,
+    ):
+        # the lease and the stale copy live on the server of the key
+        if client is None:
+            key = self.make_key(key, version=version)
+            client = self.get_server(key)
+
+        return super().get_or_refresh(
+            key,
+            fn,
+            ttl=ttl,
+            stale_ttl=stale_ttl,
+            version=version,
+            client=client,
+        )
+
     def get_many(self, keys, version=None):
+        keys = list(keys)
         if not keys:
             return {}
 
         recovered_data = OrderedDict()
 
+        self._prefetch_generations(keys)
         new_keys = [self.make_key(key, version=version) for key in keys]
         map_keys = dict(zip(new_keys, keys))
 
@@ -95,9 +175,12 @@ class ShardClient(DefaultClient):
         client=None,
         nx=False,
         xx=False,
+        tags=None,
     ):
         """
         Persist a value to the cache, and set an optional expiration time.
+
+        Tags are recorded on the server storing the key.
         """
         if client is None:
             key = self.make_key(key, version=version)
@@ -111,9 +194,17 @@ class ShardClient(DefaultClient):
             client=client,
             nx=nx,
             xx=xx,
+            tags=tags,
         )
 
-    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None, client=None):
+    def set_many(
+        self,
+        data,
+        timeout=DEFAULT_TIMEOUT,
+        version=None,
+        client=None,
+        tags=None,
+    ):
         """
         Set a bunch of values in the cache at once from a dict of key/value
         pairs. This is much more efficient than calling set() multiple times.
@@ -121,8 +212,43 @@ class ShardClient(DefaultClient):
         If timeout is given, that timeout will be used for the key; otherwise
         the default cache timeout will be used.
         """
+        self._prefetch_generations(data)
         for key, value in data.items():
-            self.set(key, value, timeout, version=version, client=client)
+            self.set(key, value, timeout, version=version, client=client, tags=tags)
+
+    def set_stream(
+        self,
+        key,
+        chunks,
+        timeout=DEFAULT_TIMEOUT,
+        version=None,
+        client=None,
+        chunk_size=64 * 1024,
+    ):
+        if client is None:
+            key = self.make_key(key, version=version)
+            client = self.get_server(key)
+
+        return super().set_stream(
+            key=key,
+            chunks=chunks,
+            timeout=timeout,
+            version=version,
+            client=client,
+            chunk_size=chunk_size,
+        )
+
+    def get_stream(self, key, version=None, client=None, chunk_size=64 * 1024):
+        if client is None:
+            key = self.make_key(key, version=version)
+            client = self.get_server(key)
+
+        return super().get_stream(
+            key=key,
+            version=version,
+            client=client,
+            chunk_size=chunk_size,
+        )
 
     def has_key(self, key, version=None, client=None):
         """
@@ -133,11 +259,24 @@ class ShardClient(DefaultClient):
             key = self.make_key(key, version=version)
             client = self.get_server(key)
 
-        key = self.make_key(key, version=version)
-        try:
-            return client.exists(key) == 1
-        except RedisConnectionError as e:
-            raise ConnectionInterrupted(connection=client) from e
+        return super().has_key(key, version=version, client=client)
+
+    def has_many(self, keys, version=None, client=None):
+        if client is not None:
+            return super().has_many(keys, version=version, client=client)
+        return self._call_per_server(super().has_many, keys, version)
+
+    def count_existing(self, keys, version=None, client=None):
+        if client is not None:
+            return super().count_existing(keys, version=version, client=client)
+        return sum(
+            super(ShardClient, self).count_existing(
+                server_keys,
+                version=version,
+                client=server,
+            )
+            for server, server_keys in self._group_by_server(keys, version).items()
+        )
 
     def delete(self, key, version=None, client=None):
         if client is None:
@@ -170,6 +309,41 @@ class ShardClient(DefaultClient):
 
         return super().pttl(key=key, version=version, client=client)
 
+    def ttl_many(self, keys, version=None, client=None):
+        if client is not None:
+            return super().ttl_many(keys, version=version, client=client)
+        return self._call_per_server(super().ttl_many, keys, version)
+
+    def pttl_many(self, keys, version=None, client=None):
+        if client is not None:
+            return super().pttl_many(keys, version=version, client=client)
+        return self._call_per_server(super().pttl_many, keys, version)
+
+    def persist_many(self, keys, version=None, client=None):
+        if client is not None:
+            return super().persist_many(keys, version=version, client=client)
+        return self._call_per_server(super().persist_many, keys, version)
+
+    def expire_many(self, keys, timeout, version=None, client=None):
+        if client is not None:
+            return super().expire_many(keys, timeout, version=version, client=client)
+        return self._call_per_server(super().expire_many, keys, version, timeout)
+
+    def pexpire_many(self, keys, timeout, version=None, client=None):
+        if client is not None:
+            return super().pexpire_many(keys, timeout, version=version, client=client)
+        return self._call_per_server(super().pexpire_many, keys, version, timeout)
+
+    def expire_at_many(self, keys, when, version=None, client=None):
+        if client is not None:
+            return super().expire_at_many(keys, when, version=version, client=client)
+        return self._call_per_server(super().expire_at_many, keys, version, when)
+
+    def touch_many(self, keys, timeout=DEFAULT_TIMEOUT, version=None, client=None):
+        if client is not None:
+            return super().touch_many(keys, timeout, version=version, client=client)
+        return self._call_per_server(super().touch_many, keys, version, timeout)
+
     def persist(self, key, version=None, client=None):
         if client is None:
             key = self.make_key(key, version=version)
@@ -215,6 +389,12 @@ class ShardClient(DefaultClient):
 
         return super().expire_at(key=key, when=when, version=version, client=client)
 
+    def _pipeline_client(self, key, version):
+        if key is None:
+            error_message = "ShardClient can only pipeline calls on a single key"
+            raise NotImplementedError(error_message)
+        return self.get_server(self.make_key(key, version=version))
+
     def lock(
         self,
         key,
@@ -243,40 +423,55 @@ class ShardClient(DefaultClient):
         """
         Remove multiple keys at once.
         """
+        keys = list(keys)
+        self._prefetch_generations(keys)
         res = 0
         for key in [self.make_key(k, version=version) for k in keys]:
             client = self.get_server(key)
             res += self.delete(key, client=client)
         return res
 
-    def incr_version(self, key, delta=1, version=None, client=None):
-        if client is None:
-            key = self.make_key(key, version=version)
-            client = self.get_server(key)
+    def incr_version_many(self, keys, delta=1, version=None, client=None):
+        if client is not None:
+            return super().incr_version_many(keys, delta, version, client)
 
         if version is None:
             version = self._backend.version
 
-        old_key = self.make_key(key, version)
-        value = self.get(old_key, version=version, client=client)
+        keys = list(keys)
+        self._prefetch_generations(keys)
+        new_versions = {}
+        keys_by_server = {}
+        for key in keys:
+            old_key = self.make_key(key, version=version)
+            new_key = self._version_key(key, version + delta)
+            server = self.get_server(old_key)
+            if server is self.get_server(new_key):
+                keys_by_server.setdefault(server, []).append(key)
+            elif self._move_to_server(old_key, new_key):
+                # keys can't be renamed across servers
+                new_versions[key] = version + delta
+
+        for server, server_keys in keys_by_server.items():
+            new_versions.update(
+                super().incr_version_many(server_keys, delta, version, server),
+            )
+        return {key: new_versions[key] for key in keys if key in new_versions}
+
+    def _move_to_server(self, old_key, new_key):
+        old_server = self.get_server(old_key)
+        value = self.get(old_key, client=old_server)
+        if value is None:
+            return False
 
         try:
-            ttl = self.ttl(old_key, version=version, client=client)
+            ttl = self.ttl(old_key, client=old_server)
         except RedisConnectionError as e:
-            raise ConnectionInterrupted(connection=client) from e
-
-        if value is None:
-            msg = f"Key '{key}' not found"
-            raise ValueError(msg)
-
-        if isinstance(key, CacheKey):
-            new_key = self.make_key(key.original_key(), version=version + delta)
-        else:
-            new_key = self.make_key(key, version=version + delta)
+            raise ConnectionInterrupted(connection=old_server) from e
 
         self.set(new_key, value, timeout=ttl, client=self.get_server(new_key))
-        self.delete(old_key, client=client)
-        return version + delta
+        self.delete(old_key, client=old_server)
+        return True
 
     def incr(self, key, delta=1, version=None, client=None):
         if client is None:
@@ -285,6 +480,35 @@ class ShardClient(DefaultClient):
 
         return super().incr(key=key, delta=delta, version=version, client=client)
 
+    def _incr_many(self, data, version, client, ignore_key_check):
+        if client is not None:
+            return super()._incr_many(data, version, client, ignore_key_check)
+
+        values = {}
+        missing = []
+        for server, server_keys in self._group_by_server(data, version).items():
+            server_values, server_missing = super()._incr_many(
+                {key: data[key] for key in server_keys},
+                version,
+                server,
+                ignore_key_check,
+            )
+            values.update(server_values)
+            missing.extend(server_missing)
+        return {key: values[key] for key in data if key in values}, missing
+
+    def _flush_counters(self, deltas):
+        # written per server so a failing server doesn't make the increments
+        # of the others be written twice
+        failed = {}
+        for server, server_keys in self._group_by_server(deltas, None).items():
+            server_deltas = {key: deltas[key] for key in server_keys}
+            try:
+                super()._incr_many(server_deltas, None, server, True)
+            except ConnectionInterrupted:
+                failed.update(server_deltas)
+        return failed
+
     def decr(self, key, delta=1, version=None, client=None):
         if client is None:
             key = self.make_key(key, version=version)
@@ -292,11 +516,32 @@ class ShardClient(DefaultClient):
 
         return super().decr(key=key, delta=delta, version=version, client=client)
 
+    def incr_float(
+        self,
+        key,
+        delta=1.0,
+        version=None,
+        client=None,
+        ignore_key_check=False,
+    ):
+        if client is None:
+            key = self.make_key(key, version=version)
+            client = self.get_server(key)
+
+        return super().incr_float(
+            key=key,
+            delta=delta,
+            version=version,
+            client=client,
+            ignore_key_check=ignore_key_check,
+        )
+
     def iter_keys(self, key, version=None):
         error_message = "iter_keys not supported on sharded client"
         raise NotImplementedError(error_message)
 
     def keys(self, search, version=None):
+        self._check_no_buckets("keys")
         pattern = self.make_pattern(search, version=version)
         keys = []
         try:
@@ -307,7 +552,8 @@ class ShardClient(DefaultClient):
             client = self.get_server(pattern)
             raise ConnectionInterrupted(connection=client) from e
 
-        return [self.reverse_key(k.decode()) for k in keys]
+        keys = [k.decode() for k in keys]
+        return [self._reverse_key(k) for k in keys if not self._is_reserved(k)]
 
     def delete_pattern(
         self,
@@ -320,6 +566,7 @@ class ShardClient(DefaultClient):
         """
         Remove all keys matching pattern.
         """
+        self._check_no_buckets("delete_pattern")
         pattern = self.make_pattern(pattern, version=version, prefix=prefix)
         kwargs = {"match": pattern}
         if itersize:
@@ -327,7 +574,11 @@ class ShardClient(DefaultClient):
 
         keys = []
         for connection in self._serverdict.values():
-            keys.extend(key for key in connection.scan_iter(**kwargs))
+            keys.extend(
+                key
+                for key in connection.scan_iter(**kwargs)
+                if not self._is_reserved(key.decode())
+            )
 
         res = 0
         if keys:
@@ -335,6 +586,56 @@ class ShardClient(DefaultClient):
                 res += connection.delete(*keys)
         return res
 
+    def _read_generations(self, keys):
+        keys_by_server = {}
+        for key in keys:
+            keys_by_server.setdefault(self.get_server(key), []).append(key)
+        values = {}
+        for server, server_keys in keys_by_server.items():
+            try:
+                values.update(zip(server_keys, server.mget(server_keys)))
+            except _main_exceptions as e:
+                raise ConnectionInterrupted(connection=server) from e
+        return [values[key] for key in keys]
+
+    def _seed_generations(self, keys):
+        keys_by_server = {}
+        for key in keys:
+            keys_by_server.setdefault(self.get_server(key), []).append(key)
+        seed = _generation_seed()
+        values = {}
+        for server, server_keys in keys_by_server.items():
+            pipeline = server.pipeline(transaction=False)
+            for key in server_keys:
+                pipeline.set(key, seed, nx=True)
+                pipeline.get(key)
+            try:
+                values.update(zip(server_keys, pipeline.execute()[1::2]))
+            except _main_exceptions as e:
+                raise ConnectionInterrupted(connection=server) from e
+        return [values[key] for key in keys]
+
+    def invalidate_namespace(self, namespace, client=None):
+        if client is None:
+            client = self.get_server(self._generation_key(namespace))
+        return super().invalidate_namespace(namespace, client=client)
+
+    def invalidate_tags(self, *tags, client=None):
+        if client is not None:
+            return super().invalidate_tags(*tags, client=client)
+        return sum(
+            super(ShardClient, self).invalidate_tags(*tags, client=connection)
+            for connection in self._serverdict.values()
+        )
+
+    def prune_tags(self, *tags, client=None):
+        if client is not None:
+            return super().prune_tags(*tags, client=client)
+        return sum(
+            super(ShardClient, self).prune_tags(*tags, client=connection)
+            for connection in self._serverdict.values()
+        )
+
     def do_close_clients(self):
         for client in self._serverdict.values():
             self.disconnect(client=client)
@@ -347,8 +648,18 @@ class ShardClient(DefaultClient):
         return super().touch(key=key, timeout=timeout, version=version, client=client)
 
     def clear(self, client=None):
-        for connection in self._serverdict.values():
-            connection.flushdb()
+        if client is not None:
+            super().clear(client=client)
+            return
+
+        # servers are cleared in parallel, flushes can take a while
+        connections = list(self._serverdict.values())
+        with ThreadPoolExecutor(max_workers=len(connections)) as executor:
+            for future in [
+                executor.submit(super(ShardClient, self).clear, client=connection)
+                for connection in connections
+            ]:
+                future.result()
 
     def sadd(
         self,
@@ -502,3 +813,138 @@ class ShardClient(DefaultClient):
             key = self.make_key(key, version=version)
             client = self.get_server(key)
         return super().smismember(key, *members, version=version, client=client)
+
+    def hset(
+        self,
+        name: KeyT,
+        key: Optional[str] = None,
+        value: Any = None,
+        version: Optional[int] = None,
+        client: Optional[Redis] = None,
+        mapping: Optional[dict[str, Any]] = None,
+    ) -> int:
+        if client is None:
+            name = self.make_key(name, version=version)
+            client = self.get_server(name)
+        return super().hset(
+            name,
+            key,
+            value,
+            mapping=mapping,
+            version=version,
+            client=client,
+        )
+
+    def hget(
+        self,
+        name: KeyT,
+        key: str,
+        default: Optional[Any] = None,
+        version: Optional[int] = None,
+        client: Optional[Redis] = None,
+    ) -> Any:
+        if client is None:
+            name = self.make_key(name, version=version)
+            client = self.get_server(name)
+        return super().hget(name, key, default=default, version=version, client=client)
+
+    def hmget(
+        self,
+        name: KeyT,
+        keys: Iterable[str],
+        version: Optional[int] = None,
+        client: Optional[Redis] = None,
+    ) -> dict[str, Any]:
+        if client is None:
+            name = self.make_key(name, version=version)
+            client = self.get_server(name)
+        return super().hmget(name, keys, version=version, client=client)
+
+    def hgetall(
+        self,
+        name: KeyT,
+        version: Optional[int] = None,
+        client: Optional[Redis] = None,
+    ) -> dict[str, Any]:
+        if client is None:
+            name = self.make_key(name, version=version)
+            client = self.get_server(name)
+        return super().hgetall(name, version=version, client=client)
+
+    def hincrby(
+        self,
+        name: KeyT,
+        key: str,
+        delta: int = 1,
+        version: Optional[int] = None,
+        client: Optional[Redis] = None,
+    ) -> int:
+        if client is None:
+            name = self.make_key(name, version=version)
+            client = self.get_server(name)
+        return super().hincrby(name, key, delta=delta, version=version, client=client)
+
+    def hscan_iter(
+        self,
+        name: KeyT,
+        match: Optional[str] = None,
+        count: Optional[int] = None,
+        version: Optional[int] = None,
+        client: Optional[Redis] = None,
+    ) -> Iterator[tuple[str, Any]]:
+        if client is None:
+            name = self.make_key(name, version=version)
+            client = self.get_server(name)
+        return super().hscan_iter(
+            name,
+            match=match,
+            count=count,
+            version=version,
+            client=client,
+        )
+
+    def hdel(
+        self,
+        name: KeyT,
+        key: str,
+        version: Optional[int] = None,
+        client: Optional[Redis] = None,
+    ) -> int:
+        if client is None:
+            name = self.make_key(name, version=version)
+            client = self.get_server(name)
+        return super().hdel(name, key, version=version, client=client)
+
+    def hlen(
+        self,
+        name: KeyT,
+        version: Optional[int] = None,
+        client: Optional[Redis] = None,
+    ) -> int:
+        if client is None:
+            name = self.make_key(name, version=version)
+            client = self.get_server(name)
+        return super().hlen(name, version=version, client=client)
+
+    def hkeys(
+        self,
+        name: KeyT,
+        version: Optional[int] = None,
+        client: Optional[Redis] = None,
+    ) -> list[str]:
+        if client is None:
+            name = self.make_key(name, version=version)
+            client = self.get_server(name)
+        return super().hkeys(name, version=version, client=client)
+
+    def hexists(
+        self,
+        name: KeyT,
+        key: str,
+        version: Optional[int] = None,
+        client: Optional[Redis] = None,
+    ) -> bool:
+        if client is None:
+            name = self.make_key(name, version=version)
+            client = self.get_server(name)
+        return super().hexists(name, key, version=version, client=client)
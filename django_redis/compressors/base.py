@@ -1,9 +1,43 @@
+from collections.abc import Iterable, Iterator
+from contextlib import suppress
+from typing import Optional
+
+from django_redis.exceptions import CompressorError
+
+
 class BaseCompressor:
+    # leading bytes of every value produced by ``compress``, if any
+    magic: Optional[bytes] = None
+
     def __init__(self, options):
         self._options = options
 
+    def detect(self, value: bytes) -> bool:
+        """
+        Return whether value looks like it was compressed by this compressor.
+        """
+        return self.magic is not None and value[: len(self.magic)] == self.magic
+
     def compress(self, value: bytes) -> bytes:
         raise NotImplementedError
 
     def decompress(self, value: bytes) -> bytes:
         raise NotImplementedError
+
+    def compress_stream(self, chunks: Iterable[bytes]) -> Iterator[bytes]:
+        """
+        Compress a stream of bytes. Compressors that can't compress
+        incrementally compress the whole stream at once.
+        """
+        yield self.compress(b"".join(chunks))
+
+    def decompress_stream(self, chunks: Iterable[bytes]) -> Iterator[bytes]:
+        """
+        Decompress a stream produced by ``compress_stream``. Compressors that
+        can't decompress incrementally decompress the whole stream at once.
+        """
+        value = b"".join(chunks)
+        # streams too short to be compressed are stored as is
+        with suppress(CompressorError):
+            value = self.decompress(value)
+        yield value
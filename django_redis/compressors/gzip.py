@@ -1,11 +1,17 @@
 import gzip
+import zlib
+from collections.abc import Iterable, Iterator
 
 from django_redis.compressors.base import BaseCompressor
 from django_redis.exceptions import CompressorError
 
+# wbits value selecting the gzip container in zlib
+_GZIP_WBITS = 16 + zlib.MAX_WBITS
+
 
 class GzipCompressor(BaseCompressor):
     min_length = 15
+    magic = b"\x1f\x8b"
 
     def compress(self, value: bytes) -> bytes:
         if len(value) > self.min_length:
@@ -17,3 +23,25 @@ class GzipCompressor(BaseCompressor):
             return gzip.decompress(value)
         except gzip.BadGzipFile as e:
             raise CompressorError from e
+
+    def compress_stream(self, chunks: Iterable[bytes]) -> Iterator[bytes]:
+        compressor = zlib.compressobj(wbits=_GZIP_WBITS)
+        for chunk in chunks:
+            data = compressor.compress(chunk)
+            if data:
+                yield data
+        yield compressor.flush()
+
+    def decompress_stream(self, chunks: Iterable[bytes]) -> Iterator[bytes]:
+        decompressor = zlib.decompressobj(wbits=_GZIP_WBITS)
+        try:
+            for chunk in chunks:
+                data = decompressor.decompress(chunk)
+                if data:
+                    yield data
+            yield decompressor.flush()
+        except zlib.error as e:
+            raise CompressorError from e
+        if not decompressor.eof:
+            error_message = "The compressed stream is truncated"
+            raise CompressorError(error_message)
@@ -1,3 +1,5 @@
+from collections.abc import Iterable, Iterator
+
 from django_redis.compressors.base import BaseCompressor
 
 
@@ -7,3 +9,9 @@ class IdentityCompressor(BaseCompressor):
 
     def decompress(self, value: bytes) -> bytes:
         return value
+
+    def compress_stream(self, chunks: Iterable[bytes]) -> Iterator[bytes]:
+        yield from chunks
+
+    def decompress_stream(self, chunks: Iterable[bytes]) -> Iterator[bytes]:
+        yield from chunks
@@ -1,3 +1,6 @@
+from collections.abc import Iterable, Iterator
+
+from lz4.frame import LZ4FrameCompressor, LZ4FrameDecompressor
 from lz4.frame import compress as _compress
 from lz4.frame import decompress as _decompress
 
@@ -7,6 +10,7 @@ from django_redis.exceptions import CompressorError
 
 class Lz4Compressor(BaseCompressor):
     min_length = 15
+    magic = b"\x04\x22\x4d\x18"
 
     def compress(self, value: bytes) -> bytes:
         if len(value) > self.min_length:
@@ -18,3 +22,25 @@ class Lz4Compressor(BaseCompressor):
             return _decompress(value)
         except Exception as e:
             raise CompressorError from e
+
+    def compress_stream(self, chunks: Iterable[bytes]) -> Iterator[bytes]:
+        compressor = LZ4FrameCompressor()
+        yield compressor.begin()
+        for chunk in chunks:
+            data = compressor.compress(chunk)
+            if data:
+                yield data
+        yield compressor.flush()
+
+    def decompress_stream(self, chunks: Iterable[bytes]) -> Iterator[bytes]:
+        decompressor = LZ4FrameDecompressor()
+        try:
+            for chunk in chunks:
+                data = decompressor.decompress(chunk)
+                if data:
+                    yield data
+        except Exception as e:
+            raise CompressorError from e
+        if not decompressor.eof:
+            error_message = "The compressed stream is truncated"
+            raise CompressorError(error_message)
@@ -1,4 +1,5 @@
 import lzma
+from collections.abc import Iterable, Iterator
 
 from django_redis.compressors.base import BaseCompressor
 from django_redis.exceptions import CompressorError
@@ -7,6 +8,7 @@ from django_redis.exceptions import CompressorError
 class LzmaCompressor(BaseCompressor):
     min_length = 100
     preset = 4
+    magic = b"\xfd7zXZ\x00"
 
     def compress(self, value: bytes) -> bytes:
         if len(value) > self.min_length:
@@ -18,3 +20,24 @@ class LzmaCompressor(BaseCompressor):
             return lzma.decompress(value)
         except lzma.LZMAError as e:
             raise CompressorError from e
+
+    def compress_stream(self, chunks: Iterable[bytes]) -> Iterator[bytes]:
+        compressor = lzma.LZMACompressor(preset=self.preset)
+        for chunk in chunks:
+            data = compressor.compress(chunk)
+            if data:
+                yield data
+        yield compressor.flush()
+
+    def decompress_stream(self, chunks: Iterable[bytes]) -> Iterator[bytes]:
+        decompressor = lzma.LZMADecompressor()
+        try:
+            for chunk in chunks:
+                data = decompressor.decompress(chunk)
+                if data:
+                    yield data
+        except lzma.LZMAError as e:
+            raise CompressorError from e
+        if not decompressor.eof:
+            error_message = "The compressed stream is truncated"
+            raise CompressorError(error_message)
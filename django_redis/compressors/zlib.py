@@ -1,4 +1,5 @@
 import zlib
+from collections.abc import Iterable, Iterator
 
 from django_redis.compressors.base import BaseCompressor
 from django_redis.exceptions import CompressorError
@@ -8,6 +9,15 @@ class ZlibCompressor(BaseCompressor):
     min_length = 15
     preset = 6
 
+    def detect(self, value: bytes) -> bool:
+        # zlib has no fixed magic: the header declares the deflate method and
+        # is a multiple of 31 when read as a big-endian integer
+        return (
+            len(value) >= 2
+            and value[0] & 0x0F == 8
+            and (value[0] << 8 | value[1]) % 31 == 0
+        )
+
     def compress(self, value: bytes) -> bytes:
         if len(value) > self.min_length:
             return zlib.compress(value, self.preset)
@@ -18,3 +28,25 @@ class ZlibCompressor(BaseCompressor):
             return zlib.decompress(value)
         except zlib.error as e:
             raise CompressorError from e
+
+    def compress_stream(self, chunks: Iterable[bytes]) -> Iterator[bytes]:
+        compressor = zlib.compressobj(self.preset)
+        for chunk in chunks:
+            data = compressor.compress(chunk)
+            if data:
+                yield data
+        yield compressor.flush()
+
+    def decompress_stream(self, chunks: Iterable[bytes]) -> Iterator[bytes]:
+        decompressor = zlib.decompressobj()
+        try:
+            for chunk in chunks:
+                data = decompressor.decompress(chunk)
+                if data:
+                    yield data
+            yield decompressor.flush()
+        except zlib.error as e:
+            raise CompressorError from e
+        if not decompressor.eof:
+            error_message = "The compressed stream is truncated"
+            raise CompressorError(error_message)
@@ -1,3 +1,5 @@
+from collections.abc import Iterable, Iterator
+
 import pyzstd
 
 from django_redis.compressors.base import BaseCompressor
@@ -6,6 +8,7 @@ from django_redis.exceptions import CompressorError
 
 class ZStdCompressor(BaseCompressor):
     min_length = 15
+    magic = b"\x28\xb5\x2f\xfd"
 
     def compress(self, value: bytes) -> bytes:
         if len(value) > self.min_length:
@@ -17,3 +20,24 @@ class ZStdCompressor(BaseCompressor):
             return pyzstd.decompress(value)
         except pyzstd.ZstdError as e:
             raise CompressorError from e
+
+    def compress_stream(self, chunks: Iterable[bytes]) -> Iterator[bytes]:
+        compressor = pyzstd.ZstdCompressor()
+        for chunk in chunks:
+            data = compressor.compress(chunk)
+            if data:
+                yield data
+        yield compressor.flush()
+
+    def decompress_stream(self, chunks: Iterable[bytes]) -> Iterator[bytes]:
+        decompressor = pyzstd.ZstdDecompressor()
+        try:
+            for chunk in chunks:
+                data = decompressor.decompress(chunk)
+                if data:
+                    yield data
+        except pyzstd.ZstdError as e:
+            raise CompressorError from e
+        if not decompressor.eof:
+            error_message = "The compressed stream is truncated"
+            raise CompressorError(error_message)
@@ -1,13 +1,104 @@
+import datetime
+import decimal
+import threading
+import uuid
 from typing import Any
 
 import msgpack
+from django.utils.functional import Promise
 
 from django_redis.serializers.base import BaseSerializer
 
+# Extension type codes, they are part of the stored format and must not change.
+EXT_DATETIME = 1
+EXT_DATE = 2
+EXT_TIME = 3
+EXT_TIMEDELTA = 4
+EXT_DECIMAL = 5
+EXT_UUID = 6
+EXT_SET = 7
+EXT_FROZENSET = 8
+
 
 class MSGPackSerializer(BaseSerializer):
+    """
+    Serialize values with msgpack.
+
+    Besides the msgpack native types, datetimes, dates, times, timedeltas,
+    decimals, UUIDs, sets and Django lazy strings are supported. Subclasses can
+    support more types by extending ``default`` and ``ext_hook``.
+    """
+
+    def __init__(self, options) -> None:
+        self._use_list = options.get("MSGPACK_USE_LIST", True)
+        # Packers keep an internal buffer and are not thread safe
+        self._local = threading.local()
+
+        super().__init__(options=options)
+
+    def _get_packer(self) -> msgpack.Packer:
+        try:
+            return self._local.packer
+        except AttributeError:
+            packer = self._local.packer = msgpack.Packer(default=self.default)
+            return packer
+
+    def default(self, obj: Any) -> Any:
+        if isinstance(obj, datetime.datetime):
+            return msgpack.ExtType(EXT_DATETIME, obj.isoformat().encode())
+        if isinstance(obj, datetime.date):
+            return msgpack.ExtType(EXT_DATE, obj.isoformat().encode())
+        if isinstance(obj, datetime.time):
+            return msgpack.ExtType(EXT_TIME, obj.isoformat().encode())
+        if isinstance(obj, datetime.timedelta):
+            data = msgpack.packb([obj.days, obj.seconds, obj.microseconds])
+            return msgpack.ExtType(EXT_TIMEDELTA, data)
+        if isinstance(obj, decimal.Decimal):
+            return msgpack.ExtType(EXT_DECIMAL, str(obj).encode())
+        if isinstance(obj, uuid.UUID):
+            return msgpack.ExtType(EXT_UUID, obj.bytes)
+        if isinstance(obj, (set, frozenset)):
+            # the thread packer is busy, nested payloads use a new one
+            data = msgpack.packb(list(obj), default=self.default)
+            code = EXT_FROZENSET if isinstance(obj, frozenset) else EXT_SET
+            return msgpack.ExtType(code, data)
+        if isinstance(obj, Promise):
+            return str(obj)
+        error_message = f"Object of type {type(obj).__name__} is not serializable"
+        raise TypeError(error_message)
+
+    def ext_hook(self, code: int, data: bytes) -> Any:
+        if code == EXT_DATETIME:
+            return datetime.datetime.fromisoformat(data.decode())
+        if code == EXT_DATE:
+            return datetime.date.fromisoformat(data.decode())
+        if code == EXT_TIME:
+            return datetime.time.fromisoformat(data.decode())
+        if code == EXT_TIMEDELTA:
+            days, seconds, microseconds = msgpack.unpackb(data)
+            return datetime.timedelta(days, seconds, microseconds)
+        if code == EXT_DECIMAL:
+            return decimal.Decimal(data.decode())
+        if code == EXT_UUID:
+            return uuid.UUID(bytes=bytes(data))
+        if code in (EXT_SET, EXT_FROZENSET):
+            # set members must be hashable, so nested arrays become tuples
+            items = msgpack.unpackb(
+                data,
+                raw=False,
+                use_list=False,
+                ext_hook=self.ext_hook,
+            )
+            return set(items) if code == EXT_SET else frozenset(items)
+        return msgpack.ExtType(code, data)
+
     def dumps(self, value: Any) -> bytes:
-        return msgpack.dumps(value)
+        return self._get_packer().pack(value)
 
     def loads(self, value: bytes) -> Any:
-        return msgpack.loads(value, raw=False)
+        return msgpack.unpackb(
+            value,
+            raw=False,
+            use_list=self._use_list,
+            ext_hook=self.ext_hook,
+        )
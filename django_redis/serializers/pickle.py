@@ -1,15 +1,73 @@
+import io
 import pickle
-from typing import Any
+import struct
+from typing import Any, Optional
 
 from django.core.exceptions import ImproperlyConfigured
 
 from django_redis.serializers.base import BaseSerializer
 
+# Values pickled with out-of-band buffers are framed as:
+#   magic | buffer count (uint32) | (length, kind) per buffer | buffers | pickle
+# A regular pickle stream never starts with a null byte, so the magic can't clash.
+_OOB_MAGIC = b"\x00DRB"
+_OOB_COUNT = struct.Struct("<I")
+_OOB_ENTRY = struct.Struct("<QB")
+
+_OOB_PICKLE_BUFFER = 0
+_OOB_KINDS: dict[type, int] = {bytes: 1, bytearray: 2}
+_OOB_TYPES = {kind: cls for cls, kind in _OOB_KINDS.items()}
+
+
+class _OutOfBandPickler(pickle.Pickler):
+    """
+    Pickler that moves large binary payloads out of the pickle stream.
+
+    ``PickleBuffer`` instances (NumPy arrays, for example) go through the
+    protocol 5 buffer callback. ``bytes`` and ``bytearray`` can't be reduced
+    differently by the C pickler, so they are referenced by persistent id.
+    """
+
+    def __init__(self, file, protocol, threshold: int) -> None:
+        super().__init__(file, protocol, buffer_callback=self._buffer_callback)
+        self.threshold = threshold
+        self.buffers: list[tuple[memoryview, int]] = []
+
+    def _buffer_callback(self, buffer: pickle.PickleBuffer) -> bool:
+        view = buffer.raw()
+        if view.nbytes < self.threshold:
+            # keep small buffers in-band
+            return True
+        self.buffers.append((view, _OOB_PICKLE_BUFFER))
+        return False
+
+    def persistent_id(self, obj: Any) -> Optional[int]:
+        kind = _OOB_KINDS.get(type(obj))
+        if kind is None or len(obj) < self.threshold:
+            return None
+        self.buffers.append((memoryview(obj), kind))
+        return len(self.buffers) - 1
+
+
+class _OutOfBandUnpickler(pickle.Unpickler):
+    def __init__(self, file, buffers: list[tuple[memoryview, int]]) -> None:
+        super().__init__(
+            file,
+            buffers=[view for view, kind in buffers if kind == _OOB_PICKLE_BUFFER],
+        )
+        self._persistent = buffers
+
+    def persistent_load(self, pid: Any) -> Any:
+        view, kind = self._persistent[pid]
+        return _OOB_TYPES[kind](view)
+
 
 class PickleSerializer(BaseSerializer):
     def __init__(self, options) -> None:
         self._pickle_version = pickle.DEFAULT_PROTOCOL
+        self._out_of_band_threshold: Optional[int] = None
         self.setup_pickle_version(options)
+        self.setup_out_of_band(options)
 
         super().__init__(options=options)
 
@@ -27,8 +85,77 @@ class PickleSerializer(BaseSerializer):
                 error_message = "PICKLE_VERSION value must be an integer"
                 raise ImproperlyConfigured(error_message) from e
 
+    def setup_out_of_band(self, options) -> None:
+        threshold = options.get("PICKLE_OUT_OF_BAND_THRESHOLD")
+        if threshold is None:
+            return
+
+        try:
+            self._out_of_band_threshold = int(threshold)
+        except (ValueError, TypeError) as e:
+            error_message = "PICKLE_OUT_OF_BAND_THRESHOLD value must be an integer"
+            raise ImproperlyConfigured(error_message) from e
+
+        protocol = self._pickle_version
+        if protocol < 0:
+            protocol = pickle.HIGHEST_PROTOCOL
+        if protocol < 5:
+            error_message = "PICKLE_OUT_OF_BAND_THRESHOLD requires PICKLE_VERSION >= 5"
+            raise ImproperlyConfigured(error_message)
+
     def dumps(self, value: Any) -> bytes:
-        return pickle.dumps(value, self._pickle_version)
+        if self._out_of_band_threshold is None:
+            return pickle.dumps(value, self._pickle_version)
+
+        stream = io.BytesIO()
+        pickler = _OutOfBandPickler(
+            stream,
+            self._pickle_version,
+            threshold=self._out_of_band_threshold,
+        )
+        pickler.dump(value)
+        buffers = pickler.buffers
+        if not buffers:
+            return stream.getvalue()
+
+        data = stream.getbuffer()
+        header_size = len(_OOB_MAGIC) + _OOB_COUNT.size + _OOB_ENTRY.size * len(buffers)
+        frame = bytearray(
+            header_size + sum(view.nbytes for view, _ in buffers) + len(data),
+        )
+        frame[: len(_OOB_MAGIC)] = _OOB_MAGIC
+        offset = len(_OOB_MAGIC)
+        _OOB_COUNT.pack_into(frame, offset, len(buffers))
+        offset += _OOB_COUNT.size
+        for view, kind in buffers:
+            _OOB_ENTRY.pack_into(frame, offset, view.nbytes, kind)
+            offset += _OOB_ENTRY.size
+        for view, _ in buffers:
+            frame[offset : offset + view.nbytes] = view
+            offset += view.nbytes
+        frame[offset:] = data
+
+        # A memoryview is handed to redis-py as a separate chunk, so the frame
+        # is written to the socket without being copied again.
+        return memoryview(frame)  # type: ignore[return-value]
 
     def loads(self, value: bytes) -> Any:
-        return pickle.loads(value)
+        if value[: len(_OOB_MAGIC)] != _OOB_MAGIC:
+            return pickle.loads(value)
+
+        view = memoryview(value)
+        offset = len(_OOB_MAGIC)
+        (count,) = _OOB_COUNT.unpack_from(view, offset)
+        offset += _OOB_COUNT.size
+        entries = []
+        for _ in range(count):
+            entries.append(_OOB_ENTRY.unpack_from(view, offset))
+            offset += _OOB_ENTRY.size
+
+        # Slices of the reply are passed as-is, buffer-aware types such as
+        # NumPy arrays are rebuilt on top of them without copying.
+        buffers = []
+        for length, kind in entries:
+            buffers.append((view[offset : offset + length], kind))
+            offset += length
+        return _OutOfBandUnpickler(io.BytesIO(view[offset:]), buffers).load()
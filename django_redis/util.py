@@ -1,3 +1,6 @@
+from typing import Any
+
+
 class CacheKey(str):
     """
     A stub string class that we can use to check if a key was created already.
@@ -7,5 +10,30 @@ class CacheKey(str):
         return self.rsplit(":", 1)[1]
 
 
+class HashedKey(str):
+    """
+    A key shortened by the MAX_KEY_LENGTH option, as returned by ``keys``.
+
+    Only a readable prefix of the original key is kept, followed by a digest
+    of the whole key, so the original key can't be recovered. The hashed key
+    can still be used to access the value.
+    """
+
+
 def default_reverse_key(key: str) -> str:
     return key.split(":", 2)[2]
+
+
+class Immutable:
+    """
+    Wrap a value that is never mutated, so that its encoded form can be reused.
+
+    The value is stored as if it was passed unwrapped. With the ENCODE_CACHE_SIZE
+    option, writing the same wrapped object again skips its serialization and
+    compression.
+    """
+
+    __slots__ = ("value",)
+
+    def __init__(self, value: Any) -> None:
+        self.value = value
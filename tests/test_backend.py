@@ -1,4 +1,5 @@
 import datetime
+import secrets
 import threading
 import time
 from collections.abc import Iterable
@@ -11,11 +12,12 @@ from django.core.cache import caches
 from django.core.cache.backends.base import DEFAULT_TIMEOUT
 from django.test import override_settings
 from pytest_mock import MockerFixture
+from redis import Redis
+from redis.client import Pipeline
 
 from django_redis.cache import RedisCache
 from django_redis.client import ShardClient, herd
 from django_redis.serializers.json import JSONSerializer
-from django_redis.serializers.msgpack import MSGPackSerializer
 from tests.settings_wrapper import SettingsWrapper
 
 
@@ -101,9 +103,8 @@ class TestDjangoRedisCache:
         assert res == "heló"
 
     def test_save_dict(self, cache: RedisCache):
-        if isinstance(cache.client._serializer, (JSONSerializer, MSGPackSerializer)):
-            # JSONSerializer and MSGPackSerializer use the isoformat for
-            # datetimes.
+        if isinstance(cache.client._serializer, JSONSerializer):
+            # JSONSerializer uses the isoformat for datetimes.
             now_dt: Union[str, datetime.datetime] = datetime.datetime.now().isoformat()
         else:
             now_dt = datetime.datetime.now()
@@ -188,6 +189,89 @@ class TestDjangoRedisCache:
         res = cache.add("other_key", "New value")
         assert res is True
 
+    def test_get_or_set(self, cache: RedisCache):
+        assert cache.get_or_set("a", lambda: 1) == 1
+        assert cache.get_or_set("a", lambda: 2) == 1
+        assert cache.get_or_set("b", "value") == "value"
+        assert cache.get("b") == "value"
+
+    def test_get_or_set_single_flight(self, cache: RedisCache):
+        started = threading.Event()
+        release = threading.Event()
+        calls = []
+
+        def compute():
+            calls.append(1)
+            started.set()
+            release.wait(5)
+            return "computed"
+
+        holder = threading.Thread(target=cache.get_or_set, args=("key", compute))
+        holder.start()
+        assert started.wait(5)
+        threading.Timer(0.2, release.set).start()
+        # waits for the value computed by the lease holder
+        assert cache.get_or_set("key", compute) == "computed"
+        holder.join()
+        assert len(calls) == 1
+
+    def test_get_or_set_stale(self, cache: RedisCache):
+        assert cache.get_or_set("key", lambda: "old", stale_timeout=60) == "old"
+        cache.delete("key")
+
+        started = threading.Event()
+        release = threading.Event()
+
+        def compute():
+            started.set()
+            release.wait(5)
+            return "new"
+
+        holders = [
+            threading.Thread(target=cache.get_or_set, args=(key, compute))
+            for key in ("key", "other")
+        ]
+        for holder in holders:
+            started.clear()
+            holder.start()
+            assert started.wait(5)
+        try:
+            assert cache.get_or_set("key", lambda: "value") == "old"
+            # without a stale value, waiters compute it after wait_timeout
+            value = cache.get_or_set("other", lambda: "value", wait_timeout=0.1)
+            assert value == "value"
+        finally:
+            release.set()
+            for holder in holders:
+                holder.join()
+        assert cache.get("key") == "new"
+
+    def test_get_or_refresh(self, cache: RedisCache):
+        calls = []
+        release = threading.Event()
+
+        def compute():
+            calls.append(1)
+            if len(calls) > 1:
+                release.wait(5)
+            return len(calls)
+
+        assert cache.get_or_refresh("key", compute, ttl=60) == 1
+        assert cache.get_or_refresh("key", compute, ttl=60) == 1
+        # logically stale, the previous value is returned while it's refreshed
+        cache.delete("key")
+        try:
+            assert cache.get_or_refresh("key", compute, ttl=60) == 1
+            assert cache.get_or_refresh("key", compute, ttl=60) == 1
+        finally:
+            release.set()
+        for _ in range(50):
+            if cache.get("key") == 2:
+                break
+            time.sleep(0.1)
+        assert cache.get_or_refresh("key", compute, ttl=60) == 2
+        assert len(calls) == 2
+
     def test_get_many(self, cache: RedisCache):
         cache.set("a", 1)
         cache.set("b", 2)
@@ -222,6 +306,10 @@ class TestDjangoRedisCache:
         key = "key"
         value = "value"
 
+        if isinstance(cache.client, herd.HerdClient):
+            # the header depends on the current time and on earlier misses
+            mocker.patch.object(herd.time, "time", return_value=time.time())
+            mocker.patch.object(cache.client, "_compute_time", return_value=0.0)
         mocked_set = mocker.patch.object(pipeline, "set")
         cache.set(key, value, client=pipeline)
 
@@ -305,9 +393,6 @@ class TestDjangoRedisCache:
         assert bool(res) is False
 
     def test_incr(self, cache: RedisCache):
-        if isinstance(cache.client, herd.HerdClient):
-            pytest.skip("HerdClient doesn't support incr")
-
         cache.set("num", 1)
 
         cache.incr("num")
@@ -335,10 +420,59 @@ class TestDjangoRedisCache:
         res = cache.get("num")
         assert res == 5
 
-    def test_incr_no_timeout(self, cache: RedisCache):
-        if isinstance(cache.client, herd.HerdClient):
-            pytest.skip("HerdClient doesn't support incr")
+    def test_incr_many(self, cache: RedisCache):
+        cache.set_many({"a": 1, "b": 10, "big": 9223372036854775807})
+        result = cache.incr_many({"b": -5, "big": 1, "a": 2})
+        assert list(result) == ["b", "big", "a"]
+        assert result == {"b": 5, "big": 9223372036854775808, "a": 3}
+        assert cache.get_many(["a", "b", "big"]) == {
+            "a": 3,
+            "b": 5,
+            "big": 9223372036854775808,
+        }
+
+        with pytest.raises(ValueError, match="missing"):
+            cache.incr_many({"a": 1, "missing": 1})
+        # the keys found are incremented anyway
+        assert cache.get("a") == 4
+        assert cache.incr_many({"missing": 2}, ignore_key_check=True) == {
+            "missing": 2,
+        }
+        assert cache.incr_many({}) == {}
+
+    def test_decr_many(self, cache: RedisCache):
+        cache.set_many({"a": 1, "b": 10})
+        assert cache.decr_many({"b": 5, "a": -2}) == {"b": 5, "a": 3}
+        assert cache.get_many(["a", "b"]) == {"a": 3, "b": 5}
+
+        with pytest.raises(ValueError, match="missing"):
+            cache.decr_many({"a": 1, "missing": 1})
+        assert cache.get("a") == 2
+        assert cache.decr_many({"missing": 2}, ignore_key_check=True) == {
+            "missing": -2,
+        }
+
+    def test_incr_buffered(self, cache: RedisCache):
+        cache.set("a", 1)
+        cache.incr_buffered("a")
+        cache.incr_buffered("a", 5)
+        cache.incr_buffered("b", -2)
+        assert cache.counter_stats()["pending"] == 3
+
+        cache.flush_counters()
+        assert cache.get_many(["a", "b"]) == {"a": 7, "b": -2}
+        stats = cache.counter_stats()
+        assert stats["pending"] == 0
+        assert stats["flushes"] >= 1
+        assert stats["dropped"] == 0
+
+        cache.incr_buffered("a", 3)
+        cache.close()
+        assert cache.counter_stats()["pending"] == 1
+        cache.flush_counters()
+        assert cache.get("a") == 10
 
+    def test_incr_no_timeout(self, cache: RedisCache):
         cache.set("num", 1, timeout=None)
 
         cache.incr("num")
@@ -367,9 +501,6 @@ class TestDjangoRedisCache:
         assert res == 5
 
     def test_incr_error(self, cache: RedisCache):
-        if isinstance(cache.client, herd.HerdClient):
-            pytest.skip("HerdClient doesn't support incr")
-
         with pytest.raises(ValueError):
             # key does not exist
             cache.incr("numnum")
@@ -377,9 +508,6 @@ class TestDjangoRedisCache:
     def test_incr_ignore_check(self, cache: RedisCache):
         if isinstance(cache.client, ShardClient):
             pytest.skip("ShardClient doesn't support argument ignore_key_check to incr")
-        if isinstance(cache.client, herd.HerdClient):
-            pytest.skip("HerdClient doesn't support incr")
-
         # key exists check will be skipped and the value will be incremented by
         # '1' which is the default delta
         cache.incr("num", ignore_key_check=True)
@@ -425,9 +553,6 @@ class TestDjangoRedisCache:
         assert res is False
 
     def test_decr(self, cache: RedisCache):
-        if isinstance(cache.client, herd.HerdClient):
-            pytest.skip("HerdClient doesn't support decr")
-
         cache.set("num", 20)
 
         cache.decr("num")
@@ -459,6 +584,62 @@ class TestDjangoRedisCache:
         res = cache.get("num")
         assert res == 9223372036854775805
 
+    def test_float(self, cache: RedisCache):
+        cache.set("float", 1.5)
+        cache.set_many({"float1": -0.25, "float2": 1e100, "small": "1.5"})
+        res = cache.get("float")
+        assert isinstance(res, float)
+        assert res == 1.5
+        assert cache.get_many(["float1", "float2", "small"]) == {
+            "float1": -0.25,
+            "float2": 1e100,
+            "small": "1.5",
+        }
+
+    def test_incr_float(self, cache: RedisCache):
+        cache.set("num", 1.5)
+        assert cache.incr_float("num", 0.25) == 1.75
+        assert cache.get("num") == 1.75
+
+        cache.set("num", 10)
+        assert cache.incr_float("num", -0.5) == 9.5
+        assert cache.incr_float("num") == 10.5
+
+        with pytest.raises(ValueError):
+            cache.incr_float("missing", 0.5)
+        assert cache.incr_float("missing", 0.5, ignore_key_check=True) == 0.5
+
+    def test_incr_float_integral_result(self, cache: RedisCache):
+        cache.set("num", 1.5, timeout=100)
+        assert cache.incr_float("num", 0.5) == 2.0
+        value = cache.get("num")
+        assert isinstance(value, float)
+        assert value == 2.0
+        herd_timeout = 2 if isinstance(cache.client, herd.HerdClient) else 0
+        assert 0 < cache.ttl("num") <= 100 + herd_timeout
+
+        cache.set("whole", 3.0)
+        assert isinstance(cache.get("whole"), float)
+
+    def test_incr_float_keeps_ttl(self, cache: RedisCache):
+        cache.set("num", 1.5, timeout=100)
+        cache.incr_float("num", 1)
+        herd_timeout = 2 if isinstance(cache.client, herd.HerdClient) else 0
+        assert 0 < cache.ttl("num") <= 100 + herd_timeout
+
+    def test_incr_float_serialized_value(self, cache: RedisCache):
+        # values stored before floats were written natively
+        client = cache.client
+        nkey = client.make_key("num")
+        value = client._compressor.compress(client._serializer.dumps(1.5))
+        if isinstance(client, ShardClient):
+            client.get_server(nkey).set(nkey, value)
+        else:
+            client.get_client(write=True).set(nkey, value)
+
+        assert cache.incr_float("num", 1) == 2.5
+        assert cache.get("num") == 2.5
+
     def test_version(self, cache: RedisCache):
         cache.set("keytest", 2, version=2)
         res = cache.get("keytest")
@@ -486,6 +667,29 @@ class TestDjangoRedisCache:
 
         assert my_value == "hello world!"
 
+    def test_incr_version_keeps_ttl(self, cache: RedisCache):
+        if isinstance(cache.client, herd.HerdClient):
+            pytest.skip("HerdClient extends the expiry of its values")
+
+        cache.set("my_key", "hello world!", timeout=100)
+        assert cache.incr_version("my_key") == 2
+        assert 0 < cache.ttl("my_key", version=2) <= 100
+
+        with pytest.raises(ValueError):
+            cache.incr_version("missing")
+
+    def test_incr_version_many(self, cache: RedisCache):
+        cache.set_many({"a": 1, "b": 2, "c": 3})
+        cache.set("b", "old", version=3)
+
+        assert cache.incr_version_many(["a", "b", "missing"], delta=2) == {
+            "a": 3,
+            "b": 3,
+        }
+        assert cache.get_many(["a", "b", "c"]) == {"c": 3}
+        assert cache.get_many(["a", "b", "c"], version=3) == {"a": 1, "b": 2}
+        assert cache.incr_version_many([]) == {}
+
     def test_delete_pattern(self, cache: RedisCache):
         for key in ["foo-aa", "foo-ab", "foo-bb", "foo-bc"]:
             cache.set(key, "foo")
@@ -594,6 +798,32 @@ class TestDjangoRedisCache:
         ttl = cache.pttl("not-existent-key")
         assert ttl == 0
 
+    def test_ttl_many(self, cache: RedisCache):
+        cache.set("a", "a", 10)
+        cache.set("b", "b", timeout=None)
+        herd_timeout = 2 if isinstance(cache.client, herd.HerdClient) else 0
+
+        keys = ["a", "b", "missing"]
+        assert cache.ttl_many(keys) == {"a": 10 + herd_timeout, "b": None, "missing": 0}
+        pttls = cache.pttl_many(keys)
+        assert list(pttls) == keys
+        assert (9 + herd_timeout) * 1000 < pttls["a"] <= (10 + herd_timeout) * 1000
+        assert pttls["b"] is None
+        assert pttls["missing"] == 0
+        assert cache.ttl_many([]) == {}
+
+    def test_has_many(self, cache: RedisCache):
+        cache.set_many({"a": 1, "b": None, "c": 3})
+        keys = ["a", "b", "missing", "c"]
+
+        result = cache.has_many(keys)
+        assert list(result) == keys
+        assert result == {"a": True, "b": True, "missing": False, "c": True}
+        assert cache.count_existing(keys) == 3
+        assert cache.count_existing(["a", "a", "missing"]) == 2
+        assert cache.count_existing([]) == 0
+        assert cache.has_many([]) == {}
+
     def test_persist(self, cache: RedisCache):
         cache.set("foo", "bar", timeout=20)
         assert cache.persist("foo") is True
@@ -677,6 +907,102 @@ class TestDjangoRedisCache:
         expiration_time = datetime.datetime.now() + timedelta(hours=2)
         assert cache.expire_at("not-existent-key", expiration_time) is False
 
+    def test_expire_many(self, cache: RedisCache):
+        cache.set_many({"a": 1, "b": 2}, timeout=None)
+        keys = ["a", "b", "missing"]
+
+        result = cache.expire_many(keys, 100)
+        assert list(result) == keys
+        assert result == {"a": True, "b": True, "missing": False}
+        assert all(0 < ttl <= 100 for ttl in cache.ttl_many(["a", "b"]).values())
+
+        assert cache.pexpire_many(keys, timedelta(seconds=200)) == result
+        assert all(100 < ttl <= 200 for ttl in cache.ttl_many(["a", "b"]).values())
+
+        expiration_time = datetime.datetime.now() + timedelta(hours=1)
+        assert cache.expire_at_many(keys, expiration_time) == result
+        assert all(3000 < ttl <= 3600 for ttl in cache.ttl_many(["a", "b"]).values())
+
+        assert cache.persist_many(keys) == result
+        assert cache.ttl_many(keys) == {"a": None, "b": None, "missing": 0}
+        assert cache.persist_many(["a"]) == {"a": False}
+
+        # an expiry in the past deletes the keys
+        expiration_time = datetime.datetime.now() - timedelta(hours=1)
+        assert cache.expire_at_many(["a"], expiration_time) == {"a": True}
+        assert cache.get_many(["a", "b"]) == {"b": 2}
+
+    def test_pipeline(self, cache: RedisCache, mocker: MockerFixture):
+        cache.set("num", 1)
+        execute = mocker.spy(Pipeline, "execute")
+        with cache.pipeline() as p:
+            set_result = p.set("a", {"x": 1}, timeout=100)
+            value = p.get("a")
+            default = p.get("missing", "default")
+            incr = p.incr("num", 5)
+            missing = p.incr("missing")
+            sadd = p.sadd("set", "x", "y")
+            members = p.smembers("set")
+            zadd = p.zadd("zset", {"m": 1.0})
+            expire = p.expire("num", 100)
+            ttl = p.ttl("num")
+            assert not value.done()
+
+        # a single round trip per server
+        servers = 3 if isinstance(cache.client, ShardClient) else 1
+        assert 0 < execute.call_count <= servers
+        assert set_result.result() is True
+        assert value.result() == {"x": 1}
+        assert default.result() == "default"
+        assert incr.result() == 6
+        with pytest.raises(ValueError):
+            missing.result()
+        assert sadd.result() == 2
+        assert members.result() == {"x", "y"}
+        assert zadd.result() == 1
+        assert expire.result() is True
+        assert 0 < ttl.result() <= 100
+
+    def test_pipeline_transaction(self, cache: RedisCache, mocker: MockerFixture):
+        pipeline = mocker.spy(Redis, "pipeline")
+        with cache.pipeline(transaction=True) as p:
+            p.set("a", "value")
+            value = p.get("a")
+        assert pipeline.call_args.kwargs == {"transaction": True}
+        assert value.result() == "value"
+
+    def test_pipeline_transaction_dependent_commands(self, cache: RedisCache):
+        cache.set("text", "x")
+        with cache.pipeline(transaction=True) as p:
+            incr = p.incr("text")
+        # the value would be read and written again outside the transaction
+        with pytest.raises(NotImplementedError, match="transaction"):
+            incr.result()
+        assert cache.get("text") == "x"
+
+    def test_pipeline_errors(self, cache: RedisCache):
+        p = cache.pipeline()
+        value = p.get("a")
+        with pytest.raises(RuntimeError, match="not executed"):
+            value.result()
+        with pytest.raises(AttributeError, match="can't be used in a pipeline"):
+            p.incr_buffered("a")
+        with pytest.raises(NotImplementedError):
+            p.lock("a")
+        # failing before queuing a command
+        invalid = p.set("a", 1, timeout="soon")
+        assert invalid.done()
+        with pytest.raises((TypeError, ValueError)):
+            invalid.result()
+        if isinstance(cache.client, ShardClient):
+            with pytest.raises(NotImplementedError, match="single key"):
+                p.get_many(["a", "b"])
+
+        with pytest.raises(KeyError), cache.pipeline() as p:
+            p.set("a", 1)
+            raise KeyError
+        assert not cache.has_key("a")
+
     def test_lock(self, cache: RedisCache):
         lock = cache.lock("foobar")
         assert lock.acquire(blocking=True)
@@ -815,6 +1141,19 @@ class TestDjangoRedisCache:
         time.sleep(2)
         assert cache.get("test_key") == "foo"
 
+    def test_touch_many(self, cache: RedisCache):
+        cache.set_many({"a": 1, "b": 2}, timeout=10)
+        keys = ["a", "b", "missing"]
+
+        result = cache.touch_many(keys, 100)
+        assert list(result) == keys
+        assert result == {"a": True, "b": True, "missing": False}
+        assert all(ttl > 10 for ttl in cache.ttl_many(["a", "b"]).values())
+        assert cache.get_many(keys) == {"a": 1, "b": 2}
+
+        assert cache.touch_many(keys, None) == result
+        assert cache.ttl_many(["a", "b"]) == {"a": None, "b": None}
+
     def test_clear(self, cache: RedisCache):
         cache.set("foo", "bar")
         value_from_cache = cache.get("foo")
@@ -824,8 +1163,6 @@ class TestDjangoRedisCache:
         assert value_from_cache_after_clear is None
 
     def test_hset(self, cache: RedisCache):
-        if isinstance(cache.client, ShardClient):
-            pytest.skip("ShardClient doesn't support get_client")
         cache.hset("foo_hash1", "foo1", "bar1")
         cache.hset("foo_hash1", "foo2", "bar2")
         assert cache.hlen("foo_hash1") == 2
@@ -833,8 +1170,6 @@ class TestDjangoRedisCache:
         assert cache.hexists("foo_hash1", "foo2")
 
     def test_hdel(self, cache: RedisCache):
-        if isinstance(cache.client, ShardClient):
-            pytest.skip("ShardClient doesn't support get_client")
         cache.hset("foo_hash2", "foo1", "bar1")
         cache.hset("foo_hash2", "foo2", "bar2")
         assert cache.hlen("foo_hash2") == 2
@@ -845,8 +1180,6 @@ class TestDjangoRedisCache:
         assert cache.hexists("foo_hash2", "foo2")
 
     def test_hlen(self, cache: RedisCache):
-        if isinstance(cache.client, ShardClient):
-            pytest.skip("ShardClient doesn't support get_client")
         assert cache.hlen("foo_hash3") == 0
         cache.hset("foo_hash3", "foo1", "bar1")
         assert cache.hlen("foo_hash3") == 1
@@ -854,8 +1187,6 @@ class TestDjangoRedisCache:
         assert cache.hlen("foo_hash3") == 2
 
     def test_hkeys(self, cache: RedisCache):
-        if isinstance(cache.client, ShardClient):
-            pytest.skip("ShardClient doesn't support get_client")
         cache.hset("foo_hash4", "foo1", "bar1")
         cache.hset("foo_hash4", "foo2", "bar2")
         cache.hset("foo_hash4", "foo3", "bar3")
@@ -865,12 +1196,61 @@ class TestDjangoRedisCache:
             assert keys[i] == f"foo{i + 1}"
 
     def test_hexists(self, cache: RedisCache):
-        if isinstance(cache.client, ShardClient):
-            pytest.skip("ShardClient doesn't support get_client")
         cache.hset("foo_hash5", "foo1", "bar1")
         assert cache.hexists("foo_hash5", "foo1")
         assert not cache.hexists("foo_hash5", "foo")
 
+    def test_hset_mapping(self, cache: RedisCache):
+        assert cache.hset("foo_hash6", mapping={"foo1": "bar1", "foo2": 2}) == 2
+        assert cache.hset("foo_hash6", "foo3", [3], mapping={"foo1": 1.5}) == 1
+        assert cache.hset("foo_hash6", mapping={}) == 0
+        assert cache.hgetall("foo_hash6") == {"foo1": 1.5, "foo2": 2, "foo3": [3]}
+
+    def test_hset_version(self, cache: RedisCache):
+        # version and client keep their positions
+        assert cache.hset("foo_hash6", "foo1", "bar1", 2) == 1
+        assert cache.hget("foo_hash6", "foo1", version=2) == "bar1"
+        assert not cache.hexists("foo_hash6", "foo1")
+
+    def test_hget(self, cache: RedisCache):
+        cache.hset("foo_hash7", "foo1", {"bar": 1})
+        assert cache.hget("foo_hash7", "foo1") == {"bar": 1}
+        assert cache.hget("foo_hash7", "foo2") is None
+        assert cache.hget("foo_hash7", "foo2", default="baz") == "baz"
+
+    def test_hmget(self, cache: RedisCache):
+        cache.hset("foo_hash8", mapping={"foo1": "bar1", "foo2": "bar2"})
+        assert cache.hmget("foo_hash8", ["foo1", "foo2", "foo3"]) == {
+            "foo1": "bar1",
+            "foo2": "bar2",
+        }
+        assert cache.hmget("foo_hash8", []) == {}
+
+    def test_hgetall_missing(self, cache: RedisCache):
+        assert cache.hgetall("foo_hash9") == {}
+
+    def test_hincrby(self, cache: RedisCache):
+        assert cache.hincrby("foo_hash10", "counter") == 1
+        assert cache.hincrby("foo_hash10", "counter", 10) == 11
+        assert cache.hget("foo_hash10", "counter") == 11
+
+    def test_hscan_iter(self, cache: RedisCache):
+        fields = {f"foo{i}": i for i in range(100)}
+        cache.hset("foo_hash11", mapping=fields)
+        assert dict(cache.hscan_iter("foo_hash11", count=10)) == fields
+        assert dict(cache.hscan_iter("foo_hash11", match="foo1?")) == {
+            f"foo1{i}": 10 + i for i in range(10)
+        }
+
+    def test_hash_versions(self, cache: RedisCache):
+        cache.hset("foo_hash12", "foo1", "bar1", version=2)
+        assert cache.hlen("foo_hash12") == 0
+        assert cache.hget("foo_hash12", "foo1") is None
+        assert cache.hget("foo_hash12", "foo1", version=2) == "bar1"
+        assert cache.hkeys("foo_hash12", version=2) == ["foo1"]
+        assert cache.hexists("foo_hash12", "foo1", version=2)
+        assert cache.hdel("foo_hash12", "foo1", version=2) == 1
+
     def test_sadd(self, cache: RedisCache):
         assert cache.sadd("foo", "bar") == 1
         assert cache.smembers("foo") == {"bar"}
@@ -1029,3 +1409,129 @@ class TestDjangoRedisCache:
         cache.sadd("foo2", "bar2", "bar3")
         assert cache.sunionstore("foo3", "foo1", "foo2") == 3
         assert cache.smembers("foo3") == {"bar1", "bar2", "bar3"}
+
+    def test_set_stream(self, cache: RedisCache):
+        chunks = [f"line {i}\n".encode() * 100 for i in range(1000)]
+
+        assert cache.set_stream("stream", iter(chunks), chunk_size=4096)
+        stream = cache.get_stream("stream", chunk_size=1024)
+        assert stream is not None
+        assert b"".join(stream) == b"".join(chunks)
+
+    def test_set_stream_empty(self, cache: RedisCache):
+        assert cache.set_stream("stream", [])
+        stream = cache.get_stream("stream")
+        assert stream is not None
+        assert b"".join(stream) == b""
+
+    def test_get_stream_missing_key(self, cache: RedisCache):
+        assert cache.get_stream("stream") is None
+
+    def test_set_stream_replaces_value(self, cache: RedisCache):
+        cache.set_stream("stream", [b"first"])
+        cache.set_stream("stream", [b"second"])
+        assert b"".join(cache.get_stream("stream")) == b"second"
+        assert cache.keys("stream*") == ["stream"]
+
+    def test_set_stream_timeout(self, cache: RedisCache):
+        cache.set_stream("stream", [b"data"], timeout=10)
+        ttl = cache.ttl("stream")
+        assert ttl is not None
+        assert 0 < ttl <= 10
+
+        cache.set_stream("stream", [b"data"], timeout=None)
+        assert cache.ttl("stream") is None
+
+        assert cache.set_stream("stream", [b"data"], timeout=0) is True
+        assert cache.get_stream("stream") is None
+
+    def test_set_stream_failing_iterable(self, cache: RedisCache):
+        def chunks():
+            yield b"data" * 100_000
+            raise RuntimeError
+
+        cache.set_stream("stream", [b"data"])
+        with pytest.raises(RuntimeError):
+            cache.set_stream("stream", chunks(), chunk_size=1024)
+        assert b"".join(cache.get_stream("stream")) == b"data"
+        assert cache.keys("stream*") == ["stream"]
+
+    def test_get_stream_replaced(self, cache: RedisCache):
+        cache.set_stream("stream", [secrets.token_bytes(1000)])
+        stream = cache.get_stream("stream", chunk_size=16)
+        cache.set_stream("stream", [secrets.token_bytes(1000)])
+        with pytest.raises(ValueError, match="replaced"):
+            b"".join(stream)
+
+    def test_get_stream_ranges(self, cache: RedisCache, mocker: MockerFixture):
+        data = secrets.token_bytes(10_000)
+        cache.set_stream("stream", [data])
+        compressor = cache.client._compressor
+        decompress_stream = mocker.patch.object(
+            compressor,
+            "decompress_stream",
+            side_effect=list,
+        )
+        pieces = cache.get_stream("stream", chunk_size=1000)
+        # the compressed value is read chunk_size bytes at a time
+        assert pieces is not None
+        assert decompress_stream.call_count == 1
+        assert all(len(piece) <= 1000 for piece in pieces)
+        assert len(pieces) > 1
+        mocker.stopall()
+        assert compressor.decompress(b"".join(pieces)) == data
+
+    def test_tags(self, cache: RedisCache):
+        cache.set("a", 1, tags=["product:42"])
+        cache.set("b", 2, tags=["product:42", "product:43"])
+        cache.set_many({"c": 3, "d": 4}, tags=["product:43"])
+        cache.set("e", 5)
+
+        assert cache.invalidate_tags("product:42") == 2
+        assert cache.get_many(["a", "b", "c", "d", "e"]) == {"c": 3, "d": 4, "e": 5}
+        assert cache.invalidate_tags("product:43", "missing") == 2
+        assert cache.get_many(["a", "b", "c", "d", "e"]) == {"e": 5}
+        assert cache.invalidate_tags("product:43") == 0
+
+    def test_tags_not_set(self, cache: RedisCache):
+        cache.set("a", "old")
+        assert not cache.set("a", "new", nx=True, tags=["tag"])
+        assert not cache.set("b", "new", xx=True, tags=["tag"])
+
+        assert cache.invalidate_tags("tag") == 0
+        assert cache.get("a") == "old"
+
+    def test_invalidate_tags_batches(self, cache: RedisCache):
+        cache.set_many({f"key{i}": i for i in range(1200)}, tags=["tag"])
+        assert cache.invalidate_tags("tag") == 1200
+        assert cache.keys("*") == []
+
+    def test_tags_expiry(self, cache: RedisCache):
+        if isinstance(cache.client, herd.HerdClient):
+            pytest.skip("HerdClient extends the expiry of its values")
+        if isinstance(cache.client, ShardClient):
+            pytest.skip("Tags are stored on the server of each key")
+
+        client = cache.client.get_client(write=True)
+        tag_key = cache.client._tag_key("tag")
+
+        cache.set("a", 1, timeout=100, tags=["tag"])
+        assert 0 < client.ttl(tag_key) <= 100
+        cache.set("b", 1, timeout=200, tags=["tag"])
+        assert 100 < client.ttl(tag_key) <= 200
+        # a tag lives as long as its longest lived key
+        cache.set("c", 1, timeout=10, tags=["tag"])
+        assert 100 < client.ttl(tag_key) <= 200
+        cache.set("d", 1, timeout=None, tags=["tag"])
+        assert client.ttl(tag_key) == -1
+
+    def test_prune_tags(self, cache: RedisCache):
+        cache.set("a", 1, tags=["tag"])
+        cache.set("b", 2, tags=["tag", "other"])
+        cache.delete("a")
+
+        assert cache.prune_tags("tag") == 1
+        assert cache.prune_tags() == 0
+        cache.delete("b")
+        assert cache.prune_tags() == 2
+        assert cache.invalidate_tags("tag", "other") == 0
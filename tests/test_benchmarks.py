@@ -0,0 +1,73 @@
+import json
+from dataclasses import asdict
+from pathlib import Path
+
+import pytest
+
+from benchmarks import serialization
+
+
+def test_serialization_benchmark(tmp_path: Path):
+    output = tmp_path / "results.json"
+    argv = [
+        "--payload",
+        "small_dict",
+        "--compressor",
+        "identity",
+        "--compressor",
+        "zlib",
+        "--min-time",
+        "0.001",
+    ]
+
+    assert serialization.main([*argv, "--save", str(output)]) == 0
+
+    results = json.loads(output.read_text())
+    assert {(r["serializer"], r["compressor"]) for r in results} == {
+        (serializer, compressor)
+        for serializer in serialization.SERIALIZERS
+        for compressor in ("identity", "zlib")
+    }
+    assert all(r["encode_mb_s"] > 0 and r["decode_mb_s"] > 0 for r in results)
+
+
+def test_serialization_benchmark_unsupported_payload():
+    result = serialization.bench_codec("blob", b"data", "json", "identity", 0.001)
+    assert result.error is not None
+    assert result.error.startswith("unsupported")
+
+
+def test_serialization_benchmark_compare(tmp_path: Path):
+    baseline = tmp_path / "baseline.json"
+    result = serialization.bench_codec(
+        "small_dict",
+        {"a": 1},
+        "pickle",
+        "identity",
+        0.001,
+    )
+    row = {**asdict(result), "encode_mb_s": result.encode_mb_s * 100}
+    baseline.write_text(json.dumps([row]))
+
+    assert not serialization.compare([result], baseline, tolerance=0.2)
+    assert serialization.compare([result], baseline, tolerance=1)
+
+
+def test_serialization_benchmark_end_to_end():
+    # settings are already configured by the test suite
+    results = [
+        serialization.bench_codec("small_dict", {"a": 1}, "pickle", "zlib", 0.001),
+    ]
+    serialization.bench_end_to_end(
+        results,
+        {"small_dict": {"a": 1}},
+        "redis://127.0.0.1:6379",
+        0.001,
+    )
+    assert results[0].e2e_ops_s is not None
+    assert results[0].e2e_ops_s > 0
+
+
+def test_serialization_benchmark_invalid_payload():
+    with pytest.raises(SystemExit):
+        serialization.main(["--payload", "missing"])
@@ -1,14 +1,26 @@
 import copy
+import secrets
+import threading
+import time
 from collections.abc import Iterable
-from typing import cast
+from typing import Any, Optional, cast
 
 import pytest
 from django.core.cache import caches
+from django.core.exceptions import ImproperlyConfigured
+from django.utils.module_loading import import_string
 from pytest import LogCaptureFixture
+from pytest_mock import MockerFixture
+from redis import Redis
+from redis.client import Pipeline
 from redis.exceptions import ConnectionError as RedisConnectionError
 
 from django_redis.cache import RedisCache
-from django_redis.client import ShardClient
+from django_redis.client import DefaultClient, ShardClient, default, herd
+from django_redis.compressors.base import BaseCompressor
+from django_redis.exceptions import CompressorError, ConnectionInterrupted
+from django_redis.serializers.pickle import PickleSerializer
+from django_redis.util import HashedKey, Immutable
 
 
 def make_key(key: str, prefix: str, version: str) -> str:
@@ -55,6 +67,29 @@ def test_get_django_omit_exceptions(
     )
 
 
+def test_hash_omit_exceptions(ignore_exceptions_cache: RedisCache):
+    assert ignore_exceptions_cache.hset("hash", "field", 1) is None
+    assert ignore_exceptions_cache.hget("hash", "field") is None
+    assert ignore_exceptions_cache.hgetall("hash") is None
+    assert ignore_exceptions_cache.hexists("hash", "field") is None
+
+
+def test_get_or_set_omit_exceptions(cache: RedisCache, mocker: MockerFixture):
+    mocker.patch.object(cache, "_ignore_exceptions", True)
+    mocker.patch.object(
+        cache.client,
+        "set",
+        side_effect=ConnectionInterrupted(connection=None),
+    )
+    compute = mocker.Mock(return_value="value")
+
+    # the default computed before the error is reused
+    assert cache.get_or_set("a", compute) == "value"
+    assert compute.call_count == 1
+    assert cache.get_or_refresh("b", compute, ttl=60) == "value"
+    assert compute.call_count == 2
+
+
 def test_get_django_omit_exceptions_priority_1(settings):
     caches_setting = copy.deepcopy(settings.CACHES)
     caches_setting["doesnotexist"]["OPTIONS"]["IGNORE_EXCEPTIONS"] = True
@@ -144,3 +179,1064 @@ def test_custom_key_function(cache: RedisCache, settings):
     assert {k.decode() for k in cache.client.get_client(write=False).keys("*")} == (
         {"#1#foo-bc", "#1#foo-bb"}
     )
+
+
+def cache_with_options(settings, **options) -> RedisCache:
+    caches_setting = copy.deepcopy(settings.CACHES)
+    caches_setting["default"]["OPTIONS"].update(options)
+    settings.CACHES = caches_setting
+    return cast("RedisCache", caches["default"])
+
+
+def test_pickle_out_of_band_buffers(cache: RedisCache, settings):
+    if not isinstance(cache.client._serializer, PickleSerializer):
+        pytest.skip("Out-of-band buffers are only supported by PickleSerializer")
+
+    cache = cache_with_options(
+        settings,
+        PICKLE_VERSION=5,
+        PICKLE_OUT_OF_BAND_THRESHOLD=1024,
+    )
+    value = {"blob": b"x" * 100_000, "buffer": bytearray(b"y" * 2048), "id": 1}
+    cache.set("blob", value)
+    cache.set_many({"blob1": value, "blob2": [value]})
+
+    assert cache.get("blob") == value
+    assert cache.get_many(["blob1", "blob2"]) == {"blob1": value, "blob2": [value]}
+
+
+def _raw_client(cache: RedisCache, key: str, version: Optional[int] = None) -> Redis:
+    client = cache.client
+    if isinstance(client, ShardClient):
+        return client.get_server(client.make_key(key, version=version))
+    return client.get_client(write=False)
+
+
+def _chunk_keys(
+    cache: RedisCache,
+    key: str,
+    version: Optional[int] = None,
+) -> set[bytes]:
+    chunks = f"{cache.client.make_key(key, version=version)}:chunks"
+    return set(_raw_client(cache, key, version).hkeys(chunks))
+
+
+def test_chunked_values(cache: RedisCache, settings):
+    cache = cache_with_options(settings, CHUNK_SIZE=1024)
+    value = secrets.token_hex(25_000)
+
+    assert cache.set("big", value, timeout=60)
+    assert cache.get("big") == value
+    assert len(_chunk_keys(cache, "big")) > 1
+
+    cache.set_many({"big1": value, "small": "y"}, timeout=60)
+    assert cache.get_many(["big", "big1", "small", "missing"]) == {
+        "big": value,
+        "big1": value,
+        "small": "y",
+    }
+
+
+def test_chunked_values_bounded_replies(
+    cache: RedisCache,
+    settings,
+    mocker: MockerFixture,
+):
+    cache = cache_with_options(settings, CHUNK_SIZE=1024)
+    value = secrets.token_hex(100_000)
+    cache.set("big", value)
+
+    replies: list[list[Any]] = []
+    execute = Pipeline.execute
+
+    def record_execute(self, *args, **kwargs):
+        results = execute(self, *args, **kwargs)
+        replies.append(results)
+        return results
+
+    mocker.patch.object(Pipeline, "execute", record_execute)
+    assert cache.get("big") == value
+    assert cache.get_many(["big"]) == {"big": value}
+
+    chunk_replies = [
+        [reply for reply in results if isinstance(reply, bytes)] for results in replies
+    ]
+    assert max(len(reply) for results in chunk_replies for reply in results) <= 1024
+    assert max(sum(map(len, results)) for results in chunk_replies) <= (
+        1024 * default._CHUNK_BATCH_SIZE
+    )
+
+
+def test_chunked_values_overwrite_removes_old_chunks(cache: RedisCache, settings):
+    cache = cache_with_options(settings, CHUNK_SIZE=1024)
+    big_value = secrets.token_hex(25_000)
+    other_value = secrets.token_hex(25_000)
+
+    cache.set("big", big_value)
+    old_chunks = _chunk_keys(cache, "big")
+    cache.set("big", other_value)
+    new_chunks = _chunk_keys(cache, "big")
+    assert len(new_chunks) == len(old_chunks)
+    assert not old_chunks & new_chunks
+    assert cache.get("big") == other_value
+
+    cache.set("big", "small")
+    assert _chunk_keys(cache, "big") == set()
+    assert cache.get("big") == "small"
+
+
+def test_chunked_values_nx(cache: RedisCache, settings):
+    cache = cache_with_options(settings, CHUNK_SIZE=1024)
+    big_value = secrets.token_hex(25_000)
+
+    assert cache.add("big", big_value)
+    chunks = _chunk_keys(cache, "big")
+    assert not cache.add("big", secrets.token_hex(25_000))
+    assert cache.get("big") == big_value
+    assert _chunk_keys(cache, "big") == chunks
+
+
+def test_chunked_values_delete(cache: RedisCache, settings):
+    cache = cache_with_options(settings, CHUNK_SIZE=1024)
+    big_value = secrets.token_hex(25_000)
+
+    cache.set("big", big_value)
+    cache.set("big1", big_value)
+    assert cache.delete("big")
+    assert cache.get("big") is None
+    assert _chunk_keys(cache, "big") == set()
+
+    assert cache.delete_many(["big1", "missing"])
+    assert cache.keys("*") == []
+
+
+def test_chunked_values_expiry(cache: RedisCache, settings):
+    cache = cache_with_options(settings, CHUNK_SIZE=1024)
+    if isinstance(cache.client, herd.HerdClient):
+        pytest.skip("HerdClient extends the expiry of its values")
+    raw = _raw_client(cache, "big")
+    chunks = f"{cache.client.make_key('big')}:chunks"
+
+    cache.set("big", secrets.token_hex(25_000), timeout=None)
+    assert cache.expire("big", 100)
+    assert 0 < raw.ttl(chunks) <= 100
+
+    assert cache.persist("big")
+    assert raw.ttl(chunks) == -1
+
+    assert cache.touch("big", 10)
+    assert 0 < raw.ttl(chunks) <= 10
+
+
+def test_chunked_values_pending_chunks_expire(cache: RedisCache, settings):
+    cache = cache_with_options(settings, CHUNK_SIZE=1024)
+    raw = _raw_client(cache, "big")
+    nkey = cache.client.make_key("big")
+
+    # chunks written by a client that fails before swapping the manifest in
+    pipeline = raw.pipeline()
+    _, tmp_key = cache.client._write_chunks(pipeline, nkey, b"x" * 5000)
+    pipeline.execute()
+    assert 0 < raw.pttl(tmp_key) <= 60 * 60 * 1000
+
+    assert cache.set("big", "x" * 5000)
+    assert cache.get("big") == "x" * 5000
+    assert raw.exists(tmp_key)
+
+
+_COMPRESSORS = [
+    "django_redis.compressors.gzip.GzipCompressor",
+    "django_redis.compressors.lz4.Lz4Compressor",
+    "django_redis.compressors.lzma.LzmaCompressor",
+    "django_redis.compressors.zlib.ZlibCompressor",
+    "django_redis.compressors.zstd.ZStdCompressor",
+]
+
+
+def test_compressor_fallbacks(cache: RedisCache, settings):
+    value = {"text": "compressible " * 100}
+    # parametrizing would split the tests of one cache across xdist workers
+    for compressor in [
+        "django_redis.compressors.identity.IdentityCompressor",
+        "django_redis.compressors.zstd.ZStdCompressor",
+    ]:
+        for previous_compressor in _COMPRESSORS:
+            old_cache = cache_with_options(settings, COMPRESSOR=previous_compressor)
+            old_cache.set_many({"key": value, "small": "x"})
+
+            new_cache = cache_with_options(
+                settings,
+                COMPRESSOR=compressor,
+                COMPRESSOR_FALLBACKS=_COMPRESSORS,
+            )
+            assert new_cache.get_many(["key", "small"]) == {
+                "key": value,
+                "small": "x",
+            }
+
+            # new values are written with the primary compressor only
+            client = new_cache.client
+            assert client.encode(value) == client._compressor.compress(
+                client._serializer.dumps(value),
+            )
+            new_cache.set("key", value)
+            assert new_cache.get("key") == value
+
+
+def test_compressor_streams_truncated():
+    for path in _COMPRESSORS:
+        compressor = import_string(path)({})
+        data = b"".join(compressor.compress_stream([b"stream " * 1000]))
+        assert b"".join(compressor.decompress_stream([data])) == b"stream " * 1000
+        with pytest.raises(CompressorError, match="truncated"):
+            b"".join(compressor.decompress_stream([data[:-4]]))
+
+
+def test_compressor_streams_fallback():
+    class ReverseCompressor(BaseCompressor):
+        def compress(self, value: bytes) -> bytes:
+            return value[::-1]
+
+        def decompress(self, value: bytes) -> bytes:
+            return value[::-1]
+
+    compressor = ReverseCompressor({})
+    data = list(compressor.compress_stream([b"abc", b"def"]))
+    assert data == [b"fedcba"]
+    assert b"".join(compressor.decompress_stream([b"fed", b"cba"])) == b"abcdef"
+
+
+def test_native_floats(cache: RedisCache, settings):
+    def raw(cache: RedisCache) -> Optional[bytes]:
+        return _raw_client(cache, "num").get(cache.client.make_key("num"))
+
+    def serialized(value: float) -> bytes:
+        client = cache.client
+        return client._compressor.compress(client._serializer.dumps(value))
+
+    # serialized by default, so that earlier versions can read them
+    cache.set("num", 1.5, timeout=100)
+    assert raw(cache) == serialized(1.5)
+    assert cache.incr_float("num", 0.5) == 2.0
+    assert raw(cache) == serialized(2.0)
+    assert cache.get("num") == 2.0
+    herd_timeout = 2 if isinstance(cache.client, herd.HerdClient) else 0
+    assert 90 < cache.ttl("num") <= 100 + herd_timeout
+    assert cache.incr_float("other", 0.5, ignore_key_check=True) == 0.5
+
+    cache = cache_with_options(settings, NATIVE_FLOATS=True)
+    cache.set("num", 1.5)
+    assert raw(cache) == b"1.5"
+    assert cache.incr_float("num", 0.5) == 2.0
+    assert raw(cache) == b"2.0"
+    # values serialized before NATIVE_FLOATS was enabled
+    assert cache.incr_float("other", 0.5) == 1.0
+
+
+def test_encode_cache(cache: RedisCache, settings, mocker: MockerFixture):
+    cache = cache_with_options(settings, ENCODE_CACHE_SIZE=2)
+    dumps = mocker.spy(cache.client._serializer, "dumps")
+    config = {"feature": True, "items": list(range(100))}
+    fragment = "<p>fragment</p>" * 100
+
+    cache.set("config1", Immutable(config))
+    cache.set_many({"config2": Immutable(config), "fragment1": fragment})
+    cache.set("fragment2", "<p>fragment</p>" * 100)
+    cache.set("small1", "small")
+    cache.set("small2", "small")
+
+    assert cache.get_many(["config1", "config2", "fragment1", "fragment2"]) == {
+        "config1": config,
+        "config2": config,
+        "fragment1": fragment,
+        "fragment2": fragment,
+    }
+    if isinstance(cache.client, herd.HerdClient):
+        # herd values embed their expiry time and are always encoded
+        return
+    # config and fragment once each, small strings aren't memoized
+    assert dumps.call_count == 4
+
+    # the least recently used entry is evicted
+    cache.set("other", "<p>other</p>" * 100)
+    cache.set("config3", Immutable(config))
+    assert dumps.call_count == 6
+
+
+def test_hash_bucketing(cache: RedisCache, settings):
+    cache = cache_with_options(settings, HASH_BUCKETING=4)
+
+    assert cache.set("a", "value")
+    assert cache.add("b", 1)
+    assert not cache.add("b", 2)
+    cache.set_many({"c": [1, 2], "d": 1.5})
+    assert cache.get("a") == "value"
+    assert cache.get("missing") is None
+    assert cache.get_many(["a", "b", "c", "d", "missing"]) == {
+        "a": "value",
+        "b": 1,
+        "c": [1, 2],
+        "d": 1.5,
+    }
+    assert cache.has_key("c")
+    assert not cache.has_key("missing")
+
+    if not isinstance(cache.client, ShardClient):
+        raw_keys = cache.client.get_client(write=False).keys("*")
+        assert 0 < len(raw_keys) <= 4
+        assert all(b"django-redis:bucket:" in key for key in raw_keys)
+
+    assert cache.delete("a")
+    assert not cache.delete("a")
+    assert cache.delete_many(["b", "c", "missing"]) == 2
+    assert cache.get_many(["a", "b", "c", "d"]) == {"d": 1.5}
+
+    # bucketed keys can't be listed, the buckets aren't listed by other caches
+    with pytest.raises(NotImplementedError):
+        cache.keys("*")
+    with pytest.raises(NotImplementedError):
+        cache.iter_keys("*")
+    with pytest.raises(NotImplementedError):
+        cache.delete_pattern("*")
+    params = copy.deepcopy(settings.CACHES["default"])
+    del params["OPTIONS"]["HASH_BUCKETING"]
+    assert RedisCache(params["LOCATION"], params).keys("*") == []
+
+
+def test_hash_bucketing_expiry(cache: RedisCache, settings):
+    cache = cache_with_options(settings, HASH_BUCKETING=1)
+    if isinstance(cache.client, herd.HerdClient):
+        pytest.skip("HerdClient extends the expiry of its values")
+
+    cache.set("a", "value", timeout=100)
+    assert 0 < cache.ttl("a") <= 100
+    assert 0 < cache.pttl("a") <= 100_000
+    assert cache.ttl("missing") == 0
+
+    assert cache.persist("a")
+    assert cache.ttl("a") is None
+    assert cache.expire("a", 200)
+    assert 100 < cache.ttl("a") <= 200
+    assert cache.touch("a", 300)
+    assert 200 < cache.ttl("a") <= 300
+    assert not cache.touch("missing", 300)
+
+    # without field expiry, the bucket keeps its longest expiry
+    cache.set("b", "value", timeout=10)
+    assert 0 < cache.ttl("b") <= 300
+
+    cache.set("a", "value", timeout=0)
+    assert not cache.has_key("a")
+    assert cache.get("b") == "value"
+
+
+# Emulates the field expiry commands of Redis 7.4 in Lua scripts, storing the
+# expiry time of the fields of a bucket in "<bucket>:expiry" without expiring
+# them, so that the field expiry paths are run by older servers.
+_FIELD_EXPIRY_LUA = """
+local real = redis
+local function now()
+    local time = real.call('TIME')
+    return time[1] * 1000 + math.floor(time[2] / 1000)
+end
+local redis = setmetatable({}, {__index = real})
+redis.pcall = function(command, bucket, ...)
+    local args = {...}
+    if command == 'HPEXPIRE' then
+        real.call('HSET', bucket .. ':expiry', args[4], now() + tonumber(args[1]))
+        return {1}
+    elseif command == 'HPERSIST' then
+        real.call('HDEL', bucket .. ':expiry', args[3])
+        return {1}
+    elseif command == 'HPTTL' then
+        if real.call('HEXISTS', bucket, args[3]) == 0 then return {-2} end
+        local at = real.call('HGET', bucket .. ':expiry', args[3])
+        if not at then return {-1} end
+        return {tonumber(at) - now()}
+    end
+    return real.pcall(command, bucket, ...)
+end
+"""
+
+
+@pytest.fixture
+def field_expiry(mocker: MockerFixture) -> None:
+    evaluate = Redis.eval
+    register_script = Redis.register_script
+
+    def eval_with_field_expiry(self, script, numkeys, *keys_and_args):
+        return evaluate(self, _FIELD_EXPIRY_LUA + script, numkeys, *keys_and_args)
+
+    def register_script_with_field_expiry(self, script):
+        return register_script(self, _FIELD_EXPIRY_LUA + script)
+
+    mocker.patch.object(Redis, "eval", eval_with_field_expiry)
+    mocker.patch.object(Redis, "register_script", register_script_with_field_expiry)
+
+
+@pytest.mark.usefixtures("field_expiry")
+def test_hash_bucketing_field_expiry(cache: RedisCache, settings):
+    cache = cache_with_options(settings, HASH_BUCKETING=1)
+    if isinstance(cache.client, herd.HerdClient):
+        pytest.skip("HerdClient extends the expiry of its values")
+
+    cache.set("a", "value", timeout=100)
+    cache.set("b", "value", timeout=10)
+    # each field keeps its own expiry, the bucket doesn't expire
+    assert 90 < cache.ttl("a") <= 100
+    assert 0 < cache.ttl("b") <= 10
+    assert 0 < cache.pttl("b") <= 10_000
+    if not isinstance(cache.client, ShardClient):
+        bucket = cache.client._bucket(cache.make_key("a"))[0]
+        assert cache.client.get_client(write=False).pttl(bucket) == -1
+
+    assert cache.persist("a")
+    assert cache.ttl("a") is None
+    assert cache.ttl("b") <= 10
+    assert cache.expire("b", 200)
+    assert 190 < cache.ttl("b") <= 200
+    assert cache.touch("a", 300)
+    assert 290 < cache.ttl("a") <= 300
+
+    cache.set("num", 1.5, timeout=50)
+    assert cache.incr_float("num", 0.5) == 2.0
+    assert 40 < cache.ttl("num") <= 50
+    assert cache.incr_version("num") == 2
+    assert 40 < cache.ttl("num", version=2) <= 50
+
+
+def test_hash_bucketing_incr(cache: RedisCache, settings):
+    cache = cache_with_options(settings, HASH_BUCKETING=4)
+    cache.set("num", 1)
+    assert cache.incr("num", 10) == 11
+    assert cache.decr("num") == 10
+    assert cache.incr_float("num", 0.5) == 10.5
+    assert cache.get("num") == 10.5
+    with pytest.raises(ValueError):
+        cache.incr("missing")
+
+    with pytest.raises(NotImplementedError):
+        cache.keys("*")
+
+
+def test_hash_bucketing_with_chunks():
+    cache = RedisCache(
+        "redis://127.0.0.1:6379",
+        {"OPTIONS": {"HASH_BUCKETING": 4, "CHUNK_SIZE": 1024}},
+    )
+    with pytest.raises(ImproperlyConfigured, match="can't be used with CHUNK_SIZE"):
+        cache.client  # noqa: B018
+
+
+def test_max_key_length(cache: RedisCache, settings):
+    cache = cache_with_options(settings, MAX_KEY_LENGTH=64)
+    long_key = "https://example.com/" + "path/" * 60
+    other_long_key = long_key + "other"
+
+    cache.set(long_key, 1)
+    cache.set(other_long_key, 2)
+    cache.set("short", 3)
+    assert cache.get(long_key) == 1
+    assert cache.get_many([long_key, other_long_key]) == {
+        long_key: 1,
+        other_long_key: 2,
+    }
+
+    nkey = cache.client.make_key(long_key)
+    assert len(cache.client.reverse_key(nkey)) == 64
+    assert nkey.startswith(cache.client.make_key("https://example.com/path/"))
+
+    keys = cache.keys("*")
+    assert sorted(keys) == sorted(
+        [
+            cache.client.reverse_key(cache.client.make_key(long_key)),
+            cache.client.reverse_key(cache.client.make_key(other_long_key)),
+            "short",
+        ],
+    )
+    hashed = [key for key in keys if isinstance(key, HashedKey)]
+    assert len(hashed) == 2
+    # hashed keys can still be used to access their values
+    assert {cache.get(key) for key in hashed} == {1, 2}
+
+
+def test_max_key_length_too_short():
+    cache = RedisCache("redis://127.0.0.1:6379", {"OPTIONS": {"MAX_KEY_LENGTH": 10}})
+    with pytest.raises(ImproperlyConfigured, match="MAX_KEY_LENGTH must be at least"):
+        cache.client  # noqa: B018
+
+
+def test_chunk_size_tags(cache: RedisCache, settings):
+    cache = cache_with_options(settings, CHUNK_SIZE=1024)
+
+    cache.set("a", "x" * 5000, tags=["tag"])
+    cache.set("b", 1, tags=["tag"])
+    cache.set("c", 2)
+    cache.delete("b")
+    assert cache.prune_tags() == 1
+
+    cache.set("b", 1, tags=["tag"])
+    assert cache.invalidate_tags("tag") == 2
+    assert cache.keys("*") == ["c"]
+
+
+def test_hash_bucketing_tags(cache: RedisCache, settings):
+    cache = cache_with_options(settings, HASH_BUCKETING=4)
+
+    cache.set("a", 1, tags=["tag"])
+    cache.set("b", 2, tags=["tag"])
+    cache.set("c", 3)
+    cache.delete("b")
+    assert cache.prune_tags() == 1
+
+    cache.set("b", 2, tags=["tag"])
+    assert cache.invalidate_tags("tag") == 2
+    assert cache.get_many(["a", "b", "c"]) == {"c": 3}
+
+
+def test_namespace_generations(cache: RedisCache, settings):
+    cache = cache_with_options(settings, NAMESPACE_SEPARATOR=":")
+
+    cache.set("tenant1:a", 1)
+    cache.set_many({"tenant1:b": 2, "tenant2:a": 3, "plain": 4})
+    assert sorted(cache.keys("tenant1:*")) == ["tenant1:a", "tenant1:b"]
+
+    generation = cache.client._get_generation("tenant1")
+    assert cache.invalidate_namespace("tenant1") == generation + 1
+    assert cache.get_many(["tenant1:a", "tenant1:b", "tenant2:a", "plain"]) == {
+        "tenant2:a": 3,
+        "plain": 4,
+    }
+    assert cache.keys("tenant1:*") == []
+
+    cache.set("tenant1:a", 5)
+    assert cache.get("tenant1:a") == 5
+    assert cache.keys("tenant1:*") == ["tenant1:a"]
+    assert cache.keys("pl*") == ["plain"]
+    assert cache.delete_many(["tenant1:a", "tenant2:a"]) == 2
+
+
+def test_namespace_generations_iterators(cache: RedisCache, settings):
+    cache = cache_with_options(settings, NAMESPACE_SEPARATOR=":")
+    cache.set_many({"tenant:a": 1, "tenant:b": 2}, timeout=100)
+
+    assert cache.get_many(key for key in ["tenant:a", "tenant:b"]) == {
+        "tenant:a": 1,
+        "tenant:b": 2,
+    }
+    ttls = cache.ttl_many(key for key in ["tenant:a", "tenant:b"])
+    assert list(ttls) == ["tenant:a", "tenant:b"]
+    assert cache.touch_many(key for key in ["tenant:a", "tenant:b"]) == {
+        "tenant:a": True,
+        "tenant:b": True,
+    }
+    assert cache.delete_many(key for key in ["tenant:a", "tenant:b"]) == 2
+
+
+def test_namespace_generations_seeded(cache: RedisCache, settings):
+    cache = cache_with_options(settings, NAMESPACE_SEPARATOR=":")
+
+    cache.set("tenant:a", 1)
+    cache.invalidate_namespace("tenant")
+    cache.set("tenant:a", 2)
+    # an evicted generation doesn't start over, reaching the keys of old ones
+    client = cache.client
+    key = client._generation_key("tenant")
+    if isinstance(client, ShardClient):
+        client.get_server(key).delete(key)
+    else:
+        client.get_client(write=True).delete(key)
+    client._generations.clear()
+    assert cache.get("tenant:a") is None
+
+
+def test_reserved_keys(cache: RedisCache, settings):
+    cache = cache_with_options(settings, NAMESPACE_SEPARATOR=":")
+
+    cache.set("a", 1, tags=["tag"])
+    cache.set("tenant:b", 2)
+    cache.get_or_set("c", lambda: 3, stale_timeout=60)
+    # tag sets, generations and stale copies are left out
+    assert sorted(cache.keys("*")) == ["a", "c", "tenant:b"]
+    if not isinstance(cache.client, ShardClient):
+        assert sorted(cache.iter_keys("*")) == ["a", "c", "tenant:b"]
+
+    assert cache.delete_pattern("*") == 3
+    assert cache.keys("*") == []
+    generation = cache.client._generation_key("tenant")
+    if isinstance(cache.client, ShardClient):
+        assert cache.client.get_server(generation).exists(generation)
+    else:
+        assert cache.client.get_client(write=False).exists(generation)
+    cache.set("tenant:b", 2)
+    assert cache.get("tenant:b") == 2
+
+
+def test_namespace_generations_cached(cache: RedisCache, settings, mocker):
+    cache = cache_with_options(
+        settings,
+        NAMESPACE_SEPARATOR=":",
+        NAMESPACE_GENERATION_TIMEOUT=60,
+    )
+    other = cast("RedisCache", caches.create_connection("default"))
+
+    cache.set("tenant:a", 1)
+    assert other.get("tenant:a") == 1
+    cache.invalidate_namespace("tenant")
+    assert cache.get("tenant:a") is None
+    # other clients keep using the generation they know until it times out
+    assert other.get("tenant:a") == 1
+    other.client._generations.clear()
+    assert other.get("tenant:a") is None
+
+    read_generations = mocker.spy(other.client, "_read_generations")
+    other.get_many(["a:key", "b:key", "c:key", "plain"])
+    assert read_generations.call_count == 1
+    other.get_many(["a:key", "b:key"])
+    assert read_generations.call_count == 1
+
+
+def test_invalidate_namespace_without_separator(cache: RedisCache):
+    with pytest.raises(ImproperlyConfigured, match="NAMESPACE_SEPARATOR"):
+        cache.invalidate_namespace("tenant")
+
+
+def test_clear_modes(cache: RedisCache, settings):
+    caches_setting = copy.deepcopy(settings.CACHES)
+    caches_setting["default"]["KEY_PREFIX"] = "cache"
+    settings.CACHES = caches_setting
+    for mode in ("flushdb", "flushdb_async", "prefix"):
+        cache = cache_with_options(settings, CLEAR_MODE=mode)
+        cache.set_many({f"key{i}": i for i in range(2500)})
+        cache.set("other", 1, version=2)
+        cache.clear()
+        assert cache.keys("*") == []
+        assert cache.get("other", version=2) is None
+
+
+def test_clear_prefix_keeps_other_keys(cache: RedisCache, settings):
+    caches_setting = copy.deepcopy(settings.CACHES)
+    caches_setting["default"]["KEY_PREFIX"] = "cache"
+    caches_setting["default"]["OPTIONS"]["CLEAR_MODE"] = "prefix"
+    caches_setting["other"] = {**caches_setting["default"], "KEY_PREFIX": "other"}
+    settings.CACHES = caches_setting
+    cache = cast("RedisCache", caches["default"])
+    other = cast("RedisCache", caches["other"])
+
+    cache.set("key", 1)
+    other.set("key", 2)
+    cache.clear()
+    assert cache.get("key") is None
+    assert other.get("key") == 2
+    other.clear()
+    assert other.get("key") is None
+
+
+def test_clear_prefix_requires_prefix():
+    options = {"CLEAR_MODE": "prefix"}
+    for params in (
+        {"KEY_PREFIX": ""},
+        {"KEY_PREFIX": "cache", "KEY_FUNCTION": "tests.test_cache_options.make_key"},
+    ):
+        cache = RedisCache("redis://127.0.0.1:6379", {"OPTIONS": options, **params})
+        with pytest.raises(ImproperlyConfigured, match="requires KEY_PREFIX"):
+            cache.client  # noqa: B018
+
+
+def test_clear_mode_invalid():
+    cache = RedisCache("redis://127.0.0.1:6379", {"OPTIONS": {"CLEAR_MODE": "all"}})
+    with pytest.raises(ImproperlyConfigured, match="CLEAR_MODE must be one of"):
+        cache.client  # noqa: B018
+
+
+def test_chunk_size_incr_version(cache: RedisCache, settings):
+    cache = cache_with_options(settings, CHUNK_SIZE=1024)
+
+    value = secrets.token_hex(2500)
+    cache.set("a", value, timeout=100)
+    cache.set("a", secrets.token_hex(2500), version=2)
+    assert cache.incr_version_many(["a", "missing"]) == {"a": 2}
+    assert cache.get("a") is None
+    assert cache.get("a", version=2) == value
+    if not isinstance(cache.client, herd.HerdClient):
+        assert 0 < cache.ttl("a", version=2) <= 100
+    # the chunks of the replaced value are removed
+    assert sorted(cache.keys("*", version=2)) == ["a", "a:chunks"]
+    tokens = {field.split(b":")[0] for field in _chunk_keys(cache, "a", version=2)}
+    assert len(tokens) == 1
+
+
+def test_hash_bucketing_incr_version(cache: RedisCache, settings):
+    cache = cache_with_options(settings, HASH_BUCKETING=4)
+
+    cache.set_many({"a": 1, "b": 2}, timeout=100)
+    assert cache.incr_version("a") == 2
+    assert cache.incr_version_many(["b", "missing"], delta=3) == {"b": 4}
+    assert cache.get_many(["a", "b"]) == {}
+    assert cache.get("a", version=2) == 1
+    assert cache.get("b", version=4) == 2
+    if not isinstance(cache.client, herd.HerdClient):
+        assert 0 < cache.ttl("b", version=4) <= 100
+
+
+def test_chunk_size_touch_many(cache: RedisCache, settings):
+    cache = cache_with_options(settings, CHUNK_SIZE=1024)
+    if isinstance(cache.client, herd.HerdClient):
+        pytest.skip("HerdClient extends the expiry of its values")
+
+    cache.set("a", "x" * 5000, timeout=None)
+    assert cache.touch_many(["a", "missing"], 100) == {"a": True, "missing": False}
+    # the chunks expire along with the manifest
+    client = cache.client
+    if isinstance(client, ShardClient):
+        raw = client.get_server(client.make_key("a"))
+    else:
+        raw = client.get_client(write=False)
+    keys = raw.keys(f"{client.make_key('a')}*")
+    assert all(0 < raw.ttl(key) <= 100 for key in keys)
+    assert cache.persist_many(["a"]) == {"a": True}
+    assert all(raw.ttl(key) == -1 for key in keys)
+
+
+def test_hash_bucketing_expire_many(cache: RedisCache, settings):
+    cache = cache_with_options(settings, HASH_BUCKETING=1)
+    if isinstance(cache.client, herd.HerdClient):
+        pytest.skip("HerdClient extends the expiry of its values")
+
+    cache.set("a", 1)
+    assert cache.expire_many(["a", "missing"], 100) == {"a": True, "missing": False}
+    assert 0 < cache.ttl("a") <= 100
+    assert cache.persist_many(["a"]) == {"a": True}
+    assert cache.ttl("a") is None
+    assert cache.pexpire_many(["a"], 0) == {"a": True}
+    assert not cache.has_key("a")
+
+
+def test_hash_bucketing_has_many(cache: RedisCache, settings):
+    cache = cache_with_options(settings, HASH_BUCKETING=4)
+
+    cache.set_many({"a": 1, "b": 2})
+    assert cache.has_key("a")
+    assert cache.has_many(["a", "missing", "b"]) == {
+        "a": True,
+        "missing": False,
+        "b": True,
+    }
+    assert cache.count_existing(["a", "a", "b", "missing"]) == 3
+
+
+def test_hash_bucketing_incr_many(cache: RedisCache, settings):
+    cache = cache_with_options(settings, HASH_BUCKETING=4)
+    cache.set_many({"a": 1, "b": 2})
+    assert cache.incr_many({"a": 1, "b": 2}) == {"a": 2, "b": 4}
+    with pytest.raises(ValueError, match="missing"):
+        cache.incr_many({"missing": 1})
+    assert cache.incr_many({"missing": 1}, ignore_key_check=True) == {"missing": 1}
+
+
+def test_counter_flush_size(cache: RedisCache, settings):
+    cache = cache_with_options(settings, COUNTER_FLUSH_SIZE=3)
+    flushes = cache.counter_stats()["flushes"]
+    for _ in range(3):
+        cache.incr_buffered("a")
+    # written by the background thread
+    for _ in range(100):
+        if cache.counter_stats()["flushes"] > flushes:
+            break
+        time.sleep(0.01)
+    assert cache.get("a") == 3
+    assert cache.counter_stats()["flush_latency"] > 0
+
+
+def test_counter_flush_failure(cache: RedisCache, settings, mocker: MockerFixture):
+    cache = cache_with_options(settings, COUNTER_FLUSH_INTERVAL=60000)
+    dropped = cache.counter_stats()["dropped"]
+    cache.incr_buffered("a", 2)
+    cache.incr_buffered("b")
+    mocker.patch.object(
+        DefaultClient,
+        "_incr_many",
+        side_effect=ConnectionInterrupted(connection=None),
+    )
+    cache.flush_counters()
+    # kept for the next flush
+    assert cache.counter_stats()["pending"] == 2
+
+    cache.client._counter_buffer()._flush_at_exit()
+    assert cache.counter_stats()["dropped"] == dropped + 2
+
+    mocker.stopall()
+    cache.flush_counters()
+    assert cache.get_many(["a", "b"]) == {"a": 2, "b": 1}
+
+
+def test_counter_buffer_shared(cache: RedisCache, settings):
+    cache = cache_with_options(settings, COUNTER_FLUSH_INTERVAL=30000)
+    # like the caches of two threads
+    other = cache_with_options(settings, COUNTER_FLUSH_INTERVAL=30000)
+    cache.incr_buffered("a")
+    other.incr_buffered("a")
+    assert other.counter_stats()["pending"] == 2
+
+    # closed at the end of each request, the increments stay buffered
+    cache.close()
+    assert cache.counter_stats()["pending"] == 2
+    other.flush_counters()
+    assert cache.get("a") == 2
+
+
+def test_counter_buffer_per_prefix(cache: RedisCache, settings):
+    caches_setting = copy.deepcopy(settings.CACHES)
+    caches_setting["default"]["OPTIONS"]["COUNTER_FLUSH_INTERVAL"] = 30000
+    caches_setting["other"] = {**caches_setting["default"], "KEY_PREFIX": "other"}
+    settings.CACHES = caches_setting
+    cache = cast("RedisCache", caches["default"])
+    other = cast("RedisCache", caches["other"])
+
+    cache.incr_buffered("a")
+    other.incr_buffered("a", 2)
+    assert cache.counter_stats()["pending"] == 1
+    assert other.counter_stats()["pending"] == 1
+
+    # each buffer is flushed by a cache making keys with its prefix
+    cache.flush_counters()
+    other.flush_counters()
+    assert cache.get("a") == 1
+    assert other.get("a") == 2
+
+
+def test_herd_header(cache: RedisCache, settings):
+    if not isinstance(cache.client, herd.HerdClient):
+        pytest.skip("Only HerdClient stores a header")
+
+    cache.set("a", {"value": 1})
+    cache.set("b", 2)
+    raw = cast("bytes", cache.client.get_client(write=False).get(cache.make_key("a")))
+    assert raw.startswith(herd._HEADER_MAGIC)
+    assert cache.get_many(["a", "b"]) == {"a": {"value": 1}, "b": 2}
+
+    # values stored before the header are still read
+    legacy: Any = (herd.Marker(), "old", int(time.time()) + 60)
+    DefaultClient.set(cache.client, "c", legacy)
+    assert cache.get("c") == "old"
+
+
+def test_refresh_workers(cache: RedisCache, settings):
+    cache = cache_with_options(settings, REFRESH_WORKERS=1, REFRESH_QUEUE_SIZE=0)
+    if isinstance(cache.client, ShardClient):
+        pytest.skip("ShardClient keeps leases on the server of the key")
+
+    for key in ("a", "b", "c"):
+        cache.get_or_refresh(key, lambda: "old")
+        cache.delete(key)
+
+    release = threading.Event()
+
+    def compute():
+        release.wait(5)
+        return "new"
+
+    try:
+        assert cache.get_or_refresh("a", compute) == "old"
+        # the only worker is busy
+        assert cache.get_or_refresh("b", compute) == "old"
+    finally:
+        release.set()
+    executor = cache.client._refresh_executor()
+    for _ in range(50):
+        if not executor.pending:
+            break
+        time.sleep(0.1)
+    assert cache.get("a") == "new"
+    assert cache.get("b") is None
+
+    # refreshed by another process
+    lease_key = cache.client._make_key(f"{default._LEASE_KEY}{cache.make_key('c')}")
+    cache.client.get_client(write=True).set(lease_key, "other", px=5000)
+    assert cache.get_or_refresh("c", lambda: "new") == "old"
+    for _ in range(50):
+        if not executor.pending:
+            break
+        time.sleep(0.1)
+    assert cache.get("c") is None
+
+
+def test_herd_xfetch(cache: RedisCache, settings):
+    cache = cache_with_options(settings, HERD_MODE="xfetch")
+    if not isinstance(cache.client, herd.HerdClient):
+        pytest.skip("Only HerdClient supports HERD_MODE")
+
+    assert cache.get("a") is None
+    time.sleep(0.05)
+    cache.set("a", "value", timeout=60)
+    raw = cast("bytes", cache.client.get_client(write=False).get(cache.make_key("a")))
+    _, _, compute_time = herd._HEADER.unpack_from(raw)
+    assert compute_time >= 0.05
+    assert cache.get("a") == "value"
+
+    # a miss older than the herd timeout isn't counted as compute time
+    assert cache.get("c") is None
+    missed_at = time.monotonic() - settings.CACHE_HERD_TIMEOUT - 1
+    cache.client._misses[cache.make_key("c")] = missed_at
+    cache.set("c", "value", timeout=60)
+    raw = cast("bytes", cache.client.get_client(write=False).get(cache.make_key("c")))
+    assert herd._HEADER.unpack_from(raw)[2] == 0.0
+
+    # refreshed early when expiring soon compared to the compute time
+    packed = cache.client._pack(1, 1, compute_time=1e6)
+    DefaultClient.set(cache.client, "b", packed, timeout=10)
+    assert cache.get("b") is None
+    packed = cache.client._pack(1, 1, compute_time=0.0)
+    DefaultClient.set(cache.client, "b", packed, timeout=10)
+    assert cache.get("b") == 1
+
+
+def test_herd_mode_invalid():
+    cache = RedisCache(
+        "redis://127.0.0.1:6379",
+        {
+            "OPTIONS": {
+                "CLIENT_CLASS": "django_redis.client.HerdClient",
+                "HERD_MODE": "always",
+            },
+        },
+    )
+    with pytest.raises(ImproperlyConfigured, match="HERD_MODE must be one of"):
+        cache.client  # noqa: B018
+
+
+def test_herd_counter_companion(cache: RedisCache, settings):
+    if not isinstance(cache.client, herd.HerdClient):
+        pytest.skip("Only HerdClient stores a header")
+    cache = cache_with_options(settings, NATIVE_FLOATS=True)
+
+    cache.set("a", 1, timeout=60)
+    assert cache.incr("a", 10) == 11
+    assert cache.incr_many({"a": 1, "b": 5}, ignore_key_check=True) == {
+        "a": 12,
+        "b": 5,
+    }
+    assert cache.incr_float("a", 0.5) == 12.5
+    assert cache.get_many(["a", "b"]) == {"a": 12.5, "b": 5}
+    assert 60 < cache.ttl("a") <= 60 + settings.CACHE_HERD_TIMEOUT
+
+    # numbers are stored as is, their header in a companion key
+    client = cache.client.get_client(write=True)
+    key = cache.make_key("a")
+    companion = cache.client._companion(key)
+    assert client.get(key) == b"12.5"
+    assert cast("bytes", client.get(companion)).startswith(herd._HEADER_MAGIC)
+    assert 60000 < client.pttl(companion) <= 1000 * (60 + settings.CACHE_HERD_TIMEOUT)
+    assert sorted(cache.keys("*")) == ["a", "b"]
+
+    # a stale header makes the value a miss
+    header = herd._HEADER.pack(herd._HEADER_MAGIC, int(time.time()) - 100, 0.0)
+    client.set(companion, header)
+    assert cache.get("a") is None
+    assert cache.get_many(["a"]) == {"a": None}
+
+    cache.set("a", 1, timeout=None)
+    assert not client.exists(companion)
+    cache.set("a", 2, timeout=60)
+    assert cache.delete("a")
+    assert not client.exists(companion)
+
+    # companions expire with their keys
+    cache.set("a", 2, timeout=60)
+    assert cache.expire("a", 10)
+    assert 0 < client.pttl(companion) <= 10000
+    assert cache.pexpire_at("a", int(time.time() * 1000) + 5000)
+    assert 0 < client.pttl(companion) <= 5000
+    assert cache.persist("a")
+    assert not client.exists(companion)
+    assert cache.get("a") == 2
+
+    # and are removed by delete_pattern
+    cache.set("a", 2, timeout=60)
+    assert cache.delete_pattern("a*") == 1
+    assert not client.exists(companion)
+
+
+def test_herd_clear_prefix_companions(cache: RedisCache, settings):
+    caches_setting = copy.deepcopy(settings.CACHES)
+    caches_setting["default"]["KEY_PREFIX"] = "cache"
+    caches_setting["default"]["OPTIONS"]["CLEAR_MODE"] = "prefix"
+    settings.CACHES = caches_setting
+    cache = cast("RedisCache", caches["default"])
+    if not isinstance(cache.client, herd.HerdClient):
+        pytest.skip("Only HerdClient stores a header")
+
+    cache.set("a", 1, timeout=60)
+    client = cache.client.get_client(write=True)
+    assert client.exists(cache.client._companion(cache.make_key("a")))
+    cache.clear()
+    assert client.keys("*") == []
+
+
+def test_herd_touch_rewrites_expiry(cache: RedisCache, settings):
+    if not isinstance(cache.client, herd.HerdClient):
+        pytest.skip("Only HerdClient stores a header")
+
+    assert cache.get("a") is None
+    time.sleep(0.05)
+    cache.set("a", "value", timeout=10)
+    assert cache.touch("a", 100)
+    raw = cast("bytes", cache.client.get_client(write=False).get(cache.make_key("a")))
+    _, herd_timeout, compute_time = herd._HEADER.unpack_from(raw)
+    assert herd_timeout >= time.time() + 99
+    assert compute_time >= 0.05
+    assert cache.ttl("a") == 100 + settings.CACHE_HERD_TIMEOUT
+
+    assert cache.touch_many(["a", "missing"], timeout=None) == {
+        "a": True,
+        "missing": False,
+    }
+    assert cache.ttl("a") is None
+    assert cache.get("a") == "value"
+
+    cache.set("num", 1, timeout=10)
+    assert cache.touch("num", 100)
+    companion = cache.client._companion(cache.make_key("num"))
+    header = cache.client.get_client(write=False).get(companion)
+    _, herd_timeout, _ = herd._HEADER.unpack_from(cast("bytes", header))
+    assert herd_timeout >= time.time() + 99
+
+    assert cache.touch_many(["a", "num"], timeout=0) == {"a": True, "num": True}
+    assert not cache.has_key("a")
+    assert not cache.client.get_client(write=False).exists(companion)
+
+
+def test_chunk_size_herd_touch(cache: RedisCache, settings):
+    cache = cache_with_options(settings, CHUNK_SIZE=1024)
+    if not isinstance(cache.client, herd.HerdClient):
+        pytest.skip("Only HerdClient stores a header")
+    raw = _raw_client(cache, "big")
+    chunks = cache.client._chunks_key(cache.client.make_key("big"))
+    value = secrets.token_hex(5000)
+
+    cache.set("big", value, timeout=10)
+    assert cache.touch("big", 100)
+    (first,) = [v for k, v in raw.hgetall(chunks).items() if k.endswith(b":0")]
+    _, herd_timeout, _ = herd._HEADER.unpack_from(first)
+    assert herd_timeout >= time.time() + 99
+    assert 100 < raw.ttl(chunks) <= 100 + settings.CACHE_HERD_TIMEOUT
+    assert cache.get("big") == value
+
+    assert cache.touch_many(["big", "missing"], timeout=0) == {
+        "big": True,
+        "missing": False,
+    }
+    assert not raw.exists(chunks)
+
+
+def test_hash_bucketing_herd(cache: RedisCache, settings):
+    cache = cache_with_options(settings, HASH_BUCKETING=4)
+    if not isinstance(cache.client, herd.HerdClient):
+        pytest.skip("Only HerdClient stores a header")
+
+    cache.set("a", 1, timeout=60)
+    assert cache.incr("a") == 2
+    assert cache.touch("a", 100)
+    assert cache.get("a") == 2
+    assert cache.touch("a", 0)
+    assert not cache.has_key("a")
@@ -8,6 +8,7 @@ from pytest_mock import MockerFixture
 
 from django_redis.cache import RedisCache
 from django_redis.client import DefaultClient, ShardClient
+from django_redis.util import default_reverse_key
 from tests.settings_wrapper import SettingsWrapper
 
 
@@ -133,7 +134,12 @@ class TestDefaultClient:
         client = DefaultClient()
         client._backend = Mock()
         client._backend.key_prefix = ""
-        get_client_mock.return_value.scan_iter.return_value = [":1:foo", ":1:foo-a"]
+        client.reverse_key = default_reverse_key
+        get_client_mock.return_value.scan_iter.return_value = [
+            b":1:foo",
+            b":1:foo-a",
+            b":1:django-redis:tag:foo",
+        ]
         get_client_mock.return_value.pipeline.return_value = Mock()
         get_client_mock.return_value.pipeline.return_value.delete = Mock()
         get_client_mock.return_value.pipeline.return_value.execute = Mock()
@@ -142,7 +148,7 @@ class TestDefaultClient:
 
         assert get_client_mock.return_value.pipeline.return_value.delete.call_count == 2
         get_client_mock.return_value.pipeline.return_value.delete.assert_has_calls(
-            [call(":1:foo"), call(":1:foo-a")],
+            [call(b":1:foo"), call(b":1:foo-a")],
         )
         get_client_mock.return_value.pipeline.return_value.execute.assert_called_once()
 
@@ -196,8 +202,9 @@ class TestShardClient:
         client = ShardClient()
         client._backend = Mock()
         client._backend.key_prefix = ""
+        client.reverse_key = default_reverse_key
         connection = Mock()
-        connection.scan_iter.return_value = [Mock(), Mock()]
+        connection.scan_iter.return_value = [b":1:foo", b":1:foo-a"]
         connection.delete.return_value = 0
         client._serverdict = {"test": connection}
 
@@ -1,8 +1,15 @@
+import datetime
+import decimal
 import pickle
+import threading
+import uuid
 
+import msgpack
 import pytest
 from django.core.exceptions import ImproperlyConfigured
+from django.utils.functional import lazy
 
+from django_redis.serializers.msgpack import MSGPackSerializer
 from django_redis.serializers.pickle import PickleSerializer
 
 
@@ -25,3 +32,120 @@ class TestPickleSerializer:
             f" {pickle.HIGHEST_PROTOCOL}",
         ):
             PickleSerializer({"PICKLE_VERSION": pickle.HIGHEST_PROTOCOL + 1})
+
+    def test_out_of_band_requires_protocol_5(self):
+        with pytest.raises(
+            ImproperlyConfigured,
+            match="PICKLE_OUT_OF_BAND_THRESHOLD requires PICKLE_VERSION >= 5",
+        ):
+            PickleSerializer({"PICKLE_VERSION": 4, "PICKLE_OUT_OF_BAND_THRESHOLD": 1})
+
+    def test_out_of_band_invalid_threshold(self):
+        with pytest.raises(
+            ImproperlyConfigured,
+            match="PICKLE_OUT_OF_BAND_THRESHOLD value must be an integer",
+        ):
+            PickleSerializer(
+                {"PICKLE_VERSION": 5, "PICKLE_OUT_OF_BAND_THRESHOLD": "big"},
+            )
+
+    def test_out_of_band_small_values_stay_in_band(self):
+        serializer = PickleSerializer(
+            {"PICKLE_VERSION": -1, "PICKLE_OUT_OF_BAND_THRESHOLD": 1024},
+        )
+        value = {"payload": bytearray(b"x" * 10)}
+        data = serializer.dumps(value)
+        assert isinstance(data, bytes)
+        assert serializer.loads(data) == value
+
+    def test_out_of_band_round_trip(self):
+        serializer = PickleSerializer(
+            {"PICKLE_VERSION": 5, "PICKLE_OUT_OF_BAND_THRESHOLD": 1024},
+        )
+        first = pickle.PickleBuffer(bytearray(b"a" * 4096))
+        second = pickle.PickleBuffer(bytearray(b"b" * 2048))
+        value = {"first": first, "second": second, "small": b"c" * 10}
+
+        data = serializer.dumps(value)
+        assert isinstance(data, memoryview)
+
+        result = serializer.loads(bytes(data))
+        assert bytes(result["first"]) == b"a" * 4096
+        assert bytes(result["second"]) == b"b" * 2048
+        assert result["small"] == b"c" * 10
+
+    def test_out_of_band_loads_legacy_values(self):
+        serializer = PickleSerializer(
+            {"PICKLE_VERSION": 5, "PICKLE_OUT_OF_BAND_THRESHOLD": 1024},
+        )
+        assert serializer.loads(pickle.dumps([1, 2, 3])) == [1, 2, 3]
+
+    def test_out_of_band_bytes_values(self):
+        serializer = PickleSerializer(
+            {"PICKLE_VERSION": 5, "PICKLE_OUT_OF_BAND_THRESHOLD": 1024},
+        )
+        value = [b"a" * 4096, bytearray(b"b" * 4096), "text"]
+
+        data = serializer.dumps(value)
+        assert isinstance(data, memoryview)
+        # the raw payloads are not duplicated inside the pickle stream
+        assert len(data) < 2 * 4096 + 200
+
+        result = serializer.loads(bytes(data))
+        assert result == value
+        assert type(result[0]) is bytes
+        assert type(result[1]) is bytearray
+
+
+class TestMSGPackSerializer:
+    def test_ext_types_round_trip(self):
+        serializer = MSGPackSerializer({})
+        value = {
+            "datetime": datetime.datetime(2024, 1, 2, 3, 4, 5, 6),
+            "aware": datetime.datetime(2024, 1, 2, tzinfo=datetime.timezone.utc),
+            "date": datetime.date(2024, 1, 2),
+            "time": datetime.time(3, 4, 5),
+            "timedelta": datetime.timedelta(days=-1, seconds=5, microseconds=6),
+            "decimal": decimal.Decimal("1.10"),
+            "uuid": uuid.uuid4(),
+            "set": {1, "a", (2, 3), datetime.date(2024, 1, 2)},
+            "frozenset": frozenset({1, 2}),
+        }
+        assert serializer.loads(serializer.dumps(value)) == value
+
+    def test_lazy_strings(self):
+        serializer = MSGPackSerializer({})
+        lazy_str = lazy(lambda: "lazy", str)()
+        assert serializer.loads(serializer.dumps([lazy_str])) == ["lazy"]
+
+    def test_plain_values_are_compatible(self):
+        serializer = MSGPackSerializer({})
+        value = {"list": [1, 2.5, None, True], "bytes": b"x", "str": "heló"}
+        assert serializer.dumps(value) == msgpack.dumps(value)
+        assert serializer.loads(msgpack.dumps(value)) == value
+
+    def test_unknown_type(self):
+        serializer = MSGPackSerializer({})
+        with pytest.raises(TypeError, match="Object of type object"):
+            serializer.dumps(object())
+        # the per-thread packer is still usable after a failure
+        assert serializer.loads(serializer.dumps([1])) == [1]
+
+    def test_use_list_disabled(self):
+        serializer = MSGPackSerializer({"MSGPACK_USE_LIST": False})
+        assert serializer.loads(serializer.dumps({"a": [1, [2]]})) == {"a": (1, (2,))}
+
+    def test_packer_per_thread(self):
+        serializer = MSGPackSerializer({})
+        packers = []
+
+        def dumps():
+            serializer.dumps(1)
+            packers.append(serializer._local.packer)
+
+        threads = [threading.Thread(target=dumps) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert packers[0] is not packers[1]